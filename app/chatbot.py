@@ -2,36 +2,20 @@
 import sys, os
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
 
-from src.vsm_ir import load_processed, build_term_stats, tfidf_matrix, search
-import re, heapq
+from src.corpus_index import get_index
+from src.sentence_index import split_sentences
 
 def extract_sentences(text):
-    # Ganti newline jadi titik jika di antara huruf/angka
-    text = re.sub(r'(?<=[a-z0-9])\n(?=[A-Z0-9])', '. ', text)
-    # Pecah berdasarkan tanda baca dan newline
-    sents = re.split(r'(?<=[.!?])\s+|\n+', text)
-    # Bersihkan dan buang kalimat pendek
-    sents = [s.strip() for s in sents if len(s.strip()) > 20]
-    return sents
-
-def score_sentence_by_query(sent, q_tokens):
-    toks = sent.lower().split()
-    return sum(1 for t in toks if t in q_tokens)
+    # Pecah di tanda baca / newline, buang kalimat pendek (lihat split_sentences)
+    return [text[s:e] for s, e in split_sentences(text)]
 
 def rag_answer(query, k=3, scheme="normal"):
-    docs, names = load_processed()
-    vocab, t2i, TF, DF, lens, avg_len = build_term_stats(docs)
-    TFIDF_normal, idf = tfidf_matrix(TF, DF, len(docs), sublinear=False)
-    TFIDF_sub, _ = tfidf_matrix(TF, DF, len(docs), sublinear=True)
-
-    if scheme == "bm25":
-        results = search(query, TF=TF, DF=DF, lens=lens, avg_len=avg_len, t2i=t2i, names=names, docs=docs, top_k=k, scheme="bm25")
-    else:
-        TFIDF = TFIDF_sub if scheme=="sublinear" else TFIDF_normal
-        results = search(query, TFIDF=TFIDF, t2i=t2i, idf=idf, names=names, docs=docs, top_k=k, scheme=scheme)
+    # indeks dipakai bersama (shared) dengan ragapp, dibangun sekali per versi korpus
+    index = get_index()
+    results = index.search(query, k=k, scheme=scheme)
 
     # build template jawaban
-    q_tokens = set(query.replace("AND","").replace("OR","").replace("NOT","").lower().split())
+    q_terms = index.query_terms(query)
     lines = []
     lines.append("Berdasarkan dokumen teratas berikut:")
     for doc, score, idx in results:
@@ -40,14 +24,10 @@ def rag_answer(query, k=3, scheme="normal"):
     # pilih 3 sentences
     picked = 0
     for doc, score, idx in results:
-        sents = extract_sentences(docs[idx])
-        # score sentences
-        scored = [(score_sentence_by_query(s, q_tokens), s) for s in sents]
-        scored = sorted(scored, key=lambda x: x[0], reverse=True)
-        for sc, s in scored[:2]:  # up to 2 sents each doc
-            if sc>0:
-                lines.append(f"- {s}")
-                picked += 1
+        # kalimat sudah di-index: lookup token + heap kecil, up to 2 sents each doc
+        for sc, sid in index.top_sentences(idx, q_terms, n=2):
+            lines.append(f"- {index.snippet(idx, sid, q_terms)}")
+            picked += 1
             if picked >= 5:
                 break
         if picked >= 5:
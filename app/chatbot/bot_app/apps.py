@@ -1,5 +1,84 @@
+import os
+import sys
+
 from django.apps import AppConfig
+from django.conf import settings
+
+# Server produksi yang melayani request; proses lain (migrate, test, shell,
+# celery, skrip) tidak memuat model kecuali MODEL_WARMUP=1 diset di config server
+SERVERS = ('gunicorn', 'uwsgi', 'daphne', 'uvicorn')
+
+
+def _is_runserver():
+    return os.path.basename(sys.argv[0]) == 'manage.py' and sys.argv[1:2] == ['runserver']
+
+
+def _should_warm_up():
+    """Warm-up hanya untuk proses yang melayani request (allowlist server / MODEL_WARMUP=1)."""
+    flag = os.environ.get('MODEL_WARMUP')
+    if flag == '0' or not getattr(settings, 'MODEL_WARMUP', True):
+        return False
+    if flag == '1':
+        return True
+    if sys.argv and any(server in sys.argv[0] for server in SERVERS):
+        return True
+    if not _is_runserver():
+        return False
+    # runserver dengan autoreload: hanya proses anak yang melayani request
+    return '--noreload' in sys.argv or os.environ.get('RUN_MAIN') == 'true'
+
+
+def _reload_interval():
+    """Detik antar pemeriksaan versi model di disk (0 = watcher mati)."""
+    from .model_registry import RELOAD_INTERVAL
+    return float(os.environ.get('MODEL_RELOAD_INTERVAL',
+                                getattr(settings, 'MODEL_RELOAD_INTERVAL', RELOAD_INTERVAL)))
+
+
+def _start_warm_up():
+    from .model_registry import registry
+
+    registry.warm_up()
+    # training/rollback di worker lain -> reload di worker ini dalam 1 interval
+    registry.watch(_reload_interval())
+
+
+def _warm_up_post_fork(start=_start_warm_up):
+    """
+    Server pre-fork (gunicorn --preload, uwsgi tanpa lazy-apps) memanggil
+    ready() di master. Thread warm-up/watcher master tidak ikut ke worker
+    hasil fork, dan lock yang dipegang thread itu saat fork tidak pernah
+    dilepas di worker. Jadi di master tidak ada thread: warm-up dimulai di
+    setiap worker tepat setelah fork, atau pada request pertama bila
+    aplikasi dimuat langsung di worker (tanpa fork sesudah ready()).
+    """
+    from django.core.signals import request_started
+
+    master = os.getpid()
+
+    def after_fork():
+        if os.getppid() == master:  # worker server, bukan proses yang di-fork worker
+            start()
+
+    def first_request(**kwargs):
+        request_started.disconnect(dispatch_uid='bot_app.warm_up')
+        start()
+
+    if hasattr(os, 'register_at_fork'):
+        os.register_at_fork(after_in_child=after_fork)
+    request_started.connect(first_request, weak=False, dispatch_uid='bot_app.warm_up')
 
 
 class BotAppConfig(AppConfig):
     name = 'bot_app'
+
+    def ready(self):
+        # Modul pemilik artefak mendaftarkan loader-nya ke registry (import murah)
+        from . import utils, clustering_search, sentiment_analyzer  # noqa: F401
+
+        if not _should_warm_up():
+            return
+        if _is_runserver():
+            _start_warm_up()  # proses anak runserver tidak di-fork lagi
+        else:
+            _warm_up_post_fork()
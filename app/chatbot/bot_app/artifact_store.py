@@ -0,0 +1,227 @@
+"""
+Penyimpanan artefak model ber-versi dan atomik.
+
+Satu folder model (mis. `model/model_clustering_dokumen`) berisi:
+
+    versions/<versi>/*.pkl + MANIFEST.json   bundle lengkap satu kali training
+    CURRENT                                  nama versi aktif (diganti atomik)
+
+Training menulis semua pickle ke direktori sementara, fsync, lalu rename
+menjadi `versions/<versi>` (versi = waktu + hash isi bundle) dan baru
+kemudian mengganti CURRENT dengan `os.replace`. Loader membaca CURRENT SEKALI
+lalu memuat semua file dari direktori versi yang sama, jadi tidak pernah
+melihat campuran vectorizer baru + kmeans lama. Versi lama dihapus dengan
+retensi `KEEP_VERSIONS`; rollback = menunjuk CURRENT ke versi sebelumnya.
+
+File selain `.pkl` (mis. buffer teks dokumen) disimpan apa adanya sebagai
+bytes dan dikembalikan loader sebagai Path, supaya bisa di-mmap.
+
+Folder tanpa CURRENT (format lama: pickle langsung di folder) tetap terbaca.
+
+    python -m bot_app.artifact_store list     model/model_clustering_dokumen
+    python -m bot_app.artifact_store rollback model/model_clustering_dokumen [versi]
+"""
+
+import hashlib
+import json
+import os
+import pickle
+import shutil
+import sys
+import time
+import uuid
+from pathlib import Path
+
+MODEL_ROOT = Path(__file__).resolve().parent / 'model'
+CURRENT_NAME = 'CURRENT'
+MANIFEST_NAME = 'MANIFEST.json'
+VERSIONS_DIR = 'versions'
+KEEP_VERSIONS = 3
+
+
+def _fsync_dir(path):
+    try:
+        fd = os.open(path, os.O_RDONLY)
+    except OSError:  # Windows: direktori tidak bisa dibuka
+        return
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+def _write_atomic(path, data):
+    tmp = path.with_name(path.name + '.tmp')
+    with open(tmp, 'wb') as f:
+        f.write(data)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, path)
+    _fsync_dir(path.parent)
+
+
+# ------------------------------------------------------------
+# Baca
+# ------------------------------------------------------------
+def current_version(base_dir):
+    """Nama versi aktif, atau None (belum ada / format lama)."""
+    try:
+        name = (Path(base_dir) / CURRENT_NAME).read_text(encoding='utf-8').strip()
+    except FileNotFoundError:
+        return None
+    return name or None
+
+
+def current_bundle(base_dir):
+    """(versi, direktori) bundle aktif; format lama -> (None, base_dir)."""
+    version = current_version(base_dir)
+    if version is None:
+        return None, Path(base_dir)
+    return version, Path(base_dir) / VERSIONS_DIR / version
+
+
+def version_stamp(base_dir):
+    """
+    Stempel murah versi di disk untuk watcher reload: isi CURRENT, atau
+    (nama, mtime, ukuran) pickle untuk format lama. Berubah setiap publish/rollback.
+    """
+    version = current_version(base_dir)
+    if version is not None:
+        return version
+    try:
+        entries = sorted(os.scandir(base_dir), key=lambda e: e.name)
+    except OSError:
+        return None
+    return tuple((e.name, e.stat().st_mtime_ns, e.stat().st_size)
+                 for e in entries if e.name.endswith('.pkl')) or None
+
+
+def load_bundle(base_dir, names, optional=()):
+    """
+    Muat pickle `names` dari SATU versi yang konsisten.
+    `optional` = file yang boleh tidak ada (bundle versi lama); dilewati jika absen.
+    File non-`.pkl` tidak dibaca: nilainya Path di direktori versi (untuk mmap).
+    Return (versi, {nama: objek}); None jika ada file wajib yang belum tersedia.
+    """
+    version, folder = current_bundle(base_dir)
+    paths = {name: folder / name for name in names}
+    if not all(p.exists() for p in paths.values()):
+        return None
+    paths.update((name, folder / name) for name in optional if (folder / name).exists())
+    objects = {}
+    for name, path in paths.items():
+        if not name.endswith('.pkl'):
+            objects[name] = path
+            continue
+        with open(path, 'rb') as f:
+            objects[name] = pickle.load(f)
+    return version, objects
+
+
+def list_versions(base_dir):
+    """Versi yang tersimpan, terlama -> terbaru (urut `created` di manifest)."""
+    root = Path(base_dir) / VERSIONS_DIR
+    if not root.is_dir():
+        return []
+    created = {}
+    for p in root.iterdir():
+        try:
+            created[p.name] = json.loads((p / MANIFEST_NAME).read_text(encoding='utf-8'))['created']
+        except (OSError, ValueError, KeyError):
+            continue  # direktori sementara / versi rusak
+    return sorted(created, key=lambda v: (created[v], v))
+
+
+# ------------------------------------------------------------
+# Tulis / publikasi
+# ------------------------------------------------------------
+def publish_bundle(base_dir, objects, keep=KEEP_VERSIONS):
+    """
+    Simpan {nama_file: objek} sebagai versi baru lalu aktifkan secara atomik.
+    Objek `bytes` untuk file non-`.pkl` ditulis mentah. Return nama versi baru.
+    """
+    base_dir = Path(base_dir)
+    root = base_dir / VERSIONS_DIR
+    root.mkdir(parents=True, exist_ok=True)
+    tmp = root / f'.tmp-{uuid.uuid4().hex}'
+    tmp.mkdir()
+    try:
+        digests = {}
+        for name, obj in objects.items():
+            if name.endswith('.pkl'):
+                data = pickle.dumps(obj, protocol=pickle.HIGHEST_PROTOCOL)
+            else:
+                data = bytes(obj)
+            digests[name] = hashlib.sha256(data).hexdigest()
+            with open(tmp / name, 'wb') as f:
+                f.write(data)
+                f.flush()
+                os.fsync(f.fileno())
+        bundle_hash = hashlib.sha256(
+            json.dumps(digests, sort_keys=True).encode('utf-8')).hexdigest()[:12]
+        version = f"{time.strftime('%Y%m%d-%H%M%S')}-{bundle_hash}"
+        manifest = {'version': version, 'created': time.time(), 'files': digests}
+        _write_atomic(tmp / MANIFEST_NAME, json.dumps(manifest, indent=2).encode('utf-8'))
+        _fsync_dir(tmp)
+        final = root / version
+        if final.exists():  # isi identik dalam detik yang sama
+            shutil.rmtree(tmp)
+        else:
+            os.replace(tmp, final)
+            _fsync_dir(root)
+    except BaseException:
+        shutil.rmtree(tmp, ignore_errors=True)
+        raise
+
+    activate(base_dir, version)
+    gc_versions(base_dir, keep)
+    return version
+
+
+def activate(base_dir, version):
+    """Jadikan `version` versi aktif (pointer CURRENT diganti atomik)."""
+    if not (Path(base_dir) / VERSIONS_DIR / version / MANIFEST_NAME).exists():
+        raise ValueError(f"Versi {version} tidak ada di {base_dir}")
+    _write_atomic(Path(base_dir) / CURRENT_NAME, version.encode('utf-8'))
+
+
+def rollback(base_dir, version=None):
+    """Aktifkan `version`, atau versi tepat sebelum versi aktif. Return versi aktif baru."""
+    if version is None:
+        versions = list_versions(base_dir)
+        current = current_version(base_dir)
+        older = versions[:versions.index(current)] if current in versions else versions[:-1]
+        if not older:
+            raise ValueError('Tidak ada versi sebelumnya untuk rollback')
+        version = older[-1]
+    activate(base_dir, version)
+    return version
+
+
+def gc_versions(base_dir, keep=KEEP_VERSIONS):
+    """Hapus versi lama di luar `keep` terbaru (versi aktif tidak pernah dihapus)."""
+    current = current_version(base_dir)
+    versions = list_versions(base_dir)
+    removed = []
+    for version in versions[:-keep] if keep > 0 else versions:
+        if version != current:
+            shutil.rmtree(Path(base_dir) / VERSIONS_DIR / version, ignore_errors=True)
+            removed.append(version)
+    # sisa direktori sementara dari proses training yang gagal di tengah jalan
+    for tmp in (Path(base_dir) / VERSIONS_DIR).glob('.tmp-*'):
+        if time.time() - tmp.stat().st_mtime > 3600:
+            shutil.rmtree(tmp, ignore_errors=True)
+    return removed
+
+
+if __name__ == '__main__':
+    if len(sys.argv) < 3 or sys.argv[1] not in ('list', 'rollback'):
+        print(__doc__)
+        sys.exit(1)
+    folder = Path(sys.argv[2])
+    if sys.argv[1] == 'list':
+        active = current_version(folder)
+        for v in list_versions(folder):
+            print(('* ' if v == active else '  ') + v)
+    else:
+        print(f"Versi aktif: {rollback(folder, sys.argv[3] if len(sys.argv) > 3 else None)}")
@@ -1,70 +1,120 @@
 import os
-import pickle
-import numpy as np
+from dataclasses import dataclass
+from types import MappingProxyType
+
+from .artifact_store import load_bundle, rollback, version_stamp
+from .doc_store import DOC_FILES, DocStore
+from .ivf_index import NPROBE, TOP_K, IVFIndex
+from .model_registry import registry
 
 # --- 1. KONFIGURASI PATH MODEL ---
 # Mengambil path root project secara dinamis
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 MODEL_DIR = os.path.join(BASE_DIR, 'bot_app', 'model', 'model_clustering_dokumen')
+MODEL_FILES = ('tfidf_vectorizer.pkl', 'kmeans_model.pkl')
+# Dokumen: DOC_FILES (kolumnar) atau cluster_label.pkl (bundle lama); sisanya tidak ada di bundle lama
+OPTIONAL_FILES = DOC_FILES + ('cluster_label.pkl', 'cluster_summary.pkl', 'summary_idf.pkl',
+                              'ivf_index.pkl')
+
+# --- 2. SNAPSHOT MODEL (immutable; reload = tukar satu referensi di registry) ---
+@dataclass(frozen=True)
+class ModelClustering:
+    """Satu versi lengkap model clustering. Tidak pernah diubah setelah dibuat."""
+    vectorizer: object
+    kmeans: object
+    dokumen: DocStore                # teks dokumen (buffer UTF-8 + offset, mmap)
+    ringkasan: MappingProxyType      # {cluster_id: (ringkasan, fitur)} hasil training
+    version: str = None
+    idf: object = None               # GlobalIDF summarizer (None = fit per panggilan)
+    index: IVFIndex = None           # vektor dokumen per cluster untuk pencarian top-k
+
+    @property
+    def data_dokumen(self):
+        """{cluster_id: dokumen} read-only; string dibuat saat diakses."""
+        return self.dokumen.per_cluster
 
-# --- 2. INISIALISASI VARIABEL GLOBAL ---
-vectorizer = None
-kmeans = None
-data_dokumen = {}
+def snapshot_model():
+    """Snapshot model aktif (None jika belum ada). Ambil SEKALI per request."""
+    return registry.get("clustering")
 
-# --- 3. FUNGSI LOAD MODEL (Dipakai saat Start & Reload) ---
+# --- 3. FUNGSI LOAD MODEL (dipanggil registry saat warm-up / pemakaian pertama / reload) ---
 def load_resources():
-    """Helper function untuk memuat file .pkl dari disk"""
-    global vectorizer, kmeans, data_dokumen
+    """Muat vectorizer, kmeans dan dokumen dari SATU versi bundle; None jika belum lengkap"""
     try:
-        path_vec = os.path.join(MODEL_DIR, 'tfidf_vectorizer.pkl')
-        path_kmeans = os.path.join(MODEL_DIR, 'kmeans_model.pkl')
-        path_label = os.path.join(MODEL_DIR, 'cluster_label.pkl')
-
-        # Cek keberadaan file
-        if not (os.path.exists(path_vec) and os.path.exists(path_kmeans) and os.path.exists(path_label)):
+        print("Loading Model Clustering dari Disk...")
+        bundle = load_bundle(MODEL_DIR, MODEL_FILES, OPTIONAL_FILES)
+        if bundle is not None and all(name in bundle[1] for name in DOC_FILES):
+            dokumen = DocStore.open(bundle[1])
+        elif bundle is not None and 'cluster_label.pkl' in bundle[1]:
+            dokumen = DocStore.from_cluster_map(bundle[1]['cluster_label.pkl'])
+        else:
             print("[WARNING] File model belum lengkap. Silakan lakukan Training dulu.")
-            return False
+            return None
 
-        print("Loading Model Clustering dari Disk...")
-        vectorizer = pickle.load(open(path_vec, 'rb'))
-        kmeans = pickle.load(open(path_kmeans, 'rb'))
-        data_dokumen = pickle.load(open(path_label, 'rb'))
-        print("✅ Model Clustering Siap Digunakan!")
-        return True
+        versi, obj = bundle
+        print(f"✅ Model Clustering Siap Digunakan! (versi {versi or 'lama'})")
+        ringkasan = MappingProxyType(
+            {k: (r, tuple(f)) for k, (r, f) in obj.get('cluster_summary.pkl', {}).items()})
+        index = obj.get('ivf_index.pkl') or IVFIndex.from_store(
+            obj['tfidf_vectorizer.pkl'], obj['kmeans_model.pkl'], dokumen)
+        return ModelClustering(obj['tfidf_vectorizer.pkl'], obj['kmeans_model.pkl'],
+                               dokumen, ringkasan, versi, obj.get('summary_idf.pkl'),
+                               index)
 
     except Exception as e:
         print(f"❌ Error Load Model: {e}")
-        return False
+        return None
+
+def _warmup(model):
+    model.kmeans.predict(model.vectorizer.transform(["halo"]))
 
-# Jalankan load pertama kali saat server nyala
-load_resources()
+registry.register("clustering", load_resources, _warmup,
+                  version=lambda: version_stamp(MODEL_DIR))
+
+def ambil_data_dokumen(model=None):
+    """{cluster_id: [dokumen, ...]} dari `model` (default: snapshot terbaru)"""
+    model = model or snapshot_model()
+    return model.data_dokumen if model else {}
+
+def ambil_ringkasan(cluster_id, model=None):
+    """(ringkasan, [(fitur, skor)]) hasil training untuk cluster; None jika belum ada"""
+    model = model or snapshot_model()
+    return model.ringkasan.get(cluster_id) if model else None
 
 # --- 4. FUNGSI UTAMA: PENCARIAN ---
-def cari_dokumen_relevan(teks_user):
+def cari_top_k(teks_user, k=TOP_K, nprobe=NPROBE, model=None):
+    """
+    Pencarian IVF: scan `nprobe` cluster dengan centroid terdekat, urutkan
+    dokumennya dengan cosine similarity. `nprobe` besar = recall naik, lebih lambat.
+    Return: [(dokumen, ID cluster, skor)] urut skor turun (skor 0 dibuang).
+    """
+    res = model or snapshot_model()
+    if not res:
+        return []
+    vec = res.vectorizer.transform([teks_user])
+    return [(res.dokumen[doc_id], c, skor)
+            for doc_id, c, skor in res.index.search(vec, k, nprobe) if skor > 0]
+
+def cari_dokumen_relevan(teks_user, model=None, k=TOP_K, nprobe=NPROBE):
     """
-    Menerima teks user -> Memprediksi Cluster -> Mengembalikan Dokumen terkait.
-    Return: (ID Cluster, List Dokumen)
+    Menerima teks user -> Mencari Dokumen paling mirip di cluster terdekat.
+    `model` = snapshot yang dipakai request (default: snapshot terbaru).
+    Return: (ID Cluster dokumen teratas, Tuple Dokumen urut relevansi)
     """
     # Cek apakah model sudah dimuat
-    if not vectorizer or not kmeans:
+    res = model or snapshot_model()
+    if not res:
         return None, ["Model belum tersedia. Silakan klik 'Latih Ulang Bot' di sidebar."]
 
     try:
-        # A. Vectorize: Ubah teks jadi angka
-        vec = vectorizer.transform([teks_user])
-        
-        # B. Predict: Tentukan masuk cluster mana
-        cluster_id = kmeans.predict(vec)[0]
-        
-        # C. Retrieve: Ambil dokumen dari gudang data
-        hasil_dokumen = data_dokumen.get(cluster_id, [])
-        
-        # Jika cluster kosong (jarang terjadi, tapi jaga-jaga)
-        if not hasil_dokumen:
-            return cluster_id, ["Belum ada dokumen di kategori ini."]
-            
-        return cluster_id, hasil_dokumen
+        hasil = cari_top_k(teks_user, k, nprobe, model=res)
+
+        # Tidak ada kata yang cocok: tetap laporkan cluster terdekat
+        if not hasil:
+            cluster_id = res.index.probe(res.vectorizer.transform([teks_user]), 1)[0]
+            return cluster_id, ["Belum ada dokumen yang cocok dengan kata kunci ini."]
+
+        return hasil[0][1], tuple(dok for dok, _, _ in hasil)
     
     except Exception as e:
         return None, [f"Terjadi kesalahan prediksi: {str(e)}"]
@@ -76,7 +126,9 @@ def reload_model_otomatis():
     Tujuannya memperbarui variabel di RAM dengan file .pkl yang baru.
     """
     print("\n--- MEMUAT ULANG MODEL (RELOAD) ---")
-    sukses = load_resources() # Panggil fungsi load yang sama
+    # Snapshot baru dibangun di samping yang lama lalu ditukar; request yang
+    # sedang berjalan tetap memakai snapshot lama sampai selesai
+    sukses = registry.reload("clustering")
     if sukses:
         print("--- RELOAD SELESAI ---\n")
         return True
@@ -84,18 +136,22 @@ def reload_model_otomatis():
         print("--- RELOAD GAGAL ---\n")
         return False
 
+def rollback_model(versi=None):
+    """Aktifkan versi model sebelumnya (atau `versi`) lalu muat ulang; return versi aktif."""
+    versi = rollback(MODEL_DIR, versi)
+    reload_model_otomatis()
+    return versi
+
 # --- 6. BLOCK TESTING MANUAL (Hanya jalan jika file dieksekusi langsung) ---
 if __name__ == "__main__":
     print("\n=== TEST MODUL CLUSTERING SEARCH ===")
-    if vectorizer is None:
+    if snapshot_model() is None:
         print("Model belum ada. Pastikan sudah training.")
     else:
         while True:
             txt = input("\nMasukkan kata kunci (ketik 'exit' keluar): ")
             if txt.lower() == 'exit': break
             
-            cid, docs = cari_dokumen_relevan(txt)
-            print(f"Prediksi: Cluster {cid}")
             print("Dokumen Relevan:")
-            for d in docs[:2]:
-                print(f"- {d}")
\ No newline at end of file
+            for d, cid, skor in cari_top_k(txt, k=3):
+                print(f"- [cluster {cid}, skor {skor:.3f}] {d}")
\ No newline at end of file
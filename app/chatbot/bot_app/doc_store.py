@@ -0,0 +1,136 @@
+"""
+Penyimpanan dokumen kolumnar untuk bundle model clustering.
+
+Menggantikan `cluster_label.pkl` ({cluster: [str, ...]}) dengan tiga file mentah:
+
+    doc_text.bin     semua dokumen, UTF-8, disambung tanpa pemisah
+    doc_offsets.npy  int64 (n+1): dokumen i = text[offsets[i]:offsets[i+1]]
+    doc_labels.npy   int32 (n): cluster tiap dokumen
+
+Saat load tidak ada jutaan objek str yang di-unpickle: buffer teks di-mmap
+(halaman dibaca OS saat dibutuhkan) dan string baru dibuat ketika dokumen
+diakses. Cluster = array int32 id dokumen; id sama dengan baris di IVFIndex.
+"""
+
+import io
+import mmap
+import os
+from collections.abc import Mapping, Sequence
+
+DOC_TEXT = 'doc_text.bin'
+DOC_OFFSETS = 'doc_offsets.npy'
+DOC_LABELS = 'doc_labels.npy'
+DOC_FILES = (DOC_TEXT, DOC_OFFSETS, DOC_LABELS)
+DOC_MMAP = os.environ.get('DOC_MMAP', '1') != '0'   # 0 = baca buffer ke RAM
+
+
+def _npy_bytes(arr):
+    import numpy as np
+
+    buf = io.BytesIO()
+    np.save(buf, arr, allow_pickle=False)
+    return buf.getvalue()
+
+
+def _map_file(path, use_mmap):
+    with open(path, 'rb') as f:
+        if use_mmap:
+            try:
+                return mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            except ValueError:  # file kosong tidak bisa di-mmap
+                pass
+        return f.read()
+
+
+class DocStore:
+    """Dokumen ber-id 0..n-1 di satu buffer UTF-8 + offset, dikelompokkan per cluster."""
+
+    def __init__(self, text, offsets, labels):
+        import numpy as np
+
+        self.text = text                        # bytes atau mmap (read-only)
+        self.offsets = offsets
+        self.labels = labels
+        order = np.argsort(labels, kind='stable').astype(np.int32)
+        ids, start = np.unique(labels[order], return_index=True)
+        bounds = list(start) + [len(order)]
+        # {cluster_id: array int32 id dokumen (urutan asli)}
+        self.clusters = {int(c): order[bounds[i]:bounds[i + 1]] for i, c in enumerate(ids)}
+        self.per_cluster = _ClusterDocs(self)
+
+    # --- tulis (training) ---
+    @staticmethod
+    def encode(dokumen_list, labels):
+        """{nama_file: bytes} siap untuk `publish_bundle`."""
+        import numpy as np
+
+        encoded = [d.encode('utf-8') for d in dokumen_list]
+        offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+        np.cumsum([len(b) for b in encoded], out=offsets[1:])
+        return {DOC_TEXT: b''.join(encoded),
+                DOC_OFFSETS: _npy_bytes(offsets),
+                DOC_LABELS: _npy_bytes(np.asarray(labels, dtype=np.int32))}
+
+    # --- baca ---
+    @classmethod
+    def open(cls, paths, use_mmap=DOC_MMAP):
+        """`paths` = {nama_file: Path} dari `load_bundle`."""
+        import numpy as np
+
+        mode = 'r' if use_mmap else None
+        return cls(_map_file(paths[DOC_TEXT], use_mmap),
+                   np.load(paths[DOC_OFFSETS], mmap_mode=mode),
+                   np.load(paths[DOC_LABELS], mmap_mode=mode))
+
+    @classmethod
+    def from_cluster_map(cls, cluster_map):
+        """Konversi `cluster_label.pkl` (bundle lama) ke store di RAM."""
+        import numpy as np
+
+        keys = sorted(cluster_map)
+        docs = [d for c in keys for d in cluster_map[c]]
+        labels = np.repeat(np.array(keys, dtype=np.int32), [len(cluster_map[c]) for c in keys])
+        files = cls.encode(docs, labels)
+        return cls(files[DOC_TEXT],
+                   np.load(io.BytesIO(files[DOC_OFFSETS])), labels)
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def __getitem__(self, doc_id):
+        start, end = int(self.offsets[doc_id]), int(self.offsets[doc_id + 1])
+        return bytes(self.text[start:end]).decode('utf-8')
+
+    def __iter__(self):
+        return (self[i] for i in range(len(self)))
+
+
+class _Dokumen(Sequence):
+    """Dokumen satu cluster; string dibuat saat diakses."""
+
+    def __init__(self, store, ids):
+        self._store, self.ids = store, ids
+
+    def __len__(self):
+        return len(self.ids)
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return [self._store[int(j)] for j in self.ids[i]]
+        return self._store[int(self.ids[i])]
+
+
+class _ClusterDocs(Mapping):
+    """{cluster_id: dokumen} read-only, antarmuka sama dengan cluster_label.pkl lama."""
+
+    def __init__(self, store):
+        self._store = store
+
+    def __getitem__(self, cluster_id):
+        return _Dokumen(self._store, self._store.clusters[cluster_id])
+
+    def __iter__(self):
+        return iter(self._store.clusters)
+
+    def __len__(self):
+        return len(self._store.clusters)
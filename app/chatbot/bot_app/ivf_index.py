@@ -0,0 +1,76 @@
+"""
+Indeks IVF (inverted file) di atas K-Means clustering dokumen.
+
+Setiap cluster menyimpan id dokumennya (int32, id = posisi di DocStore) dan
+vektor TF-IDF dokumen-dokumen itu. Query dibandingkan dengan centroid, lalu hanya
+`nprobe` cluster terdekat yang di-scan dengan cosine similarity. `nprobe`
+kecil = cepat; `nprobe` = jumlah cluster = sama dengan pencarian brute force.
+"""
+
+import os
+
+NPROBE = int(os.environ.get('IVF_NPROBE', 2))   # cluster yang di-scan per query
+TOP_K = 10                                      # dokumen yang dikembalikan
+
+
+class IVFIndex:
+    """Centroid K-Means + vektor dokumen per cluster (L2-normal, cosine = dot)."""
+
+    def __init__(self, centroids, lists):
+        import numpy as np
+
+        self.centroids = np.asarray(centroids, dtype=np.float32)
+        self._centroid_sq = (self.centroids.astype(np.float64) ** 2).sum(axis=1)
+        self.lists = dict(lists)    # {cluster_id: (id dokumen int32, csr_matrix n_dok x n_fitur)}
+
+    @classmethod
+    def build(cls, kmeans, X, labels):
+        """X = matriks TF-IDF korpus (baris = id dokumen), labels = cluster tiap dokumen."""
+        import numpy as np
+        import scipy.sparse as sp
+
+        X = sp.csr_matrix(X, dtype=np.float32)
+        labels = np.asarray(labels)
+        lists = {}
+        for c in np.unique(labels):
+            ids = np.flatnonzero(labels == c).astype(np.int32)
+            lists[int(c)] = (ids, X[ids])
+        return cls(kmeans.cluster_centers_, lists)
+
+    @classmethod
+    def from_store(cls, vectorizer, kmeans, store):
+        """Untuk bundle lama tanpa indeks: vektorisasi ulang semua dokumen di DocStore."""
+        return cls.build(kmeans, vectorizer.transform(store), store.labels)
+
+    def __len__(self):
+        return sum(ids.size for ids, _ in self.lists.values())
+
+    def probe(self, q, nprobe=NPROBE):
+        """ID cluster terurut dari centroid terdekat (jarak Euclid, seperti kmeans.predict)."""
+        import numpy as np
+
+        # |c - q|^2 = |c|^2 - 2 c.q + |q|^2  (|q|^2 sama untuk semua cluster)
+        dist = self._centroid_sq - 2 * np.asarray(q @ self.centroids.T).ravel()
+        nprobe = max(1, min(nprobe, dist.size))
+        top = np.argpartition(dist, nprobe - 1)[:nprobe]
+        return top[np.argsort(dist[top], kind='stable')].tolist()
+
+    def search(self, q, k=TOP_K, nprobe=NPROBE):
+        """
+        Top-k dokumen untuk vektor query `q` (1 x n_fitur, L2-normal).
+        Return [(id_dokumen, cluster_id, skor_cosine)] urut skor turun.
+        """
+        import numpy as np
+
+        probed = [c for c in self.probe(q, nprobe) if c in self.lists]
+        if not probed:
+            return []
+        scores = [np.asarray((self.lists[c][1] @ q.T).todense()).ravel() for c in probed]
+        owner = np.repeat(np.arange(len(probed)), [s.size for s in scores])
+        doc_ids = np.concatenate([self.lists[c][0] for c in probed])
+        scores = np.concatenate(scores)
+
+        k = min(k, scores.size)
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.lexsort((top, -scores[top]))]   # skor turun; seri -> urutan asli
+        return [(int(doc_ids[i]), probed[owner[i]], float(scores[i])) for i in top]
@@ -0,0 +1,211 @@
+"""
+Registry pusat untuk semua artefak model bot (intent, clustering, sentiment).
+
+- Setiap artefak didaftarkan sekali dengan fungsi loader (+ opsional fungsi
+  warm-up berupa inferensi dummy) oleh modul pemiliknya.
+- `get(nama)` memuat artefak TEPAT SEKALI (lock per artefak); request
+  berikutnya langsung memakai objek yang sama.
+- `warm_up()` memuat semua artefak paralel di thread latar, dipanggil di
+  worker server setelah fork (lihat `bot_app.apps`), supaya request pertama
+  tidak menunggu model 500MB.
+- `reload(nama)` membangun objek baru di samping yang lama lalu menukar
+  SATU referensi (gaya RCU): request yang sedang jalan tetap memakai
+  snapshot lama sampai selesai, request baru langsung melihat yang baru,
+  dan tidak ada yang menunggu lock selama reload.
+- `watch()` menjalankan thread yang memeriksa stempel versi di disk
+  (`version()` per artefak, mis. isi pointer CURRENT) setiap beberapa detik;
+  bila berubah -- training/rollback oleh worker LAIN -- artefak di-reload.
+  Semua worker sudah memakai versi baru paling lambat satu interval. Versi
+  yang gagal dimuat dicatat dan tidak dicoba lagi sampai versi di disk berubah.
+- `status()` dipakai endpoint readiness (`/ready/`) untuk load balancer,
+  `versions()` untuk endpoint monitoring `/version/`.
+"""
+
+import hashlib
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+PENDING, LOADING, READY, UNAVAILABLE = "pending", "loading", "ready", "unavailable"
+RELOAD_INTERVAL = 5.0  # detik antar pemeriksaan versi di disk
+_NONE = object()       # belum ada reload yang gagal
+
+
+class _Artifact:
+    def __init__(self, name, loader, warmup=None, version=None):
+        self.name = name
+        self.loader = loader
+        self.warmup = warmup
+        self.version_fn = version
+        self.version = None       # stempel disk saat snapshot aktif dimuat
+        self.failed_version = _NONE  # stempel disk yang reload-nya gagal
+        self.loaded_at = None
+        self.value = None
+        self.state = PENDING
+        self.error = None
+        self.seconds = None
+        self.lock = threading.Lock()
+
+
+class ModelRegistry:
+    """Pemilik tunggal semua artefak model; thread-safe."""
+
+    def __init__(self):
+        self._artifacts = {}
+        self._warm_started = False
+        self._watcher = None
+        self._lock = threading.Lock()
+
+    def register(self, name, loader, warmup=None, version=None):
+        """
+        Daftarkan artefak; `loader()` -> objek (None = tidak tersedia).
+        `version()` -> stempel murah versi di disk (dipakai `watch()`).
+        """
+        with self._lock:
+            if name not in self._artifacts:
+                self._artifacts[name] = _Artifact(name, loader, warmup, version)
+
+    def _disk_version(self, art):
+        try:
+            return art.version_fn() if art.version_fn else None
+        except Exception:
+            return None
+
+    def _load(self, art):
+        """Bangun objek baru lalu tukar referensinya; objek lama tidak pernah diubah."""
+        first = art.value is None
+        if art.state == PENDING:
+            art.state = LOADING
+        t0 = time.perf_counter()
+        # stempel dibaca SEBELUM memuat: publish di tengah load terdeteksi lagi nanti
+        version = self._disk_version(art)
+        try:
+            value = art.loader()
+            if value is not None and art.warmup is not None:
+                art.warmup(value)  # inferensi dummy: inisialisasi lazy library (torch, BLAS)
+            error = None
+        except Exception as e:
+            value, error = None, f"{type(e).__name__}: {e}"
+            print(f"[REGISTRY] Gagal memuat {art.name}: {error}")
+        art.seconds = time.perf_counter() - t0
+        art.error = error
+        if value is None and not first:
+            art.failed_version = version  # watcher tidak mengulang versi rusak ini
+            return False  # reload gagal: tetap layani snapshot lama yang utuh
+        art.value = value  # satu assignment referensi = publikasi atomik
+        art.version, art.loaded_at = version, time.time()
+        art.failed_version = _NONE
+        art.state = READY if value is not None else UNAVAILABLE
+        return value is not None
+
+    def get(self, name):
+        """Artefak `name` (dimuat sekali saat pertama diminta); None jika tidak tersedia."""
+        art = self._artifacts[name]
+        if art.state in (READY, UNAVAILABLE):
+            return art.value
+        with art.lock:
+            if art.state not in (READY, UNAVAILABLE):
+                self._load(art)
+        return art.value
+
+    def error(self, name):
+        return self._artifacts[name].error
+
+    def reload(self, name):
+        """
+        Muat ulang artefak dari disk (mis. setelah training) tanpa memblok pembaca.
+        Return True jika snapshot baru terpasang; jika gagal snapshot lama dipertahankan.
+        """
+        art = self._artifacts[name]
+        with art.lock:  # hanya men-serialisasi reload, bukan get()
+            return self._load(art)
+
+    def warm_up(self, names=None):
+        """Muat semua artefak paralel di thread latar (sekali per proses); tidak memblok."""
+        with self._lock:
+            if self._warm_started:
+                return False
+            self._warm_started = True
+            names = list(names or self._artifacts)
+        if not names:
+            return True
+        pool = ThreadPoolExecutor(max_workers=len(names), thread_name_prefix="model-warmup")
+        for name in names:
+            pool.submit(self.get, name)
+        pool.shutdown(wait=False)
+        return True
+
+    def check_updates(self):
+        """
+        Reload artefak yang versinya di disk berbeda dari yang dimuat; return nama
+        yang di-reload. Versi yang reload-nya sudah gagal dilewati (sekali per versi).
+        """
+        reloaded = []
+        for art in list(self._artifacts.values()):
+            if art.version_fn is None or art.state not in (READY, UNAVAILABLE):
+                continue  # belum pernah dimuat: get() pertama akan memuat versi terbaru
+            disk = self._disk_version(art)
+            if disk != art.version and (art.failed_version is _NONE or disk != art.failed_version):
+                print(f"[REGISTRY] Versi baru {art.name} terdeteksi, reload...")
+                self.reload(art.name)
+                reloaded.append(art.name)
+        return reloaded
+
+    def watch(self, interval=RELOAD_INTERVAL):
+        """Mulai thread pemantau versi (sekali per proses); tidak memblok."""
+        with self._lock:
+            if self._watcher is not None or interval <= 0:
+                return False
+
+            def loop():
+                while True:
+                    time.sleep(interval)
+                    try:
+                        self.check_updates()
+                    except Exception as e:  # thread pemantau tidak boleh mati
+                        print(f"[REGISTRY] Gagal memeriksa versi: {e}")
+
+            self._watcher = threading.Thread(target=loop, name="model-watcher", daemon=True)
+            self._watcher.start()
+        return True
+
+    def status(self):
+        """{"ready": bool, "models": {nama: {"state", "seconds", "error"}}}"""
+        models = {
+            a.name: {"state": a.state,
+                     "seconds": round(a.seconds, 3) if a.seconds is not None else None,
+                     "error": a.error}
+            for a in list(self._artifacts.values())
+        }
+        ready = all(m["state"] in (READY, UNAVAILABLE) for m in models.values())
+        return {"ready": ready, "models": models}
+
+    def loaded_versions(self):
+        """{nama: stempel versi snapshot aktif} tanpa akses disk (untuk kunci cache)."""
+        return {a.name: _jsonable(a.version) for a in list(self._artifacts.values())
+                if a.state in (READY, UNAVAILABLE)}
+
+    def versions(self):
+        """{"pid", "watching", "models": {nama: {"loaded", "disk", "failed", "loaded_at", "state"}}} worker ini."""
+        models = {}
+        for a in list(self._artifacts.values()):
+            loaded = a.state in (READY, UNAVAILABLE)
+            disk = self._disk_version(a)
+            models[a.name] = {"loaded": _jsonable(a.version) if loaded else None,
+                              "disk": _jsonable(disk),
+                              "stale": loaded and a.version_fn is not None and a.version != disk,
+                              "failed": (_jsonable(a.failed_version)
+                                         if a.failed_version is not _NONE else None),
+                              "loaded_at": a.loaded_at, "state": a.state}
+        return {"pid": os.getpid(), "watching": self._watcher is not None, "models": models}
+
+
+def _jsonable(stamp):
+    """Stempel format lama (tuple mtime) diringkas jadi string untuk JSON."""
+    if stamp is None or isinstance(stamp, str):
+        return stamp
+    return "legacy-" + hashlib.sha1(repr(stamp).encode()).hexdigest()[:12]
+
+
+registry = ModelRegistry()
@@ -3,10 +3,11 @@ Sentiment Analysis Inference Module for Chatbot
 Load dari sentiment_model.pkl
 """
 
-import torch
 import pickle
 import os
 
+from .model_registry import registry
+
 class SentimentAnalyzer:
     def __init__(self, model_path=None):
         """Initialize sentiment analyzer from .pkl file"""
@@ -20,6 +21,8 @@ class SentimentAnalyzer:
         print(f"[SENTIMENT] Initializing with path: {model_path}")
         print(f"[SENTIMENT] Path exists: {os.path.exists(model_path)}")
         
+        import torch  # torch dimuat saat analyzer pertama kali dibuat
+
         self.model_path = model_path
         self.model = None
         self.tokenizer = None
@@ -72,6 +75,8 @@ class SentimentAnalyzer:
         """
         if self.model is None or self.tokenizer is None:
             return ("error", {"error": "Model not loaded"}) if return_confidence else "error"
+
+        import torch
         
         # Tokenize
         inputs = self.tokenizer(
@@ -115,22 +120,26 @@ class SentimentAnalyzer:
         return results
 
 
-# Global instance (singleton pattern)
-_analyzer = None
+# Global instance, owned by the model registry (loaded once, warmed up at startup)
+def _load_analyzer():
+    analyzer = SentimentAnalyzer()
+    return analyzer if analyzer.model is not None else None
+
+registry.register("sentiment", _load_analyzer, lambda analyzer: analyzer.predict("halo"))
 
 def get_analyzer():
-    """Get or create global sentiment analyzer instance"""
-    global _analyzer
-    if _analyzer is None:
-        _analyzer = SentimentAnalyzer()
-    return _analyzer
+    """Global sentiment analyzer instance (None if the model is not available)"""
+    return registry.get("sentiment")
 
 def predict_sentiment(text):
     """
     Simple function to predict sentiment
     Returns: (sentiment_label, confidence_dict)
+    Raises RuntimeError if the model is not available.
     """
     analyzer = get_analyzer()
+    if analyzer is None:
+        raise RuntimeError(registry.error("sentiment") or "sentiment model file not found")
     return analyzer.predict(text)
 
 
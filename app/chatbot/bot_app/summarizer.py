@@ -4,10 +4,229 @@ Meringkas dokumen menjadi 3 kalimat utama berdasarkan bobot kata kunci (TF-IDF)
 """
 
 import re
-from sklearn.feature_extraction.text import TfidfVectorizer
-import numpy as np
+from itertools import chain
 
-def ringkas_dokumen(dokumen_list, max_sentences=3, return_features=False):
+TOKEN_PATTERN = r'(?u)\b\w+\b'
+GLOBAL_MAX_FEATURES = 50_000
+MMR_LAMBDA = 0.7         # bobot relevansi vs kebaruan saat memilih kalimat
+MMR_POOL = 50            # kandidat teratas yang dibandingkan MMR
+BATCH_SENTENCES = 2048   # kalimat per batch transform (ringkas_teks)
+IDF_SAMPLE = 5000        # kalimat awal untuk fit IDF bila model belum ada
+
+
+class _WordIds(dict):
+    """kata -> id; kata di luar vocab -> -1 (lookup tetap di C untuk kata yang dikenal)."""
+
+    def __missing__(self, key):
+        return -1
+
+
+class GlobalIDF:
+    """
+    Bobot IDF tingkat korpus (unigram + bigram), di-fit SEKALI saat training dan
+    disimpan di bundle model. Meringkas cukup `transform` (vocab & IDF tetap),
+    tanpa membangun vocabulary baru, dan IDF-nya tetap bermakna untuk input kecil.
+    """
+
+    def __init__(self, vectorizer):
+        import numpy as np
+
+        self.vectorizer = vectorizer
+        self.feature_names = vectorizer.get_feature_names_out()
+        self.idf = vectorizer.idf_.astype(np.float32)
+
+        # Tabel lookup untuk transform tervektorisasi: kata -> id, unigram id ->
+        # fitur, bigram (id_a * n_kata + id_b, terurut) -> fitur
+        self._pattern = re.compile(TOKEN_PATTERN)
+        words = {}
+        unigram, bigram = [], []
+        for feat, name in enumerate(self.feature_names):
+            parts = name.split(' ')
+            ids = [words.setdefault(w, len(words)) for w in parts]
+            (unigram if len(ids) == 1 else bigram).append((ids, feat))
+        self.word_id = _WordIds(words)
+        self.unigram_feat = np.full(len(words), -1, dtype=np.int64)
+        for (w,), feat in unigram:
+            self.unigram_feat[w] = feat
+        keys = np.array([a * len(words) + b for (a, b), _ in bigram], dtype=np.int64)
+        order = np.argsort(keys)
+        self.bigram_keys = keys[order]
+        self.bigram_feat = np.array([f for _, f in bigram], dtype=np.int64)[order]
+
+    @classmethod
+    def fit(cls, dokumen_list, max_features=GLOBAL_MAX_FEATURES):
+        import numpy as np
+        from sklearn.feature_extraction.text import TfidfVectorizer
+
+        vectorizer = TfidfVectorizer(stop_words=None, max_features=max_features,
+                                     ngram_range=(1, 2), token_pattern=TOKEN_PATTERN,
+                                     dtype=np.float32)
+        vectorizer.fit(dokumen_list)
+        return cls(vectorizer)
+
+    def transform(self, kalimat_list):
+        """
+        Sama dengan `vectorizer.transform` (TF-IDF, L2 per baris) tanpa analyzer
+        per-dokumen sklearn: satu findall per kalimat, sisanya operasi numpy.
+        """
+        import numpy as np
+        import scipy.sparse as sp
+
+        n = len(kalimat_list)
+        tokens = [self._pattern.findall(k.lower()) for k in kalimat_list]
+        lens = np.fromiter(map(len, tokens), dtype=np.int64, count=n)
+        ids = np.fromiter(map(self.word_id.__getitem__, chain.from_iterable(tokens)),
+                          dtype=np.int64, count=int(lens.sum()))
+        rows = np.repeat(np.arange(n), lens)
+
+        # unigram
+        known = ids >= 0
+        uni_rows, uni_feat = rows[known], self.unigram_feat[ids[known]]
+        keep = uni_feat >= 0
+        uni_rows, uni_feat = uni_rows[keep], uni_feat[keep]
+
+        # bigram: pasangan token berurutan di kalimat yang sama
+        same = (rows[1:] == rows[:-1]) & known[1:] & known[:-1]
+        key = ids[:-1][same] * len(self.word_id) + ids[1:][same]
+        pos = np.searchsorted(self.bigram_keys, key)
+        pos_ok = pos < self.bigram_keys.size
+        hit = np.zeros(key.size, dtype=bool)
+        hit[pos_ok] = self.bigram_keys[pos[pos_ok]] == key[pos_ok]
+        bi_rows, bi_feat = rows[:-1][same][hit], self.bigram_feat[pos[hit]]
+
+        # TF (hitung per (baris, fitur)) * IDF, lalu normalisasi L2 per baris
+        n_feat = len(self.feature_names)
+        cell, tf = np.unique(np.concatenate([uni_rows, bi_rows]) * n_feat +
+                             np.concatenate([uni_feat, bi_feat]), return_counts=True)
+        r, c = cell // n_feat, cell % n_feat
+        data = tf.astype(np.float32) * self.idf[c]
+        norm = np.sqrt(np.bincount(r, weights=data.astype(np.float64) ** 2, minlength=n))
+        data /= norm[r].astype(np.float32)
+        return sp.csr_matrix((data, (r, c)), shape=(n, n_feat))
+
+
+# ------------------------------------------------------------
+# Pemecah kalimat (streaming, bahasa Indonesia)
+# ------------------------------------------------------------
+# Heuristik sama dengan extract_sentences (ragapp): pecah setelah . ! ? +
+# spasi, atau di newline. Ditambah: tidak pecah setelah singkatan/gelar
+# ("Dr.", "Jl.", "Rp.", "s.d."), inisial ("A."), nomor urut ("1. ..."),
+# atau bila kata berikutnya huruf kecil ("dll. dan"). Angka seperti "08.00"
+# tidak punya spasi setelah titik, jadi memang tidak pernah dipecah.
+_BREAK_RE = re.compile(r"(?P<end>[.!?]+[\"'\u201d\u2019)\]]*)(?=\s)[ \t\r\f\v]*(?P<nl>\n)?\s*|\s*\n\s*")
+_ABBREVIATIONS = frozenset("""
+    a.n bpk dr dra drs dsn hj h ir jl jln kab kec kel no prof prov pt cv rp s.d sdr sdri
+    st tbk telp tgl hlm u.p yth mis vs nip nim sk
+""".split())
+MIN_SENT_CHARS = 15          # sama dengan filter ringkas_dokumen
+MAX_SENT_CHARS = 2000        # kalimat lebih panjang dipotong (memori tetap terbatas)
+_CHUNK_CHARS = 1 << 16
+
+
+def _is_boundary(buf, start, m):
+    if m.group('end') is None or m.group('nl'):
+        return True  # newline selalu memecah (seperti extract_sentences)
+    nxt = buf[m.end():m.end() + 1]
+    if nxt.islower():
+        return False
+    if m.group('end')[0] != '.' or len(m.group('end').rstrip('"\'\u201d\u2019)]')) > 1:
+        return True
+    kalimat = buf[start:m.start()]
+    kata = kalimat.rsplit(None, 1)[-1] if kalimat.strip() else ''
+    inti = kata.lstrip('("\'').lower()
+    if inti in _ABBREVIATIONS or (len(inti) == 1 and inti.isalpha()):
+        return False
+    return not (inti.isdigit() and len(inti) <= 2 and kalimat.strip() == kata)  # "1. Syarat"
+
+
+def _potong(kalimat, min_chars):
+    """Kalimat bersih; yang lebih dari MAX_SENT_CHARS dipecah di spasi."""
+    kalimat = kalimat.strip()
+    while len(kalimat) > MAX_SENT_CHARS:
+        cut = kalimat.rfind(' ', 0, MAX_SENT_CHARS)
+        cut = cut if cut > 0 else MAX_SENT_CHARS
+        yield from _potong(kalimat[:cut], min_chars)
+        kalimat = kalimat[cut:].strip()
+    if len(kalimat) > min_chars:
+        yield kalimat
+
+
+def iter_sentences(source, min_chars=MIN_SENT_CHARS):
+    """
+    Kalimat dari `source` (str, atau iterable potongan str mis. file) satu per
+    satu. Hanya sisa kalimat yang belum selesai yang disimpan, jadi teks
+    berukuran megabyte diproses dengan memori terbatas.
+    """
+    chunks = source
+    if isinstance(source, str):
+        chunks = (source[i:i + _CHUNK_CHARS] for i in range(0, len(source), _CHUNK_CHARS))
+    buf = ''
+    for chunk in chain(chunks, [None]):
+        final = chunk is None
+        if not final:
+            buf += chunk
+        pos = 0
+        for m in _BREAK_RE.finditer(buf):
+            if not final and m.end() >= len(buf):
+                break  # karakter sesudah jeda belum terbaca: tunggu chunk berikut
+            if _is_boundary(buf, pos, m):
+                yield from _potong(buf[pos:m.end('end') if m.group('end') else m.start()], min_chars)
+                pos = m.end()
+        buf = buf[pos:]
+        while len(buf) > MAX_SENT_CHARS:
+            cut = buf.rfind(' ', 0, MAX_SENT_CHARS)
+            cut = cut if cut > 0 else MAX_SENT_CHARS
+            yield from _potong(buf[:cut], min_chars)
+            buf = buf[cut:].lstrip()  # titik potong sama dengan _potong
+    yield from _potong(buf, min_chars)
+
+
+def _mmr(X, scores, k, lam=MMR_LAMBDA):
+    """
+    Maximal Marginal Relevance atas baris sparse `X` (ter-normalisasi L2):
+    pilih k baris dengan relevansi tinggi tapi tidak mirip yang sudah terpilih.
+    Return posisi baris terpilih.
+    """
+    import numpy as np
+
+    k = min(k, X.shape[0])
+    if k == 0:
+        return []
+    rel = scores / scores.max() if scores.max() > 0 else scores
+    sim = (X @ X.T).toarray()  # kandidat x kandidat, kecil (<= MMR_POOL)
+    max_sim = np.zeros(X.shape[0])
+    chosen = []
+    for _ in range(k):
+        mmr = lam * rel - (1 - lam) * max_sim
+        mmr[chosen] = -np.inf
+        j = int(np.argmax(mmr))
+        chosen.append(j)
+        max_sim = np.maximum(max_sim, sim[:, j])
+    return chosen
+
+
+def _skor_global(kalimat_list, max_sentences, idf):
+    """(top_indices, top_features) dengan IDF korpus: satu transform + reduksi sparse."""
+    import numpy as np
+
+    X = idf.transform(kalimat_list).tocsr()  # n_kalimat x V, sparse
+
+    # Skor kalimat = jumlah TF-IDF per baris (langsung dari data CSR)
+    rows = np.repeat(np.arange(X.shape[0]), np.diff(X.indptr))
+    sentence_scores = np.bincount(rows, weights=X.data, minlength=X.shape[0])
+    # Kandidat teratas -> MMR supaya kalimat yang hampir sama tidak terpilih dua kali
+    top = np.argsort(-sentence_scores, kind='stable')[:MMR_POOL]
+    top = top[_mmr(X[top], sentence_scores[top], max_sentences)]
+
+    # Skor fitur = jumlah per kolom, hanya kolom yang muncul (bukan seluruh vocab)
+    cols, inverse = np.unique(X.indices, return_inverse=True)
+    feature_scores = np.bincount(inverse, weights=X.data, minlength=cols.size)
+    best = np.argsort(-feature_scores, kind='stable')[:10]
+    top_features = [(idf.feature_names[cols[i]], feature_scores[i]) for i in best]
+    return sorted(top), top_features
+
+
+def ringkas_dokumen(dokumen_list, max_sentences=3, return_features=False, idf=None):
     """
     Meringkas list dokumen menjadi N kalimat terpenting menggunakan Feature Based Summarization
     
@@ -15,6 +234,8 @@ def ringkas_dokumen(dokumen_list, max_sentences=3, return_features=False):
         dokumen_list: List of strings (dokumen-dokumen yang akan diringkas)
         max_sentences: Jumlah kalimat yang diinginkan (default: 3)
         return_features: Jika True, return tuple (ringkasan, top_features)
+        idf: GlobalIDF dari training (opsional). Jika ada, dipakai IDF korpus
+             tanpa fit ulang; jika tidak, TF-IDF di-fit pada input (mode lama)
     
     Returns:
         String berisi ringkasan (3 kalimat teratas) atau tuple jika return_features=True
@@ -37,12 +258,24 @@ def ringkas_dokumen(dokumen_list, max_sentences=3, return_features=False):
         return (hasil, []) if return_features else hasil
     
     # 3. Hitung skor TF-IDF untuk setiap dokumen (FEATURE BASED)
+    # sklearn dimuat saat pertama kali meringkas (import-nya mahal)
+    import numpy as np
+    from sklearn.feature_extraction.text import TfidfVectorizer
+
     try:
+        if idf is not None:
+            kalimat_list = list(dict.fromkeys(kalimat_list))  # dokumen identik sekali saja
+            top_indices, top_features = _skor_global(kalimat_list, max_sentences, idf)
+            ringkasan = ". ".join(kalimat_list[i] for i in top_indices)
+            if not ringkasan.endswith(('.', '!', '?')):
+                ringkasan += "."
+            return (ringkasan, top_features) if return_features else ringkasan
+
         vectorizer = TfidfVectorizer(
             stop_words=None,        # Jangan filter stopwords untuk bahasa Indonesia
             max_features=100,       # Ambil 100 kata terpenting
             ngram_range=(1, 2),     # Unigram dan bigram
-            token_pattern=r'(?u)\b\w+\b'  # Pattern untuk tokenisasi
+            token_pattern=TOKEN_PATTERN  # Pattern untuk tokenisasi
         )
         
         tfidf_matrix = vectorizer.fit_transform(kalimat_list)
@@ -83,7 +316,88 @@ def ringkas_dokumen(dokumen_list, max_sentences=3, return_features=False):
         return (hasil, []) if return_features else hasil
 
 
-def ringkas_teks_sederhana(teks, max_sentences=3):
+def ringkas_cluster(cluster_map, max_sentences=3, idf=None):
+    """
+    Ringkasan + kata kunci untuk SEMUA cluster sekaligus (dipanggil saat training).
+    Return {cluster_id: (ringkasan, [(fitur, skor), ...])} siap disimpan di bundle model,
+    sehingga jalur intent cukup lookup tanpa fit TF-IDF per request.
+    """
+    hasil = {}
+    for cluster_id, docs in cluster_map.items():
+        ringkasan, features = ringkas_dokumen(docs, max_sentences, return_features=True, idf=idf)
+        hasil[cluster_id] = (ringkasan, [(str(f), float(skor)) for f, skor in features])
+    return hasil
+
+
+def ringkas_teks(teks, max_sentences=3, return_features=False, idf=None,
+                 lam=MMR_LAMBDA, batch_size=BATCH_SENTENCES):
+    """
+    Ringkasan ekstraktif teks panjang (mis. dump pengumuman berukuran MB).
+    Kalimat dibaca streaming, diskor per batch (TF-IDF, jumlah bobot), hanya
+    MMR_POOL kandidat terbaik yang disimpan, lalu MMR membuang kalimat yang
+    berulang. Waktu linear terhadap panjang teks, memori terbatas.
+    Tanpa `idf`, IDF di-fit dari IDF_SAMPLE kalimat pertama teks itu sendiri.
+    """
+    import numpy as np
+
+    import heapq
+    from itertools import islice
+
+    kalimat_iter = iter_sentences(teks)
+    if idf is None:
+        awal = list(islice(kalimat_iter, IDF_SAMPLE))
+        try:
+            idf = GlobalIDF.fit(awal)
+        except ValueError:  # kosong / tidak ada kata sama sekali
+            hasil = " ".join(awal[:max_sentences]) or "Teks terlalu pendek untuk diringkas."
+            return (hasil, []) if return_features else hasil
+        kalimat_iter = chain(awal, kalimat_iter)
+
+    heap = []                                    # (skor, -posisi, kalimat, vektor)
+    di_pool = set()                              # kalimat identik cukup sekali jadi kandidat
+    feature_scores = np.zeros(len(idf.feature_names))
+    posisi = 0
+    while True:
+        batch = list(islice(kalimat_iter, batch_size))
+        if not batch:
+            break
+        X = idf.transform(batch)
+        rows = np.repeat(np.arange(len(batch)), np.diff(X.indptr))
+        scores = np.bincount(rows, weights=X.data, minlength=len(batch))
+        feature_scores += np.bincount(X.indices, weights=X.data, minlength=feature_scores.size)
+        for i in np.argsort(-scores, kind='stable')[:MMR_POOL]:
+            if batch[i] in di_pool:
+                continue
+            item = (float(scores[i]), -(posisi + i), batch[i], X[i])
+            if len(heap) < MMR_POOL:
+                heapq.heappush(heap, item)
+            elif item[:2] > heap[0][:2]:
+                di_pool.discard(heapq.heapreplace(heap, item)[2])
+            else:
+                continue
+            di_pool.add(batch[i])
+        posisi += len(batch)
+
+    if not heap:
+        hasil = "Teks terlalu pendek untuk diringkas."
+        return (hasil, []) if return_features else hasil
+
+    import scipy.sparse as sp
+
+    kandidat = sorted(heap, key=lambda it: it[:2], reverse=True)
+    pilih = _mmr(sp.vstack([it[3] for it in kandidat]).tocsr(),
+                 np.array([it[0] for it in kandidat]), max_sentences, lam)
+    terpilih = sorted((kandidat[j] for j in pilih), key=lambda it: -it[1])  # urutan asli
+    ringkasan = " ".join(it[2] for it in terpilih)
+
+    if not return_features:
+        return ringkasan
+    best = np.argsort(-feature_scores, kind='stable')[:10]
+    top_features = [(idf.feature_names[i], feature_scores[i]) for i in best if feature_scores[i] > 0]
+    return ringkasan, top_features
+
+
+def ringkas_teks_sederhana(teks, max_sentences=3, idf=None):
     """
     Versi sederhana untuk meringkas teks tunggal
     (Untuk command "ringkas ...")
@@ -91,7 +405,7 @@ def ringkas_teks_sederhana(teks, max_sentences=3):
     if not teks or len(teks.strip()) < 20:
         return "Teks terlalu pendek untuk diringkas."
     
-    return ringkas_dokumen([teks], max_sentences)
+    return ringkas_teks(teks, max_sentences, idf=idf)
 
 
 # --- TESTING (Hanya jalan jika file dieksekusi langsung) ---
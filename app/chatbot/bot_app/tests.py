@@ -1,3 +1,589 @@
-from django.test import TestCase
+import os
+import subprocess
+import sys
+from pathlib import Path
 
-# Create your tests here.
+from django.test import SimpleTestCase
+
+CHATBOT_DIR = Path(__file__).resolve().parents[1]   # app/chatbot
+ROOT_DIR = CHATBOT_DIR.parents[1]                    # root project
+
+# Library berat yang hanya boleh dimuat saat pertama dipakai, bukan saat import
+HEAVY_MODULES = ("torch", "transformers", "sklearn", "pandas", "matplotlib",
+                 "requests", "bs4", "Sastrawi")
+VIEWS_BUDGET_MS = 250
+PREPROCESS_BUDGET_MS = 100
+
+
+def import_times(code, cwd):
+    """Jalankan `code` dengan `python -X importtime`; return {modul: waktu kumulatif (us)}."""
+    env = dict(os.environ, DJANGO_SETTINGS_MODULE="chatbot.settings", MODEL_WARMUP="0")
+    proc = subprocess.run([sys.executable, "-X", "importtime", "-c", code],
+                          cwd=cwd, env=env, capture_output=True, text=True, check=True)
+    times = {}
+    for line in proc.stderr.splitlines():
+        parts = line.removeprefix("import time:").split("|")
+        if len(parts) == 3 and parts[1].strip().isdigit():
+            times[parts[2].strip()] = int(parts[1])
+    return times
+
+
+class ImportTimeTest(SimpleTestCase):
+    """Import harus murah: manage.py, boot worker dan autoreload tidak memuat model."""
+
+    def assert_light(self, times, module, budget_ms):
+        heavy = sorted(m for m in times if m.split(".")[0] in HEAVY_MODULES)
+        self.assertEqual(heavy, [], f"{module} memuat library berat saat import")
+        self.assertLess(times[module] / 1000, budget_ms,
+                        f"import {module} melebihi budget {budget_ms} ms")
+
+    def test_bot_views_import(self):
+        times = import_times("import django; django.setup(); import bot_app.views",
+                             CHATBOT_DIR)
+        self.assert_light(times, "bot_app.views", VIEWS_BUDGET_MS)
+
+    def test_preprocess_import(self):
+        times = import_times("import src.preprocess", ROOT_DIR)
+        self.assert_light(times, "src.preprocess", PREPROCESS_BUDGET_MS)
+
+
+class ModelRegistryTest(SimpleTestCase):
+    def test_single_load_and_readiness(self):
+        from bot_app.model_registry import ModelRegistry
+
+        calls = []
+        reg = ModelRegistry()
+        reg.register("a", lambda: calls.append(1) or "model-a", warmup=lambda m: calls.append(2))
+        reg.register("b", lambda: None)
+        self.assertFalse(reg.status()["ready"])
+
+        self.assertEqual(reg.get("a"), "model-a")
+        self.assertEqual(reg.get("a"), "model-a")
+        self.assertEqual(calls, [1, 2])  # loader + warm-up tepat sekali
+        self.assertIsNone(reg.get("b"))
+
+        status = reg.status()
+        self.assertTrue(status["ready"])
+        self.assertEqual(status["models"]["b"]["state"], "unavailable")
+
+    def test_reload_swaps_snapshot_without_blocking(self):
+        import threading
+        from bot_app.model_registry import ModelRegistry
+
+        versions = iter(["v1", "v2", None])
+        loading, release = threading.Event(), threading.Event()
+
+        def loader():
+            value = next(versions)
+            if value == "v2":
+                loading.set()
+                release.wait(5)
+            return value
+
+        reg = ModelRegistry()
+        reg.register("m", loader)
+        self.assertEqual(reg.get("m"), "v1")
+
+        t = threading.Thread(target=reg.reload, args=("m",))
+        t.start()
+        loading.wait(5)
+        self.assertEqual(reg.get("m"), "v1")  # pembaca tidak menunggu reload
+        release.set()
+        t.join()
+        self.assertEqual(reg.get("m"), "v2")
+
+        self.assertFalse(reg.reload("m"))      # reload gagal: snapshot lama tetap
+        self.assertEqual(reg.get("m"), "v2")
+
+    def test_check_updates_follows_disk_version(self):
+        from bot_app.model_registry import ModelRegistry
+
+        disk = {"version": "a"}
+        reg = ModelRegistry()
+        reg.register("m", lambda: "model-" + disk["version"], version=lambda: disk["version"])
+        self.assertEqual(reg.check_updates(), [])  # belum dimuat: tidak ada reload
+        self.assertEqual(reg.get("m"), "model-a")
+        self.assertEqual(reg.check_updates(), [])
+
+        disk["version"] = "b"                      # publish oleh worker lain
+        self.assertTrue(reg.versions()["models"]["m"]["stale"])
+        self.assertEqual(reg.check_updates(), ["m"])
+        self.assertEqual(reg.get("m"), "model-b")
+        self.assertEqual(reg.loaded_versions(), {"m": "b"})
+
+    def test_failed_reload_tried_once_per_version(self):
+        from bot_app.model_registry import ModelRegistry
+
+        disk = {"version": "a"}
+        calls = []
+
+        def loader():
+            calls.append(disk["version"])
+            if disk["version"] == "rusak":
+                raise ValueError("bundle rusak")
+            return "model-" + disk["version"]
+
+        reg = ModelRegistry()
+        reg.register("m", loader, version=lambda: disk["version"])
+        self.assertEqual(reg.get("m"), "model-a")
+
+        disk["version"] = "rusak"
+        for tick in range(3):                       # tiga tick watcher
+            self.assertEqual(reg.check_updates(), ["m"] if tick == 0 else [])
+        self.assertEqual(calls, ["a", "rusak"])
+        self.assertEqual(reg.get("m"), "model-a")   # snapshot lama tetap dilayani
+        self.assertEqual(reg.versions()["models"]["m"]["failed"], "rusak")
+
+        disk["version"] = "b"                       # publish berikutnya dicoba lagi
+        self.assertEqual(reg.check_updates(), ["m"])
+        self.assertEqual(reg.get("m"), "model-b")
+        self.assertIsNone(reg.versions()["models"]["m"]["failed"])
+        self.assertEqual(reg.check_updates(), [])
+
+
+def _forked_warm_up(started):
+    if started != ["start"]:
+        raise SystemExit(1)
+
+
+class WarmUpPolicyTest(SimpleTestCase):
+    def should_warm_up(self, argv, **env):
+        from unittest import mock
+        from bot_app.apps import _should_warm_up
+
+        with mock.patch.object(sys, "argv", argv), mock.patch.dict(os.environ):
+            for key in ("MODEL_WARMUP", "RUN_MAIN"):
+                os.environ.pop(key, None)
+            os.environ.update(env)
+            return _should_warm_up()
+
+    def test_server_allowlist(self):
+        for argv in (["/venv/bin/gunicorn", "chatbot.wsgi"], ["uwsgi", "--ini", "x.ini"],
+                     ["daphne", "chatbot.asgi:application"],
+                     ["/venv/lib/python3/site-packages/uvicorn/__main__.py", "chatbot.asgi:app"]):
+            self.assertTrue(self.should_warm_up(argv), argv)
+        self.assertFalse(self.should_warm_up(["/venv/bin/gunicorn"], MODEL_WARMUP="0"))
+
+        for argv in (["manage.py", "migrate"], ["manage.py", "test"], ["celery", "worker"],
+                     ["update_dataset_otomatis.py"], ["-c"], ["pytest"]):
+            self.assertFalse(self.should_warm_up(argv), argv)
+        self.assertTrue(self.should_warm_up(["celery", "worker"], MODEL_WARMUP="1"))
+
+        self.assertFalse(self.should_warm_up(["manage.py", "runserver"]))  # proses autoreload
+        self.assertTrue(self.should_warm_up(["manage.py", "runserver"], RUN_MAIN="true"))
+        self.assertTrue(self.should_warm_up(["manage.py", "runserver", "--noreload"]))
+
+    def test_warm_up_starts_after_fork_not_in_master(self):
+        import multiprocessing
+        from django.core.signals import request_started
+        from bot_app.apps import _warm_up_post_fork
+
+        started = []
+        _warm_up_post_fork(lambda: started.append("start"))
+        self.addCleanup(request_started.disconnect, dispatch_uid="bot_app.warm_up")
+        self.assertEqual(started, [])               # master: tidak ada thread
+
+        child = multiprocessing.get_context("fork").Process(target=_forked_warm_up,
+                                                            args=(started,))
+        child.start()
+        child.join(30)
+        self.assertEqual(child.exitcode, 0)         # worker: warm-up tepat setelah fork
+        self.assertEqual(started, [])
+
+        request_started.send(sender=None)           # aplikasi dimuat di worker (tanpa fork)
+        request_started.send(sender=None)
+        self.assertEqual(started, ["start"])
+
+
+class ArtifactStoreTest(SimpleTestCase):
+    def test_publish_rollback_gc(self):
+        import tempfile
+        from bot_app import artifact_store as store
+
+        with tempfile.TemporaryDirectory() as base:
+            self.assertIsNone(store.load_bundle(base, ["a.pkl"]))
+            versions = [store.publish_bundle(base, {"a.pkl": i, "b.pkl": -i}, keep=2)
+                        for i in range(3)]
+            self.assertEqual(store.list_versions(base), versions[1:])  # retensi 2
+            self.assertEqual(store.load_bundle(base, ["a.pkl", "b.pkl"]),
+                             (versions[2], {"a.pkl": 2, "b.pkl": -2}))
+
+            self.assertEqual(store.rollback(base), versions[1])
+            self.assertEqual(store.load_bundle(base, ["a.pkl"])[1], {"a.pkl": 1})
+            with self.assertRaises(ValueError):
+                store.rollback(base)
+
+
+class ClusterSummaryTest(SimpleTestCase):
+    TOPIK = ["pembayaran ukt bank virtual account tagihan", "krs online dosen wali jadwal kuliah",
+             "dosen pembimbing kontak email ruang dosen", "beasiswa prestasi ipk syarat pendaftaran",
+             "pendaftaran mahasiswa baru pmb gelombang tes", "perpustakaan laboratorium gedung parkir",
+             "akun sso password email kampus reset"]
+
+    def setUp(self):
+        import tempfile
+        from unittest import mock
+        from bot_app import clustering_search, training_logic
+
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        base = Path(tmp.name)
+        csv = base / "dataset.csv"
+        rows = [f"{topik} nomor {i}. Informasi {topik.split()[0]} untuk mahasiswa angkatan {2020 + i}."
+                for topik in self.TOPIK for i in range(5)]
+        csv.write_text("dokumen\n" + "\n".join(f'"{r}"' for r in rows), encoding="utf-8")
+        self.model_dir = str(base / "model")
+        for patcher in (mock.patch.multiple(training_logic, CSV_PATH=str(csv),
+                                            MODEL_DIR=self.model_dir),
+                        mock.patch.object(clustering_search, "MODEL_DIR", self.model_dir)):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+        ok, msg = training_logic.latih_model_sekarang()
+        self.assertTrue(ok, msg)
+        self.model = clustering_search.load_resources()
+
+    def test_bundle_contains_cluster_summary(self):
+        from bot_app.artifact_store import load_bundle
+        from bot_app.clustering_search import ambil_ringkasan
+        from bot_app.summarizer import GlobalIDF, ringkas_cluster
+
+        _, obj = load_bundle(self.model_dir, ["cluster_summary.pkl", "summary_idf.pkl"])
+        summary = obj["cluster_summary.pkl"]
+        self.assertIsInstance(obj["summary_idf.pkl"], GlobalIDF)
+        self.assertEqual({int(c) for c in summary}, set(self.model.dokumen.clusters))
+        expected = ringkas_cluster({c: list(d) for c, d in self.model.data_dokumen.items()},
+                                   idf=self.model.idf)
+        for c, (ringkasan, features) in summary.items():
+            self.assertTrue(ringkasan and features)
+            self.assertEqual((ringkasan, features), expected[int(c)])
+            self.assertEqual(ambil_ringkasan(int(c), self.model), (ringkasan, tuple(features)))
+
+    def intent_response(self, model, ringkas_dokumen):
+        import json
+        from unittest import mock
+        from django.test import Client
+        from bot_app import views
+        from src.answer_cache import AnswerCache
+
+        with mock.patch.multiple(views, snapshot_model=lambda: model,
+                                 prediksi_niat_user=lambda teks: "ADMINISTRASI_KEUANGAN",
+                                 versi_model=lambda: "test", answer_cache=AnswerCache(),
+                                 ringkas_dokumen=ringkas_dokumen):
+            res = Client().post(
+                "/get_response/", json.dumps({"msg": "bagaimana cara bayar ukt"}),
+                content_type="application/json")
+        return res.json()["response"]
+
+    def test_intent_reads_precomputed_summary(self):
+        import dataclasses
+        from types import MappingProxyType
+        from unittest import mock
+
+        cluster = 2  # INTENT_TO_CLUSTER['ADMINISTRASI_KEUANGAN']
+        ringkas = mock.Mock(return_value=("ringkasan ulang", [("ukt", 1.0)]))
+        response = self.intent_response(self.model, ringkas)
+        ringkas.assert_not_called()
+        self.assertIn(self.model.ringkasan[cluster][0], response)
+
+        # bundle lama tanpa cluster_summary.pkl: baru diringkas per request
+        legacy = dataclasses.replace(self.model, ringkasan=MappingProxyType({}))
+        self.assertIn("ringkasan ulang", self.intent_response(legacy, ringkas))
+        ringkas.assert_called_once()
+        self.assertEqual(list(ringkas.call_args.args[0]), list(self.model.data_dokumen[cluster]))
+
+
+class TrainingJobsTest(SimpleTestCase):
+    def setUp(self):
+        import tempfile
+        import threading
+        from unittest import mock
+        from bot_app import training_jobs as jobs
+
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.jobs = jobs
+        self.release = threading.Event()
+        self.addCleanup(self.release.set)
+
+        def latih(progress=None):
+            progress(50, "Training (test)...")
+            self.release.wait(10)
+            return False, "Dihentikan oleh test."
+
+        for patcher in (mock.patch.multiple(jobs, JOBS_DIR=Path(tmp.name) / "jobs",
+                                            LOCK_PATH=Path(tmp.name) / "training.lock"),
+                        mock.patch("bot_app.training_logic.latih_model_sekarang", latih)):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def finish(self):
+        self.release.set()
+        self.jobs._executor.submit(lambda: None).result(10)  # executor satu thread
+        self.release.clear()
+
+    def write_lock(self, job_id, pid):
+        import json
+
+        self.jobs.LOCK_PATH.write_text(json.dumps({"job": job_id, "pid": pid}))
+
+    def test_single_flight(self):
+        from unittest import mock
+
+        job, new = self.jobs.submit_training()
+        self.assertTrue(new)
+        again, new = self.jobs.submit_training()
+        self.assertEqual((again["id"], new), (job["id"], False))
+        with mock.patch.object(self.jobs, "_active", None):  # worker lain: lihat lock file
+            other, new = self.jobs.submit_training()
+        self.assertEqual((other["id"], new), (job["id"], False))
+
+        self.finish()
+        self.assertEqual(self.jobs.job_status(job["id"])["state"], self.jobs.FAILED)
+        self.assertFalse(self.jobs.LOCK_PATH.exists())
+        nxt, new = self.jobs.submit_training()
+        self.assertTrue(new)
+        self.assertNotEqual(nxt["id"], job["id"])
+        self.finish()
+
+    def test_stale_lock_from_dead_worker(self):
+        import uuid
+
+        dead = subprocess.Popen([sys.executable, "-c", "pass"])
+        dead.wait()
+        orphan = uuid.uuid4().hex
+        self.jobs._save({"id": orphan, "state": self.jobs.RUNNING, "progress": 40,
+                         "msg": "Training...", "finished": None, "pid": dead.pid})
+        self.write_lock(orphan, dead.pid)
+
+        job, new = self.jobs.submit_training()
+        self.assertTrue(new)
+        self.assertNotEqual(job["id"], orphan)
+        status = self.jobs.job_status(orphan)
+        self.assertEqual(status["state"], self.jobs.FAILED)
+        self.assertIsNotNone(status["finished"])
+        self.assertEqual(self.jobs._lock_owner(), job["id"])
+        self.finish()
+
+    def test_racing_acquirers_break_stale_lock_once(self):
+        import threading
+        import time
+        import uuid
+        from unittest import mock
+
+        dead = subprocess.Popen([sys.executable, "-c", "pass"])
+        dead.wait()
+        self.write_lock(uuid.uuid4().hex, dead.pid)
+        is_stale = self.jobs._is_stale
+
+        def slow_is_stale(owner):  # perlebar jendela antara periksa dan hapus
+            time.sleep(0.05)
+            return is_stale(owner)
+
+        start = threading.Barrier(4)
+        won = []
+
+        def acquire(job_id):
+            start.wait(10)
+            if self.jobs._acquire_lock(job_id):
+                won.append(job_id)
+
+        ids = [uuid.uuid4().hex for _ in range(4)]
+        with mock.patch.object(self.jobs, "_is_stale", slow_is_stale):
+            threads = [threading.Thread(target=acquire, args=(i,)) for i in ids]
+            for t in threads:
+                t.start()
+            for t in threads:
+                t.join(10)
+        self.assertEqual(len(won), 1)
+        self.assertEqual(self.jobs._lock_owner(), won[0])
+
+    def test_live_owner_and_legacy_lock(self):
+        import time
+        import uuid
+
+        owner = uuid.uuid4().hex
+        self.write_lock(owner, os.getppid())       # pemilik hidup, walau lock sudah lama
+        old = time.time() - 2 * self.jobs.LOCK_TIMEOUT
+        os.utime(self.jobs.LOCK_PATH, (old, old))
+        job, new = self.jobs.submit_training()
+        self.assertEqual((job["id"], new), (owner, False))
+
+        self.jobs.LOCK_PATH.write_text(owner)      # format lama tanpa pid: pakai umur file
+        self.assertEqual(self.jobs.submit_training()[0]["id"], owner)
+        os.utime(self.jobs.LOCK_PATH, (old, old))
+        job, new = self.jobs.submit_training()
+        self.assertTrue(new)
+        self.finish()
+
+
+class SentenceSplitterTest(SimpleTestCase):
+    TEKS = ("Surat ditandatangani Dr. Budi Santoso selaku dekan fakultas. "
+            "Biaya pendaftaran Rp. 300.000 dibayar di bank. "
+            "Perpustakaan buka pukul 08.00 sampai 16.00 setiap hari kerja.\n"
+            "1. Syarat pendaftaran adalah KTP dan ijazah.\n"
+            "Bawa buku, alat tulis, dll. dan kartu mahasiswa saat ujian berlangsung! "
+            "Apakah jadwal sudah keluar? Belum.")
+    KALIMAT = ["Surat ditandatangani Dr. Budi Santoso selaku dekan fakultas.",
+               "Biaya pendaftaran Rp. 300.000 dibayar di bank.",
+               "Perpustakaan buka pukul 08.00 sampai 16.00 setiap hari kerja.",
+               "1. Syarat pendaftaran adalah KTP dan ijazah.",
+               "Bawa buku, alat tulis, dll. dan kartu mahasiswa saat ujian berlangsung!",
+               "Apakah jadwal sudah keluar?"]       # "Belum." < MIN_SENT_CHARS
+
+    def test_indonesian_heuristics(self):
+        from bot_app.summarizer import iter_sentences
+
+        self.assertEqual(list(iter_sentences(self.TEKS)), self.KALIMAT)
+
+    def test_any_chunking_gives_same_sentences(self):
+        from bot_app.summarizer import iter_sentences
+
+        t = self.TEKS
+        for cut in range(len(t) + 1):
+            self.assertEqual(list(iter_sentences([t[:cut], t[cut:]])), self.KALIMAT, cut)
+            self.assertEqual(list(iter_sentences([t[:cut], t[cut:cut + 1], t[cut + 1:]])),
+                             self.KALIMAT, cut)
+
+    def test_break_on_64k_chunk_boundary(self):
+        from bot_app.summarizer import _CHUNK_CHARS, iter_sentences
+
+        isi = "Pengumuman kegiatan kampus nomor satu.\n"
+        for anchor in ("Dr.", "Rp.", "08.", "bank.", "dll.", "1."):
+            # titik `anchor` tepat di karakter terakhir chunk 64 KiB pertama
+            pad = _CHUNK_CHARS - (self.TEKS.index(anchor) + len(anchor))
+            teks = (isi * (pad // len(isi))).ljust(pad, "\n") + self.TEKS
+            self.assertEqual(teks[_CHUNK_CHARS - 1], ".")
+            kalimat = list(iter_sentences(teks))
+            self.assertEqual(kalimat[-len(self.KALIMAT):], self.KALIMAT, anchor)
+            self.assertEqual(set(kalimat[:-len(self.KALIMAT)]), {isi.strip()}, anchor)
+
+    def test_long_sentence_is_cut(self):
+        from bot_app.summarizer import MAX_SENT_CHARS, iter_sentences
+
+        panjang = "kata " * 1000 + "selesai."
+        teks = panjang + " Kalimat berikutnya cukup panjang.\n" + "x" * 4500 + " akhir."
+        kalimat = list(iter_sentences(teks))
+        self.assertTrue(all(len(k) <= MAX_SENT_CHARS for k in kalimat))
+        self.assertEqual(" ".join(kalimat[:3]).split(), panjang.split())  # tidak ada kata hilang
+        self.assertEqual(kalimat[3], "Kalimat berikutnya cukup panjang.")
+        self.assertEqual("".join(kalimat[4:]).replace(" ", ""), "x" * 4500 + "akhir.")
+        for cut in range(0, len(teks) + 1, 97):  # kalimat utuh vs masih di buffer streaming
+            self.assertEqual(list(iter_sentences([teks[:cut], teks[cut:]])), kalimat, cut)
+
+
+class RingkasTeksTest(SimpleTestCase):
+    UTAMA = "Pembayaran uang kuliah semester genap paling lambat tanggal sepuluh Maret melalui bank mitra."
+    MIRIP = "Pembayaran uang kuliah semester genap paling lambat tanggal sepuluh Maret melalui bank."
+    LAIN = ["Jadwal wisuda periode Juni diumumkan oleh bagian akademik fakultas.",
+            "Perpustakaan pusat menambah koleksi jurnal internasional untuk mahasiswa pascasarjana.",
+            "Beasiswa prestasi dibuka untuk mahasiswa dengan indeks prestasi minimal tiga koma lima."]
+
+    def setUp(self):
+        from bot_app.summarizer import GlobalIDF
+
+        self.idf = GlobalIDF.fit([self.UTAMA, self.MIRIP] + self.LAIN + ["pengumuman kampus"])
+        self.teks = " ".join([self.UTAMA] * 30 + [self.MIRIP] * 5 + self.LAIN * 2)
+
+    def test_dedup_and_mmr(self):
+        from bot_app.summarizer import iter_sentences, ringkas_teks
+
+        ringkasan = ringkas_teks(self.teks, 3, idf=self.idf)
+        self.assertEqual(list(iter_sentences(ringkasan)),
+                         [self.UTAMA, self.LAIN[0], self.LAIN[2]])  # urutan asli teks
+        for batch_size in (1, 4, 7):  # kalimat identik lintas batch tetap sekali
+            self.assertEqual(ringkas_teks(self.teks, 3, idf=self.idf, batch_size=batch_size),
+                             ringkasan)
+        # tanpa penalti kebaruan: hampir-duplikat ikut terpilih, duplikat persis tidak
+        self.assertEqual(list(iter_sentences(ringkas_teks(self.teks, 3, idf=self.idf, lam=1.0))),
+                         [self.UTAMA, self.MIRIP, self.LAIN[2]])
+
+    def test_mmr_skips_near_duplicate(self):
+        import numpy as np
+        import scipy.sparse as sp
+        from bot_app.summarizer import _mmr
+
+        X = sp.csr_matrix([[1.0, 0.0, 0.0], [0.99, 0.141, 0.0], [0.0, 0.0, 1.0]])
+        scores = np.array([1.0, 0.99, 0.6])
+        self.assertEqual(_mmr(X, scores, 2), [0, 2])
+        self.assertEqual(_mmr(X, scores, 2, lam=1.0), [0, 1])
+        self.assertEqual(_mmr(X, scores, 5), [0, 2, 1])
+        self.assertEqual(_mmr(X[:0], scores[:0], 3), [])
+
+
+class GlobalIDFTest(SimpleTestCase):
+    def test_transform_matches_vectorizer(self):
+        import numpy as np
+        from bot_app.summarizer import GlobalIDF
+
+        korpus = ["Pembayaran UKT semester genap melalui Bank BCA dan Bank Mandiri.",
+                  "Jadwal KRS online: 08.00-16.00, hubungi dosen wali.",
+                  "Beasiswa prestasi (IPK ≥ 3,5) dibuka; syarat: transkrip & KTM.",
+                  "Perpustakaan pusat — layanan peminjaman buku, jurnal, e-book.",
+                  "UKT UKT ukt: bayar bayar sebelum UTS!"] * 3
+        idf = GlobalIDF.fit(korpus)
+        kalimat = korpus + ["", "kata asing sekali", "bank bank bank mandiri bca",
+                            "Mandiri BCA bank", "dosen wali dosen wali KRS", "ÉLAN ukt—bca"]
+        got = idf.transform(kalimat).toarray()
+        expected = idf.vectorizer.transform(kalimat).toarray()
+        self.assertEqual(got.shape, expected.shape)
+        self.assertLess(np.abs(got - expected).max(), 1e-6)
+        np.testing.assert_array_equal(got != 0, expected != 0)
+
+    def test_src_module_reuses_bot_implementation(self):
+        from unittest import mock
+        import bot_app.summarizer as bot
+
+        with mock.patch.object(sys, "path", sys.path + [str(ROOT_DIR)]):
+            import src.summarizer as src
+        for name in ("GlobalIDF", "iter_sentences", "ringkas_dokumen", "ringkas_teks"):
+            self.assertIs(getattr(src, name), getattr(bot, name), name)
+
+
+class IVFIndexTest(SimpleTestCase):
+    def test_full_probe_matches_brute_force(self):
+        import numpy as np
+        from sklearn.cluster import KMeans
+        from sklearn.feature_extraction.text import TfidfVectorizer
+        from bot_app.ivf_index import IVFIndex
+
+        docs = [f"dokumen {a} tentang {b} kampus" for a in ("krs", "ukt", "beasiswa", "dosen")
+                for b in ("jadwal", "biaya", "syarat", "kontak", "online")]
+        vec = TfidfVectorizer().fit(docs)
+        X = vec.transform(docs)
+        kmeans = KMeans(n_clusters=4, random_state=0, n_init=3).fit(X)
+        index = IVFIndex.build(kmeans, X, kmeans.labels_)
+        q = vec.transform(["jadwal krs online"])
+
+        self.assertEqual(index.probe(q, 1), kmeans.predict(q).tolist())
+        hasil = index.search(q, k=5, nprobe=4)
+        brute = np.sort((X @ q.T).toarray().ravel())[::-1][:5]
+        np.testing.assert_allclose([s for _, _, s in hasil], brute, rtol=1e-5)
+        for doc_id, c, skor in hasil:
+            self.assertEqual(kmeans.labels_[doc_id], c)
+            self.assertAlmostEqual(skor, (X[doc_id] @ q.T).toarray().item(), places=5)
+        # nprobe=1: hanya cluster terdekat yang di-scan
+        self.assertEqual({c for _, c, _ in index.search(q, k=20, nprobe=1)}, set(index.probe(q, 1)))
+
+
+class DocStoreTest(SimpleTestCase):
+    def test_roundtrip_through_bundle(self):
+        import tempfile
+        from bot_app.artifact_store import load_bundle, publish_bundle
+        from bot_app.doc_store import DOC_FILES, DocStore
+
+        docs = ["Jadwal KRS", "Biaya UKT Rp. 3.000.000", "", "Beasiswa — prestasi ✓"]
+        labels = [1, 0, 1, 1]
+        with tempfile.TemporaryDirectory() as base:
+            publish_bundle(base, DocStore.encode(docs, labels))
+            for use_mmap in (True, False):
+                store = DocStore.open(load_bundle(base, DOC_FILES)[1], use_mmap=use_mmap)
+                self.assertEqual(list(store), docs)
+                self.assertEqual({c: ids.tolist() for c, ids in store.clusters.items()},
+                                 {0: [1], 1: [0, 2, 3]})
+                self.assertEqual(store.per_cluster[1][::2], ["Jadwal KRS", "Beasiswa — prestasi ✓"])
+                del store   # tutup mmap sebelum direktori dihapus (Windows)
+
+        legacy = DocStore.from_cluster_map({1: ["a", "b"], 0: ["c"]})
+        self.assertEqual(dict((c, list(d)) for c, d in legacy.per_cluster.items()),
+                         {0: ["c"], 1: ["a", "b"]})
@@ -0,0 +1,245 @@
+"""
+Antrian training latar untuk `train_api`.
+
+- `submit_training()` langsung mengembalikan job id; training berjalan di
+  executor satu-thread, jadi request HTTP tidak lagi menunggu KMeans.
+- Single-flight: selama ada training berjalan (di worker mana pun), submit
+  berikutnya mendapat job id yang SAMA, bukan training kedua. Antar-worker
+  dijaga lock file `training.lock` (dibuat dengan O_EXCL) berisi job id dan
+  pid pemegangnya. Lock yang pemiliknya sudah mati (worker di-kill / OOM di
+  tengah training) dianggap basi; job yatimnya ditandai `failed`. Periksa +
+  pecah lock basi dilakukan di bawah flock `training.lock.guard`, sehingga
+  dua worker tidak bisa sama-sama memecah lock lalu sama-sama training.
+- Status job ditulis atomik ke `model/jobs/<id>.json`, sehingga poll status
+  bisa dilayani worker mana saja.
+- Job yang selesai sudah dipublikasi oleh `latih_model_sekarang` (artifact
+  store) lalu di-reload di worker ini; worker lain menyusul lewat watcher.
+"""
+
+import json
+import os
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+from .artifact_store import MODEL_ROOT, _write_atomic
+
+JOBS_DIR = MODEL_ROOT / 'jobs'
+LOCK_PATH = MODEL_ROOT / 'training.lock'
+LOCK_TIMEOUT = 3600      # detik; hanya untuk lock tanpa pid yang bisa diperiksa
+KEEP_JOBS = 50
+
+QUEUED, RUNNING, DONE, FAILED = 'queued', 'running', 'done', 'failed'
+
+_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='training')
+_lock = threading.Lock()
+_active = None           # job id yang sedang berjalan di proses ini
+
+
+# ------------------------------------------------------------
+# Status job (file JSON, dibaca semua worker)
+# ------------------------------------------------------------
+def _job_path(job_id):
+    return JOBS_DIR / f'{job_id}.json'
+
+
+def _save(job):
+    JOBS_DIR.mkdir(parents=True, exist_ok=True)
+    job['updated'] = time.time()
+    _write_atomic(_job_path(job['id']), json.dumps(job).encode('utf-8'))
+
+
+def job_status(job_id):
+    """Dict status job, atau None jika tidak dikenal."""
+    if not job_id or not all(c in '0123456789abcdef' for c in job_id):
+        return None  # id dari URL: jangan sampai jadi path traversal
+    try:
+        return json.loads(_job_path(job_id).read_text(encoding='utf-8'))
+    except (OSError, ValueError):
+        return None
+
+
+def _gc_jobs(keep=KEEP_JOBS):
+    jobs = sorted(JOBS_DIR.glob('*.json'), key=lambda p: p.stat().st_mtime)
+    for path in jobs[:-keep]:
+        path.unlink(missing_ok=True)
+
+
+# ------------------------------------------------------------
+# Lock antar-worker
+# ------------------------------------------------------------
+def _pid_alive(pid):
+    """False jika proses `pid` pasti sudah mati; None jika tidak bisa diperiksa."""
+    if not isinstance(pid, int) or os.name == 'nt':  # os.kill di Windows = terminate
+        return None
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True  # ada, milik user lain
+    return True
+
+
+def _read_lock():
+    """{'job', 'pid'} dari lock file; lock format lama (job id saja) -> pid None."""
+    try:
+        text = LOCK_PATH.read_text().strip()
+    except OSError:
+        return None
+    try:
+        owner = json.loads(text)
+    except ValueError:
+        owner = None
+    if not isinstance(owner, dict):
+        owner = {'job': text or None, 'pid': None}
+    return owner
+
+
+def _is_stale(owner):
+    alive = _pid_alive(owner.get('pid'))
+    if alive is not None:
+        return not alive
+    return time.time() - LOCK_PATH.stat().st_mtime >= LOCK_TIMEOUT
+
+
+def _fail_orphan(job_id, pid):
+    """Job milik pemegang lock yang mati tidak akan selesai: tandai gagal."""
+    job = job_status(job_id)
+    if job is None or job.get('state') in (DONE, FAILED):
+        return
+    job.update(state=FAILED, finished=time.time(),
+               msg=f'Training terhenti: worker (pid {pid}) mati sebelum selesai.')
+    _save(job)
+
+
+@contextmanager
+def _guard():
+    """
+    Flock eksklusif antar-proses selama lock file diperiksa / dibuat / dihapus.
+    Tanpa ini dua worker yang melihat lock basi yang sama bisa saling menghapus
+    lock yang baru dibuat lawannya. Dilepas OS bila pemegangnya mati.
+    """
+    LOCK_PATH.parent.mkdir(parents=True, exist_ok=True)
+    with open(LOCK_PATH.with_name(LOCK_PATH.name + '.guard'), 'a+b') as f:
+        if fcntl is not None:
+            fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+        else:
+            while True:
+                f.seek(0)
+                try:
+                    msvcrt.locking(f.fileno(), msvcrt.LK_LOCK, 1)
+                    break
+                except OSError:  # LK_LOCK menyerah setelah ~10 detik
+                    time.sleep(0.1)
+        try:
+            yield
+        finally:
+            if fcntl is not None:
+                fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+            else:
+                f.seek(0)
+                msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+
+
+def _acquire_lock(job_id):
+    """True jika lock didapat; jika tidak, job id pemegang lock ada di file."""
+    with _guard():
+        try:
+            fd = os.open(LOCK_PATH, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+        except FileExistsError:
+            owner = _read_lock()
+            if owner is not None:
+                try:
+                    if not _is_stale(owner):
+                        return False
+                except FileNotFoundError:
+                    owner = None
+            LOCK_PATH.unlink(missing_ok=True)  # basi: pemiliknya mati di tengah training
+            if owner is not None:
+                _fail_orphan(owner['job'], owner.get('pid'))
+            fd = os.open(LOCK_PATH, os.O_CREAT | os.O_EXCL | os.O_WRONLY)
+        with os.fdopen(fd, 'w') as f:
+            f.write(json.dumps({'job': job_id, 'pid': os.getpid()}))
+        return True
+
+
+def _lock_owner():
+    owner = _read_lock()
+    return owner['job'] if owner else None
+
+
+def _release_lock(job_id):
+    with _guard():
+        if _lock_owner() == job_id:
+            LOCK_PATH.unlink(missing_ok=True)
+
+
+# ------------------------------------------------------------
+# Submit / jalankan
+# ------------------------------------------------------------
+def submit_training():
+    """
+    Antrekan training; return (job, baru). Jika training sudah berjalan,
+    job yang sedang berjalan dikembalikan dengan baru=False.
+    """
+    global _active
+    with _lock:
+        if _active is not None:
+            return job_status(_active), False
+        job_id = uuid.uuid4().hex
+        if not _acquire_lock(job_id):
+            owner = _lock_owner()
+            running = job_status(owner)
+            if running is not None:
+                return running, False
+            # lock ada tapi status belum tertulis: anggap job itu tetap berjalan
+            return {'id': owner, 'state': QUEUED, 'progress': 0, 'msg': 'Menunggu...'}, False
+
+        job = {'id': job_id, 'state': QUEUED, 'progress': 0, 'msg': 'Menunggu antrian...',
+               'version': None, 'created': time.time(), 'finished': None, 'pid': os.getpid()}
+        _save(job)
+        _active = job_id
+    _executor.submit(_run, job)
+    return dict(job), True
+
+
+def _run(job):
+    global _active
+    from .training_logic import latih_model_sekarang
+
+    def progress(persen, pesan):
+        job.update(state=RUNNING, progress=persen, msg=pesan)
+        _save(job)
+        try:
+            os.utime(LOCK_PATH)  # tanda hidup, supaya lock tidak dianggap basi
+        except OSError:
+            pass
+
+    try:
+        progress(0, 'Memulai training...')
+        sukses, pesan = latih_model_sekarang(progress=progress)
+        job.update(state=DONE if sukses else FAILED, msg=pesan)
+        if sukses:
+            from .clustering_search import reload_model_otomatis, snapshot_model
+
+            reload_model_otomatis()  # worker lain menyusul lewat watcher versi
+            snap = snapshot_model()
+            job.update(progress=100, version=snap.version if snap else None)
+    except Exception as e:
+        job.update(state=FAILED, msg=f'Error Training: {e}')
+    finally:
+        job['finished'] = time.time()
+        _save(job)
+        with _lock:
+            _active = None
+            _release_lock(job['id'])
+        _gc_jobs()
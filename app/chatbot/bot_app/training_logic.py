@@ -1,8 +1,9 @@
-import pandas as pd
-import pickle
 import os
-from sklearn.feature_extraction.text import TfidfVectorizer
-from sklearn.cluster import KMeans
+
+from .artifact_store import publish_bundle
+from .doc_store import DocStore
+from .ivf_index import IVFIndex
+from .summarizer import GlobalIDF, ringkas_cluster
 
 # Setup Path agar dinamis
 # __file__ = .../sistek/app/chatbot/bot_app/training_logic.py
@@ -16,13 +17,24 @@ ROOT_DIR = os.path.dirname(os.path.dirname(BASE_DIR))
 CSV_PATH = os.path.join(ROOT_DIR, 'data', 'ir_docs', 'dataset.csv')
 MODEL_DIR = os.path.join(BASE_DIR, 'bot_app', 'model', 'model_clustering_dokumen')
 
-def latih_model_sekarang():
-    """Fungsi utama untuk melatih ulang model K-Means"""
+def latih_model_sekarang(progress=None):
+    """
+    Fungsi utama untuk melatih ulang model K-Means.
+    `progress(persen, pesan)` opsional dipanggil di setiap tahap (status job).
+    """
+    lapor = progress or (lambda persen, pesan: None)
+    lapor(5, "Memuat library...")
+    # pandas / sklearn baru dimuat saat training, bukan saat server start
+    import pandas as pd
+    from sklearn.feature_extraction.text import TfidfVectorizer
+    from sklearn.cluster import KMeans
+
     try:
         if not os.path.exists(CSV_PATH):
             return False, "File dataset.csv tidak ditemukan."
 
         # 1. Baca CSV
+        lapor(10, "Membaca dataset...")
         df = pd.read_csv(CSV_PATH)
         if 'dokumen' not in df.columns:
             return False, "Kolom 'dokumen' tidak ada di CSV."
@@ -30,10 +42,12 @@ def latih_model_sekarang():
         docs = df['dokumen'].astype(str).tolist()
         
         # 2. Vectorizing (TF-IDF)
+        lapor(30, f"TF-IDF {len(docs)} dokumen...")
         vec_cluster = TfidfVectorizer(stop_words='english') 
         X_cluster = vec_cluster.fit_transform(docs)
         
         # 3. K-Means (7 Cluster)
+        lapor(50, "Melatih K-Means...")
         kmeans = KMeans(n_clusters=7, random_state=42)
         kmeans.fit(X_cluster)
         
@@ -43,14 +57,25 @@ def latih_model_sekarang():
         for i, label in enumerate(labels):
             if label not in cluster_map: cluster_map[label] = []
             cluster_map[label].append(docs[i])
-            
-        # 5. Simpan Model (.pkl)
-        os.makedirs(MODEL_DIR, exist_ok=True)
-        pickle.dump(vec_cluster, open(os.path.join(MODEL_DIR, 'tfidf_vectorizer.pkl'), 'wb'))
-        pickle.dump(kmeans, open(os.path.join(MODEL_DIR, 'kmeans_model.pkl'), 'wb'))
-        pickle.dump(cluster_map, open(os.path.join(MODEL_DIR, 'cluster_label.pkl'), 'wb'))
-        
-        return True, f"Sukses! Melatih {len(docs)} dokumen ke dalam 7 Cluster."
+
+        # 5. IDF korpus untuk summarizer + ringkasan/kata kunci per cluster
+        #    (hanya bergantung isi cluster, jadi dihitung sekali di sini)
+        lapor(75, "Meringkas setiap cluster...")
+        idf = GlobalIDF.fit(docs)
+        ringkasan = ringkas_cluster(cluster_map, max_sentences=3, idf=idf)
+
+        # 6. Simpan Model (.pkl + dokumen kolumnar) sebagai satu versi baru, lalu aktifkan atomik
+        lapor(90, "Menyimpan model...")
+        versi = publish_bundle(MODEL_DIR, {
+            'tfidf_vectorizer.pkl': vec_cluster,
+            'kmeans_model.pkl': kmeans,
+            'cluster_summary.pkl': ringkasan,
+            'summary_idf.pkl': idf,
+            'ivf_index.pkl': IVFIndex.build(kmeans, X_cluster, labels),
+            **DocStore.encode(docs, labels),
+        })
+
+        return True, f"Sukses! Melatih {len(docs)} dokumen ke dalam 7 Cluster (versi {versi})."
         
     except Exception as e:
         return False, f"Error Training: {str(e)}"
\ No newline at end of file
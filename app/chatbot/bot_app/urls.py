@@ -6,5 +6,8 @@ urlpatterns = [
     path('get_response/', views.get_response, name='get_response'),
     path('scrape_api/', views.scrape_api, name='scrape_api'),
     path('train_api/', views.train_api, name='train_api'),
+    path('train_status/<str:job_id>/', views.train_status_api, name='train_status'),
     path('sentiment_api/', views.sentiment_api, name='sentiment_api'),  # NEW
+    path('ready/', views.ready_api, name='ready'),
+    path('version/', views.version_api, name='version'),
 ]
\ No newline at end of file
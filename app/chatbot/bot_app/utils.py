@@ -1,32 +1,44 @@
-import pickle
 import os
 from django.conf import settings
 
+from .artifact_store import MODEL_ROOT, load_bundle, version_stamp
+from .model_registry import registry
+
 # --- FUNGSI LOAD MODEL (Agar path dinamis) ---
 def load_pickle(folder_name, file_name):
-    # Mencari path absolut ke folder 'model' di dalam 'bot_app'
-    base_dir = os.path.dirname(os.path.abspath(__file__))
-    file_path = os.path.join(base_dir, 'model', folder_name, file_name)
-    
-    try:
-        with open(file_path, 'rb') as f:
-            return pickle.load(f)
-    except FileNotFoundError:
-        print(f"ERROR: File {file_name} tidak ditemukan di {file_path}")
+    # Mencari file di versi aktif folder model (bot_app/model/<folder>/CURRENT)
+    bundle = load_bundle(os.path.join(MODEL_ROOT, folder_name), [file_name])
+    if bundle is None:
+        print(f"ERROR: File {file_name} tidak ditemukan di {os.path.join(MODEL_ROOT, folder_name)}")
+        return None
+    return bundle[1][file_name]
+
+# --- 1. MODEL INTENT (dimuat sekali oleh registry: warm-up atau prediksi pertama) ---
+INTENT_DIR = os.path.join(MODEL_ROOT, 'model_intent_classification')
+
+def _load_intent():
+    print("Sedang memuat Model Intent...")
+    # vectorizer + model dari versi yang sama, tidak pernah campuran dua training
+    bundle = load_bundle(INTENT_DIR, ['vectorize.pkl', 'model_intent.pkl'])
+    if bundle is None:
+        print("ERROR: Model Intent belum lengkap.")
         return None
+    return bundle[1]['vectorize.pkl'], bundle[1]['model_intent.pkl']
+
+def _warmup_intent(intent):
+    vectorizer, model = intent
+    model.predict(vectorizer.transform(["halo"]))
 
-# --- 1. LOAD MODEL INTENT ---
-print("Sedang memuat Model Intent...")
-intent_vectorizer = load_pickle('model_intent_classification', 'vectorize.pkl')
-intent_model = load_pickle('model_intent_classification', 'model_intent.pkl')
+registry.register("intent", _load_intent, _warmup_intent,
+                  version=lambda: version_stamp(INTENT_DIR))
 
-# --- 2. LOAD MODEL CLUSTERING ---
-print("Sedang memuat Model Clustering...")
-# Kita asumsikan cluster_label.pkl berisi Dictionary hasil pengelompokan {0: [docs], 1: [docs]}
-cluster_data = load_pickle('model_clustering_dokumen', 'cluster_label.pkl')
+def model_intent():
+    """(vectorizer, model) intent dari registry; (None, None) jika belum ada"""
+    return registry.get("intent") or (None, None)
 
 # --- FUNGSI PREDIKSI (Dipanggil views.py) ---
 def prediksi_niat_user(teks):
+    intent_vectorizer, intent_model = model_intent()
     if not intent_vectorizer or not intent_model:
         return "Error: Model Intent belum dimuat."
         
@@ -37,6 +49,15 @@ def prediksi_niat_user(teks):
     return prediksi
 
 def ambil_data_cluster():
-    if not cluster_data:
-        return {}
-    return cluster_data
\ No newline at end of file
+    # Dokumen hanya dimuat sekali (DocStore di snapshot clustering_search)
+    from .clustering_search import ambil_data_dokumen
+    return ambil_data_dokumen() or {}
+
+# --- VERSI MODEL (Untuk kunci cache jawaban) ---
+def versi_model():
+    """
+    Versi model yang SEDANG DILAYANI worker ini (bukan yang ada di disk), jadi
+    jawaban cache tidak tercampur selama worker lain/watcher belum reload.
+    Berubah setiap training ulang dan rollback.
+    """
+    return tuple(sorted(registry.loaded_versions().items()))
@@ -2,25 +2,40 @@ from django.shortcuts import render
 from django.http import JsonResponse
 from django.views.decorators.csrf import csrf_exempt
 import json
+import os
+import sys
 import time
-import requests
-from bs4 import BeautifulSoup
+
+ROOT_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..", ".."))
+if ROOT_DIR not in sys.path:
+    sys.path.append(ROOT_DIR)
+
+from src.answer_cache import AnswerCache, CACHE_DIR, normalize_text
 
 # --- IMPORT MODULE APLIKASI ---
 # Pastikan file clustering_search.py dan training_logic.py sudah ada
 try:
-    from .clustering_search import cari_dokumen_relevan, reload_model_otomatis, data_dokumen
+    from .clustering_search import (cari_dokumen_relevan, ambil_data_dokumen,
+                                    ambil_ringkasan, snapshot_model)
 except ImportError:
     cari_dokumen_relevan = None
-    reload_model_otomatis = None
-    data_dokumen = {}
+    ambil_data_dokumen = lambda model=None: {}
+    ambil_ringkasan = lambda cluster_id, model=None: None
+    snapshot_model = lambda: None
 
 try:
     from .training_logic import latih_model_sekarang
+    from .training_jobs import submit_training, job_status
 except ImportError:
     latih_model_sekarang = None
 
-from .utils import prediksi_niat_user 
+from .utils import prediksi_niat_user, versi_model
+from .model_registry import registry
+
+# Cache jawaban pencarian/intent; kunci memuat versi model sehingga
+# training ulang (train_api) otomatis meng-invalidasi entri lama.
+answer_cache = AnswerCache(maxsize=2048, ttl=6 * 3600,
+                           path=CACHE_DIR / "bot_answers.json").persist_on_exit()
 
 # Import Summarizer (Feature Based)
 try:
@@ -41,6 +56,9 @@ except ImportError:
 
 def ambil_berita_terbaru():
     """Mengambil berita dari dinus.ac.id (Versi aman di dalam views)"""
+    import requests
+    from bs4 import BeautifulSoup
+
     url = "https://dinus.ac.id/"
     headers = {'User-Agent': 'Mozilla/5.0'}
     try:
@@ -108,24 +126,28 @@ def scrape_api(request):
 # --- API TRAINING (Untuk Sidebar 'Latih Ulang Bot') ---
 @csrf_exempt
 def train_api(request):
-    """API untuk memicu proses training ulang"""
+    """
+    API untuk memicu proses training ulang. Training berjalan di latar;
+    response langsung berisi job id (202). Klik ganda / admin lain saat
+    training berjalan mendapat job yang sama, bukan training kedua.
+    """
     if request.method == 'POST':
         if not latih_model_sekarang:
             return JsonResponse({'status': 'error', 'msg': 'Modul training_logic.py tidak ditemukan!'})
 
-        # 1. Jalankan Training (Membuat file .pkl baru)
-        sukses, pesan = latih_model_sekarang()
-        
-        if sukses:
-            # 2. Jika sukses, reload model di RAM agar langsung update
-            if reload_model_otomatis:
-                reload_model_otomatis()
-            return JsonResponse({'status': 'success', 'msg': pesan})
-        else:
-            return JsonResponse({'status': 'error', 'msg': pesan})
-            
+        job, baru = submit_training()
+        pesan = 'Training dimulai.' if baru else 'Training sedang berjalan.'
+        return JsonResponse({'status': 'accepted', 'msg': pesan, 'job': job}, status=202)
+
     return JsonResponse({'status': 'error', 'msg': 'Invalid request'})
 
+def train_status_api(request, job_id):
+    """Status/progress job training (dipoll oleh sidebar sampai state done/failed)."""
+    job = job_status(job_id) if latih_model_sekarang else None
+    if job is None:
+        return JsonResponse({'status': 'error', 'msg': 'Job tidak ditemukan.'}, status=404)
+    return JsonResponse({'status': 'success', 'job': job})
+
 # ==============================================================================
 # 4. LOGIKA UTAMA CHATBOT (GET RESPONSE)
 # ==============================================================================
@@ -164,6 +186,21 @@ def get_response(request):
                 profane_words = ["anjing", "babi", "kontol", "memek", "bangsat", "asu", "jancok", "fuck", "shit"] # Add more as needed
                 return any(word in text.lower() for word in profane_words)
 
+            # --- FITUR SUMMARIZER (Manual Command) ---
+            # Dicek paling awal: teks yang diringkas bebas isinya (bisa memuat
+            # "berita", sapaan, dll.) dan tidak boleh memicu cabang lain.
+            if user_input.lower().startswith("ringkas"):
+                teks = user_input[len("ringkas"):].strip()
+                if ringkas_teks_sederhana:
+                    # Teks dipecah per kalimat lalu diringkas (IDF korpus dari model jika ada)
+                    model = snapshot_model()
+                    hasil = ringkas_teks_sederhana(teks, max_sentences=3,
+                                                   idf=model.idf if model else None)
+                    response_text = f"<b>[Fitur: Ringkas Teks]</b><br><b>📄 Ringkasan (3 Kalimat Utama):</b><br>{hasil}"
+                else:
+                    response_text = "Modul Summarizer belum siap."
+                return JsonResponse({'response': response_text})
+
             # --- A. FITUR SCRAPER (Via Chat) ---
             if "berita" in user_input.lower() or "news" in user_input.lower():
                 response_text = "<b>[Fitur: Web Mining]</b><br>Sedang mencari berita...<br>"
@@ -194,23 +231,29 @@ def get_response(request):
             elif _is_profanity(user_input):
                 response_text = "Mohon maaf, saya tidak dapat merespons pesan yang tidak sopan. Mari kita berkomunikasi dengan baik-baik 🙏"
             
-            # --- C. FITUR SUMMARIZER (Manual Command) ---
-            elif user_input.lower().startswith("ringkas"):
-                teks = user_input.replace("ringkas", "").strip()
-                if ringkas_teks_sederhana:
-                    hasil = ringkas_teks_sederhana(teks, max_sentences=3)
+            # --- CACHE: pencarian & intent untuk input yang sama -> jawaban yang sama ---
+            # (mode pencarian menampilkan kata kunci apa adanya, jadi ikut di kunci)
+            is_search = user_input.lower().startswith("cari") or user_input.lower().startswith("search")
+            cache_key = AnswerCache.make_key(normalize_text(user_input),
+                                             user_input.strip() if is_search else "",
+                                             bool(use_summarization), versi_model())
+            cached = answer_cache.get(cache_key)
+            if cached is not None:
+                response_text = cached
 
             # --- C. FITUR PENCARIAN BEBAS (SEARCH) ---
             # Jika user mengetik "Cari info..."
-            if user_input.lower().startswith("cari") or user_input.lower().startswith("search"):
+            elif is_search:
                 keyword = user_input.replace("cari", "").replace("search", "").strip()
                 
                 if cari_dokumen_relevan:
-                    cluster_id, docs = cari_dokumen_relevan(keyword)
+                    model = snapshot_model()
+                    cluster_id, docs = cari_dokumen_relevan(keyword, model=model)
                     if cluster_id is not None:
-                        # Ringkas dokumen yang ditemukan
+                        # Ringkas dokumen yang ditemukan (IDF korpus dari training)
                         if ringkas_dokumen and len(docs) > 0:
-                            ringkasan = ringkas_dokumen(docs, max_sentences=3)
+                            ringkasan = ringkas_dokumen(docs, max_sentences=3,
+                                                        idf=model.idf if model else None)
                             response_text = f"<b>[Mode Pencarian - Cluster {cluster_id}]</b><br>Kata kunci: <i>'{keyword}'</i><br><br>"
                             response_text += f"<b>📄 Ringkasan (3 Kalimat Utama):</b><br>{ringkasan}"
                         else:
@@ -232,15 +275,22 @@ def get_response(request):
                 if niat in INTENT_TO_CLUSTER:
                     target_cluster = INTENT_TO_CLUSTER[niat]
                     
-                    # Ambil dokumen dari variabel global yang di-import
-                    docs = data_dokumen.get(target_cluster, [])
+                    # Ambil dokumen dari snapshot model clustering saat ini (selalu
+                    # versi terbaru setelah reload; dimuat saat pertama dipakai)
+                    model = snapshot_model()
+                    docs = ambil_data_dokumen(model).get(target_cluster, ())
 
                     response_text = f"<b>[Topik: {niat}]</b><br>"
                     if docs:
+                        # Ringkasan + kata kunci cluster sudah dihitung saat training
+                        precomputed = ambil_ringkasan(target_cluster, model)
+
                         # Cek apakah user ingin ringkasan atau dokumen penuh
-                        if use_summarization and ringkas_dokumen:
-                            # Ringkas dokumen otomatis dengan ekstraksi fitur
-                            ringkasan, features = ringkas_dokumen(docs, max_sentences=3, return_features=True)
+                        if use_summarization and (precomputed or ringkas_dokumen):
+                            # Lookup O(1); ringkas ulang hanya untuk bundle lama tanpa ringkasan
+                            ringkasan, features = precomputed or ringkas_dokumen(
+                                docs, max_sentences=3, return_features=True,
+                                idf=model.idf if model else None)
                             
                             # Tampilkan kata kunci yang terdeteksi (Feature Based)
                             if features:
@@ -258,6 +308,9 @@ def get_response(request):
                 else:
                     response_text = f"Maaf, saya kurang paham. (Kategori terdeteksi: {niat})"
 
+            if cached is None:
+                answer_cache.put(cache_key, response_text)
+
             time.sleep(0.5) # Efek mengetik alami
             return JsonResponse({'response': response_text})
         except Exception as e:
@@ -265,6 +318,19 @@ def get_response(request):
     return JsonResponse({'response': 'Hanya POST yang diterima.'})
 
 
+# ==============================================================================
+# 5. READINESS (UNTUK LOAD BALANCER)
+# ==============================================================================
+def ready_api(request):
+    """200 jika semua model selesai dimuat (warm), 503 selama worker masih dingin."""
+    registry.warm_up()  # worker yang tidak melewati AppConfig.ready() tetap mulai warm-up
+    status = registry.status()
+    return JsonResponse(status, status=200 if status['ready'] else 503)
+
+def version_api(request):
+    """Versi model yang dilayani worker ini vs versi di disk (monitoring propagasi reload)."""
+    return JsonResponse(registry.versions())
+
 # ==============================================================================
 # 6. API SENTIMENT ANALYSIS
 # ==============================================================================
@@ -286,8 +352,15 @@ def sentiment_api(request):
                     'confidence': {}
                 })
             
-            # Predict sentiment
-            sentiment, confidence = predict_sentiment(text)
+            # Predict sentiment (torch/transformers dimuat saat pertama dipakai)
+            try:
+                sentiment, confidence = predict_sentiment(text)
+            except RuntimeError as e:
+                return JsonResponse({
+                    'error': f'Sentiment analyzer not available: {e}',
+                    'sentiment': 'unknown',
+                    'confidence': {}
+                })
             
             return JsonResponse({
                 'text': text,
@@ -1,36 +1,31 @@
-import pickle
 import os
 
-# Sesuaikan path ini dengan lokasi file pickle kamu di foto tadi
-path_file = 'bot_app/model/model_clustering_dokumen/cluster_label.pkl'
+from bot_app.artifact_store import load_bundle
+from bot_app.doc_store import DOC_FILES, DocStore
 
-print(f"--- MEMERIKSA FILE: {path_file} ---")
+# Folder model clustering (versi aktif dibaca lewat pointer CURRENT)
+path_model = 'bot_app/model/model_clustering_dokumen'
 
-if os.path.exists(path_file):
+print(f"--- MEMERIKSA DOKUMEN: {path_model} ---")
+
+bundle = load_bundle(path_model, DOC_FILES) if os.path.isdir(path_model) else None
+if bundle is not None:
     try:
-        with open(path_file, 'rb') as f:
-            data = pickle.load(f)
-        
-        # 1. Cek Tipe Datanya
-        tipe_data = type(data)
-        print(f"\n[1] TIPE DATA: {tipe_data}")
-        
+        versi, paths = bundle
+        store = DocStore.open(paths)
+
+        # 1. Cek Ukurannya
+        print(f"\n[1] VERSI: {versi} | TOTAL DOKUMEN: {len(store)} | "
+              f"BUFFER TEKS: {len(store.text)} byte")
+
         # 2. Cek Isinya (Preview)
         print("\n[2] CONTOH ISI DATA:")
-        if isinstance(data, dict):
-            # Jika Dictionary, tampilkan keys dan sampel value
-            print(f"Keys (Label Klaster): {list(data.keys())}")
-            print("Contoh Data Klaster Pertama:")
-            first_key = list(data.keys())[0]
-            print(data[first_key][:3]) # Tampilkan 3 dokumen pertama
-        elif isinstance(data, list) or "numpy" in str(tipe_data):
-            # Jika List/Array, tampilkan 10 item pertama
-            print(data[:10])
-            print(f"Total Item: {len(data)}")
-        else:
-            print(data)
-            
+        print(f"Keys (Label Klaster): {list(store.clusters)}")
+        print("Contoh Data Klaster Pertama:")
+        first_key = next(iter(store.clusters))
+        print(store.per_cluster[first_key][:3]) # Tampilkan 3 dokumen pertama
+
     except Exception as e:
-        print(f"Error membaca pickle: {e}")
+        print(f"Error membaca dokumen: {e}")
 else:
-    print("File tidak ditemukan! Cek path folder 'model' kamu lagi.")
\ No newline at end of file
+    print("Dokumen tidak ditemukan! Lakukan training dulu (bundle lama masih memakai cluster_label.pkl).")
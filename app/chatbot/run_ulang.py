@@ -1,20 +1,20 @@
-import pickle
 import os
 import numpy as np
 from sklearn.feature_extraction.text import TfidfVectorizer
 from sklearn.neighbors import KNeighborsClassifier  # Sesuai notebook.ipynb
 from sklearn.cluster import KMeans                  # Sesuai notebook..ipynb
 
+from bot_app.artifact_store import publish_bundle
+from bot_app.doc_store import DocStore
+from bot_app.ivf_index import IVFIndex
+from bot_app.summarizer import GlobalIDF, ringkas_cluster
+
 # --- 1. KONFIGURASI FOLDER ---
 # Script akan mencari folder bot_app/model/.. relatif dari file ini berada
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
 PATH_INTENT = os.path.join(BASE_DIR, 'bot_app', 'model', 'model_intent_classification')
 PATH_CLUSTER = os.path.join(BASE_DIR, 'bot_app', 'model', 'model_clustering_dokumen')
 
-# Buat folder jika belum ada
-os.makedirs(PATH_INTENT, exist_ok=True)
-os.makedirs(PATH_CLUSTER, exist_ok=True)
-
 print("=== MULAI GENERATE MODEL ULANG (SESUAI NOTEBOOK) ===")
 
 # ==========================================
@@ -71,14 +71,11 @@ X_intent = vectorizer_intent.fit_transform(data_intent)
 model_intent = KNeighborsClassifier(n_neighbors=1)
 model_intent.fit(X_intent, labels_intent)
 
-# c. Simpan
-print("    -> Menyimpan vectorize.pkl...")
-with open(os.path.join(PATH_INTENT, 'vectorize.pkl'), 'wb') as f:
-    pickle.dump(vectorizer_intent, f)
-
-print("    -> Menyimpan model_intent.pkl...")
-with open(os.path.join(PATH_INTENT, 'model_intent.pkl'), 'wb') as f:
-    pickle.dump(model_intent, f)
+# c. Simpan (versi baru, diaktifkan atomik)
+print("    -> Menyimpan vectorize.pkl + model_intent.pkl...")
+versi = publish_bundle(PATH_INTENT, {'vectorize.pkl': vectorizer_intent,
+                                     'model_intent.pkl': model_intent})
+print(f"    -> Versi aktif: {versi}")
 
 
 # ==========================================
@@ -136,8 +133,8 @@ X_cluster = vectorizer_cluster.fit_transform(dokumen_raw)
 kmeans = KMeans(n_clusters=7, random_state=42, n_init=10)
 kmeans.fit(X_cluster)
 
-# c. Buat Dictionary Cluster Label (ID -> List Dokumen)
-# Ini penting agar di Web nanti muncul teksnya, bukan cuma angka/label.
+# c. Buat Dictionary Cluster Label (ID -> List Dokumen) untuk ringkasan per cluster.
+# Teks dokumen untuk Web disimpan kolumnar (doc_*.bin/.npy), bukan sebagai pickle ini.
 cluster_label = {}
 labels = kmeans.labels_
 
@@ -147,18 +144,19 @@ for i, label in enumerate(labels):
     # Simpan teks asli dokumen ke dalam list
     cluster_label[label].append(dokumen_raw[i])
 
-# d. Simpan
-print("    -> Menyimpan tfidf_vectorizer.pkl...")
-with open(os.path.join(PATH_CLUSTER, 'tfidf_vectorizer.pkl'), 'wb') as f:
-    pickle.dump(vectorizer_cluster, f)
-
-print("    -> Menyimpan kmeans_model.pkl...")
-with open(os.path.join(PATH_CLUSTER, 'kmeans_model.pkl'), 'wb') as f:
-    pickle.dump(kmeans, f)
-
-print("    -> Menyimpan cluster_label.pkl...")
-with open(os.path.join(PATH_CLUSTER, 'cluster_label.pkl'), 'wb') as f:
-    pickle.dump(cluster_label, f)
+# d. IDF korpus + ringkasan/kata kunci per cluster (dipakai jalur intent tanpa hitung ulang)
+summary_idf = GlobalIDF.fit(dokumen_raw)
+cluster_summary = ringkas_cluster(cluster_label, max_sentences=3, idf=summary_idf)
+
+# e. Simpan (versi baru, diaktifkan atomik)
+print("    -> Menyimpan tfidf_vectorizer.pkl + kmeans_model.pkl + doc_text.bin/doc_offsets.npy/doc_labels.npy + cluster_summary.pkl + summary_idf.pkl + ivf_index.pkl...")
+versi = publish_bundle(PATH_CLUSTER, {'tfidf_vectorizer.pkl': vectorizer_cluster,
+                                      'kmeans_model.pkl': kmeans,
+                                      'cluster_summary.pkl': cluster_summary,
+                                      'summary_idf.pkl': summary_idf,
+                                      'ivf_index.pkl': IVFIndex.build(kmeans, X_cluster, labels),
+                                      **DocStore.encode(dokumen_raw, labels)})
+print(f"    -> Versi aktif: {versi}")
 
 print("\n=== SUKSES! MODEL TELAH DIPERBARUI ===")
 print("Sekarang jalankan: python manage.py runserver")
\ No newline at end of file
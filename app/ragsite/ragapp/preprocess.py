@@ -1,101 +1,20 @@
-# src/preprocess.py
+# app/ragsite/ragapp/preprocess.py
+"""
+Shim: pipeline preprocessing ada di `src/preprocess.py` (satu implementasi,
+satu cache stem persisten untuk dokumen, indeks dan query).
+"""
 
-import re
-from collections import Counter
+import sys
 from pathlib import Path
-from Sastrawi.Stemmer.StemmerFactory import StemmerFactory
-import matplotlib.pyplot as plt
 
-# --- Direktori utama ---
-ROOT = Path(__file__).resolve().parent.parent.parent.parent  # app/ragapp -> app -> stki_rag
-DOCS_DIR = ROOT / "data" / "docs"
-PROC_DIR = ROOT / "data" / "processed"
-LOG_FILE = PROC_DIR / "preprocess_log.txt"
-PROC_DIR.mkdir(parents=True, exist_ok=True)
+ROOT = Path(__file__).resolve().parent.parent.parent.parent  # app/ragsite/ragapp -> root
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
 
-# --- Stopwords sederhana (bisa ditambah) ---
-STOPWORDS = set("""
-yang dan di ke dari untuk pada dengan adalah ini itu oleh sebagai juga 
-akan tidak dapat telah atau lebih karena para mereka kita kamu saya anda 
-sebuah suatu bila saja setiap serta namun masih maka
-""".split())
-
-stemmer = StemmerFactory().create_stemmer()
-
-# ------------------------------------------------------------
-# 🔧 Tahapan Preprocessing
-# ------------------------------------------------------------
-def clean(text: str) -> str:
-    """Case folding, normalisasi angka & tanda baca"""
-    text = text.lower()
-    text = re.sub(r"http\S+", " ", text)
-    text = re.sub(r"[^a-z0-9\s]", " ", text)  # hapus tanda baca
-    text = re.sub(r"\d+", " ", text)          # hapus angka
-    text = re.sub(r"\s+", " ", text).strip()
-    return text
-
-def tokenize(text: str):
-    """Memecah teks menjadi token sederhana"""
-    return text.split()
-
-def remove_stopwords(tokens):
-    """Menghapus stopwords umum"""
-    return [t for t in tokens if t not in STOPWORDS and len(t) > 1]
-
-def stem(tokens):
-    """Melakukan stemming menggunakan Sastrawi"""
-    return [stemmer.stem(t) for t in tokens]
-
-def preprocess_text(text):
-    """Pipeline preprocessing"""
-    text = clean(text)
-    tokens = tokenize(text)
-    tokens = remove_stopwords(tokens)
-    tokens = stem(tokens)
-    return tokens
-
-# ------------------------------------------------------------
-# 🚀 Eksekusi Preprocessing ke Semua Dokumen
-# ------------------------------------------------------------
-def run_all(plot=True):
-    stats = []
-    log_lines = []
-
-    files = sorted([p for p in DOCS_DIR.iterdir() if p.suffix == ".txt"])
-    for p in files:
-        raw = p.read_text(encoding="utf-8", errors="ignore")
-        toks = preprocess_text(raw)
-        out = PROC_DIR / p.name
-        out.write_text(" ".join(toks), encoding="utf-8")
-
-        stats.append((p.name, len(toks)))
-        log_lines.append(f"{p.name}: {len(toks)} tokens")
-
-        print(f"[preprocess] {p.name} -> {len(toks)} tokens -> {out}")
-
-    # Simpan log proses
-    LOG_FILE.write_text("\n".join(log_lines), encoding="utf-8")
-    print(f"\n✅ Log tersimpan di: {LOG_FILE}")
-
-    # --- Opsional: Plot distribusi panjang dokumen ---
-    if plot and stats:
-        plt.figure(figsize=(8, 4))
-        names = [s[0] for s in stats]
-        vals = [s[1] for s in stats]
-        plt.bar(names, vals)
-        plt.xticks(rotation=30, ha="right")
-        plt.title("Distribusi Panjang Dokumen (Jumlah Token)")
-        plt.tight_layout()
-        plt.savefig(PROC_DIR / "doc_length_distribution.png")
-        print(f"[plot] saved to {PROC_DIR / 'doc_length_distribution.png'}")
-
-    # --- Tampilkan top token per dokumen ---
-    for name, _ in stats:
-        toks = (PROC_DIR / name).read_text(encoding="utf-8").split()
-        freq = Counter(toks)
-        print(f"\nTop 10 tokens untuk {name}:")
-        for t, c in freq.most_common(10):
-            print(f"  {t:15} {c}")
+from src.preprocess import (  # noqa: E402,F401
+    DOCS_DIR, PROC_DIR, LOG_FILE, STOPWORDS, get_stemmer,
+    clean, tokenize, remove_stopwords, stem, preprocess_text, run_all,
+)
 
 if __name__ == "__main__":
     run_all()
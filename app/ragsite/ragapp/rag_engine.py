@@ -1,44 +1,39 @@
-import os, sys, re, heapq
+import os, sys
 ROOT_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..", ".."))
 sys.path.append(ROOT_DIR)
 
-from src.vsm_ir import load_processed, build_term_stats, tfidf_matrix, search
+from src.corpus_index import get_index
+from src.sentence_index import split_sentences
+from src.answer_cache import AnswerCache, CACHE_DIR, normalize_query
+
+# Cache jawaban: kunci memuat versi indeks, jadi update berita otomatis meng-invalidasi
+answer_cache = AnswerCache(maxsize=2048, ttl=6 * 3600,
+                           path=CACHE_DIR / "rag_answers.json").persist_on_exit()
 
 # =========================================================
 # Fungsi bantu
 # =========================================================
 def extract_sentences(text):
     """Memecah teks menjadi kalimat yang cukup panjang untuk diambil ringkasannya."""
-    text = re.sub(r'(?<=[a-z0-9])\n(?=[A-Z0-9])', '. ', text)
-    sents = re.split(r'(?<=[.!?])\s+|\n+', text)
-    sents = [s.strip() for s in sents if len(s.strip()) > 20]
-    return sents
-
-def score_sentence_by_query(sent, q_tokens):
-    toks = sent.lower().split()
-    return sum(1 for t in toks if t in q_tokens)
+    return [text[s:e] for s, e in split_sentences(text)]
 
 # =========================================================
 # Inti: RAG sederhana berbasis VSM/TF-IDF/BM25
 # =========================================================
-def rag_answer(query, k=3, scheme="normal"):
+def rag_answer(query, k=3, scheme="normal", index=None):
     """Menjawab query berbasis pencarian VSM/BM25 sederhana."""
-    docs, names = load_processed()
-    vocab, t2i, TF, DF, lens, avg_len = build_term_stats(docs)
-    TFIDF_normal, idf = tfidf_matrix(TF, DF, len(docs), sublinear=False)
-    TFIDF_sub, _ = tfidf_matrix(TF, DF, len(docs), sublinear=True)
-
-    # Pilih skema retrieval
-    if scheme == "bm25":
-        results = search(query, TF=TF, DF=DF, lens=lens, avg_len=avg_len,
-                         t2i=t2i, names=names, docs=docs, top_k=k, scheme="bm25")
-    else:
-        TFIDF = TFIDF_sub if scheme == "sublinear" else TFIDF_normal
-        results = search(query, TFIDF=TFIDF, t2i=t2i, idf=idf,
-                         names=names, docs=docs, top_k=k, scheme=scheme)
+    # Indeks dibangun sekali per versi korpus lalu dipakai bersama semua request;
+    # varian TF-IDF dihitung lazy hanya untuk skema yang diminta.
+    if index is None:
+        index = get_index()
+    results = index.search(query, k=k, scheme=scheme)
+    return format_answer(index, query, results)
+
 
+def format_answer(index, query, results):
+    """Susun (answer_text, citation_text) dari hasil retrieval `results`."""
     # Template jawaban
-    q_tokens = set(query.replace("AND","").replace("OR","").replace("NOT","").lower().split())
+    q_terms = index.query_terms(query)
     summary_lines = []
     summary_lines.append("Berdasarkan dokumen teratas berikut:")
     for doc, score, idx in results:
@@ -47,13 +42,10 @@ def rag_answer(query, k=3, scheme="normal"):
     summary_lines.append("\nRingkasan (kalimat relevan):")
     picked = 0
     for doc, score, idx in results:
-        sents = extract_sentences(docs[idx])
-        scored = [(score_sentence_by_query(s, q_tokens), s) for s in sents]
-        scored = sorted(scored, key=lambda x: x[0], reverse=True)
-        for sc, s in scored[:2]:
-            if sc > 0:
-                summary_lines.append(f"- {s}")
-                picked += 1
+        # Kalimat, token, dan offset sudah disiapkan saat indexing (tabel kalimat)
+        for sc, sid in index.top_sentences(idx, q_terms, n=2):
+            summary_lines.append(f"- {index.snippet(idx, sid, q_terms)}")
+            picked += 1
             if picked >= 5:
                 break
         if picked >= 5:
@@ -70,9 +62,9 @@ def rag_answer(query, k=3, scheme="normal"):
 # =========================================================
 # Kompatibilitas fungsi lama
 # =========================================================
-def handle_query(question: str, top_k: int = 3, scheme="normal"):
+def handle_query(question: str, top_k: int = 3, scheme="normal", index=None):
     """Fungsi utama yang dipanggil front-end."""
-    answer, citations = rag_answer(question, k=top_k, scheme=scheme)
+    answer, citations = rag_answer(question, k=top_k, scheme=scheme, index=index)
     return answer, citations
 
 # =========================================================
@@ -82,8 +74,19 @@ def rag_pipeline(question: str, k: int = 3, scheme: str = "normal"):
     """
     Wrapper agar kompatibel dengan Django views.
     Mengembalikan (answer: str, citations: list[dict]) sesuai format front-end.
+    Hasil di-cache per (query ter-normalisasi, scheme, k, versi indeks).
     """
-    answer, citations_text = handle_query(question, top_k=k, scheme=scheme)
+    # Satu snapshot indeks untuk kunci DAN komputasi: jika indeks berganti di
+    # antaranya, jawaban indeks baru tidak boleh tersimpan di kunci versi lama
+    index = get_index()
+    key = AnswerCache.make_key(normalize_query(question), scheme, k, index.version)
+    answer, citations = answer_cache.get_or_compute(
+        key, lambda: _rag_pipeline(question, k=k, scheme=scheme, index=index))
+    return answer, citations
+
+
+def _rag_pipeline(question: str, k: int = 3, scheme: str = "normal", index=None):
+    answer, citations_text = handle_query(question, top_k=k, scheme=scheme, index=index)
 
     # Ubah citations_text (string multiline) → list of dict untuk front-end
     citations = []
@@ -104,6 +107,29 @@ def rag_pipeline(question: str, k: int = 3, scheme: str = "normal"):
     return answer, citations
 
 
+# =========================================================
+# Batch: banyak pertanyaan, satu perkalian matriks sparse
+# =========================================================
+def rag_batch(questions, k: int = 3, scheme: str = "normal", with_answer: bool = True):
+    """
+    Jawab banyak pertanyaan sekaligus (evaluasi offline / pre-generate FAQ).
+    Skor semua pertanyaan dihitung dalam satu perkalian (queries x docs).
+    Return list of dict {question, citations[, answer]}.
+    """
+    index = get_index()
+    out = []
+    for question, results in zip(questions, index.search_batch(questions, k=k, scheme=scheme)):
+        item = {
+            "question": question,
+            "citations": [{"title": doc, "source": doc, "score": round(score, 3)}
+                          for doc, score, idx in results],
+        }
+        if with_answer:
+            item["answer"] = format_answer(index, question, results)[0]
+        out.append(item)
+    return out
+
+
 # =========================================================
 # CLI cepat untuk pengujian manual
 # =========================================================
@@ -89,10 +89,16 @@ def run_preprocess():
         
         if str(src_path) not in sys.path:
             sys.path.insert(0, str(src_path))
+        if str(src_path.parent) not in sys.path:
+            sys.path.insert(0, str(src_path.parent))
         
         try:
-            import preprocess
-            preprocess.run_all()
+            # Hanya dokumen baru/berubah yang di-preprocess -> segmen indeks baru;
+            # worker lain berpindah generasi otomatis, merge segmen berjalan di latar
+            from src.segment_index import update_index, merge_in_background
+            manifest = update_index()
+            print(f"📦 Indeks dipublikasikan: {manifest or 'tidak ada perubahan'}")
+            merge_in_background()
             return True, "Preprocess berhasil"
         except ImportError as e:
             print(f"❌ Tidak bisa import preprocess dari {src_path}: {e}")
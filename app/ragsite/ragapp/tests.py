@@ -1,3 +1,1022 @@
-from django.test import TestCase
-
-# Create your tests here.
+import functools
+import os
+import sys
+import tempfile
+from pathlib import Path
+from unittest import mock
+
+import numpy as np
+from django.test import SimpleTestCase
+
+ROOT = Path(__file__).resolve().parents[3]  # app/ragsite/ragapp -> root project
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from ragapp.views import MAX_BATCH, MAX_K  # noqa: E402
+from src.vsm_ir import (SCHEMES, build_index, decode_varints,  # noqa: E402
+                        encode_varints)
+
+WORDS = ("buku perpustakaan pinjam kembali denda kartu anggota jadwal kuliah "
+         "ujian nilai dosen beasiswa ukt bayar bank wisuda skripsi jurnal katalog").split()
+
+
+def synthetic_corpus(n_docs, seed=0):
+    """Dokumen token (sudah 'ter-preprocess') dengan frekuensi kata Zipf."""
+    rng = np.random.RandomState(seed)
+    p = 1.0 / np.arange(1, len(WORDS) + 1)
+    p /= p.sum()
+    docs = [" ".join(rng.choice(WORDS, size=rng.randint(1, 40), p=p)) for _ in range(n_docs)]
+    return docs, [f"doc{i:04d}.txt" for i in range(n_docs)]
+
+
+class VarintTest(SimpleTestCase):
+    def test_roundtrip(self):
+        values = np.array([0, 1, 127, 128, 255, 16383, 16384, 2 ** 21, 2 ** 35, 2 ** 62])
+        buf, offsets = encode_varints(values, return_offsets=True)
+        np.testing.assert_array_equal(decode_varints(buf), values)
+        self.assertEqual(offsets.tolist(), [0, 1, 2, 3, 5, 7, 9, 12, 16, 22])
+        self.assertEqual(decode_varints(encode_varints([])).size, 0)
+        np.testing.assert_array_equal(decode_varints(encode_varints(np.arange(128))),
+                                      np.arange(128))  # jalur cepat 1 byte
+
+    def test_postings_across_block_boundary(self):
+        # term "umum" ada di 300 dokumen (3 blok: 128 + 128 + 44), dengan celah
+        # doc-id dan tf > 127 supaya delta/tf butuh varint multi-byte
+        n = 2000
+        has = np.arange(0, n, 7)[:300]
+        tf = {int(d): 1 + (i * 37) % 200 for i, d in enumerate(has)}
+        docs = [" ".join(["umum"] * tf.get(d, 0) + ["isi"]) for d in range(n)]
+        index = build_index(docs, [f"d{d}" for d in range(n)])
+        t = index.term_id("umum")
+        self.assertEqual(index.term_blk_ptr[t + 1] - index.term_blk_ptr[t], 3)
+
+        got_docs, got_tf = index.postings(t)
+        np.testing.assert_array_equal(got_docs, has)
+        np.testing.assert_array_equal(got_tf, [tf[int(d)] for d in has])
+
+        # kandidat di kedua sisi batas blok (posting ke-127 / ke-128)
+        cand = np.array([has[0], has[127], has[128] - 1, has[128], has[255], has[256], n - 1])
+        d, f = index.postings_for(t, cand)
+        expect = [c for c in cand if int(c) in tf]
+        np.testing.assert_array_equal(d, expect)
+        np.testing.assert_array_equal(f, [tf[int(c)] for c in expect])
+        np.testing.assert_array_equal(index.positions(t, has[126:130])[2],
+                                      np.arange(tf[int(has[128])]))
+
+
+class MaxScoreTopKTest(SimpleTestCase):
+    """`top_k` (MaxScore) harus identik dengan skoring penuh `score_docs`."""
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        docs, names = synthetic_corpus(700)
+        cls.index = build_index(docs, names)
+
+    def brute_force(self, q_ids, q_tf, k, scheme):
+        cand = np.unique(np.concatenate([self.index.postings(t)[0] for t in q_ids]))
+        scores = self.index.score_docs(q_ids, q_tf, cand, scheme=scheme)
+        order = np.lexsort((cand, -scores))[:k]
+        return cand[order], scores[order]
+
+    def assert_same(self, terms, k):
+        q_ids, q_tf = self.index.stem_ids(terms)
+        for scheme in SCHEMES:
+            with self.subTest(terms=terms, k=k, scheme=scheme):
+                docs, scores = self.index.top_k(q_ids, q_tf, k=k, scheme=scheme)
+                exp_docs, exp_scores = self.brute_force(q_ids, q_tf, k, scheme)
+                np.testing.assert_allclose(scores, exp_scores, rtol=1e-9)
+                np.testing.assert_array_equal(docs, exp_docs)
+
+    def test_matches_brute_force(self):
+        for terms in (["buku"], ["beasiswa", "ukt"], ["buku", "buku", "katalog", "jurnal"],
+                      ["perpustakaan", "wisuda", "skripsi", "denda", "bank"]):
+            for k in (1, 5, 50):
+                self.assert_same(terms, k)
+
+    def test_k_larger_than_candidates(self):
+        q_ids, q_tf = self.index.stem_ids(["katalog"])
+        n_cand = self.index.df[q_ids[0]]
+        self.assertLess(n_cand, 700)
+        self.assert_same(["katalog"], int(n_cand) + 100)
+        docs, _ = self.index.top_k(q_ids, q_tf, k=int(n_cand) + 100)
+        self.assertEqual(docs.size, n_cand)
+
+    def test_unknown_terms(self):
+        q_ids, q_tf = self.index.stem_ids(["tidakada"])
+        self.assertEqual(self.index.top_k(q_ids, q_tf, k=5)[0].size, 0)
+
+
+class TermMatrixTest(SimpleTestCase):
+    """Jalur matriks CSR float32 vs baseline dense float64 dan `InvertedIndex`."""
+
+    QUERIES = [["buku"], ["beasiswa", "ukt", "bayar"], ["denda", "denda", "kartu"],
+               ["jadwal", "ujian", "nilai", "dosen", "wisuda"], ["katalog", "tidakada"]]
+
+    @classmethod
+    def setUpClass(cls):
+        from src.vsm_ir import build_term_stats
+
+        super().setUpClass()
+        docs, names = synthetic_corpus(300, seed=2)
+        cls.docs, cls.names = docs + [""], names + ["kosong.txt"]  # dokumen tanpa token
+        cls.stats = build_term_stats(cls.docs)
+
+    def dense_scores(self, stems, scheme):
+        """Baseline sebelum CSR: matriks dense float64, norma dihitung saat query."""
+        from src.vsm_ir import bm25_idf, bm25_tf_part, idf_weights, tf_weight
+
+        vocab, t2i, TF, DF, lens, avg_len = self.stats
+        TF = TF.toarray().astype(np.float64)
+        q_ids, q_tf = np.unique([t2i[t] for t in stems if t in t2i], return_counts=True)
+        if scheme == "bm25":
+            w = q_tf * bm25_idf(DF[q_ids], len(self.docs))
+            return (bm25_tf_part(TF[:, q_ids], lens[:, None].astype(np.float64), avg_len)
+                    * w).sum(axis=1)
+        sublinear = scheme == "sublinear"
+        idf = idf_weights(DF, len(self.docs))
+        W = tf_weight(TF, sublinear=sublinear) * idf
+        q = np.zeros(len(vocab))
+        q[q_ids] = tf_weight(q_tf, sublinear=sublinear) * idf[q_ids]
+        norms = np.linalg.norm(W, axis=1) * np.linalg.norm(q)
+        return W @ q / np.maximum(norms, 1e-12)
+
+    def csr_scores(self, stems, scheme):
+        """Skor dari `vsm_ir.search` tanpa inverted index (semua dokumen, skor > 0)."""
+        from src import vsm_ir
+        from src.vsm_ir import search, tfidf_matrix
+
+        vocab, t2i, TF, DF, lens, avg_len = self.stats
+        TFIDF, idf = tfidf_matrix(TF, DF, len(self.docs), sublinear=scheme == "sublinear")
+        with mock.patch.object(vsm_ir, "preprocess_query", lambda q: q.split()):
+            hits = search(" ".join(stems), TF=TF, DF=DF, lens=lens, avg_len=avg_len,
+                          TFIDF=TFIDF, idf=idf, t2i=t2i, names=self.names,
+                          top_k=len(self.docs), scheme=scheme)
+        scores = np.zeros(len(self.docs))
+        scores[[d for _, _, d in hits]] = [s for _, s, _ in hits]
+        self.assertEqual([s for _, s, _ in hits], sorted((s for _, s, _ in hits), reverse=True))
+        return scores
+
+    def test_term_stats(self):
+        vocab, t2i, TF, DF, lens, avg_len = self.stats
+        self.assertEqual((TF.format, TF.dtype), ("csr", np.float32))
+        for i, doc in enumerate(self.docs):
+            counts = np.bincount([t2i[t] for t in doc.split()], minlength=len(vocab))
+            np.testing.assert_array_equal(TF[i].toarray().ravel(), counts)
+        np.testing.assert_array_equal(DF, (TF.toarray() > 0).sum(axis=0))
+        self.assertEqual(lens.tolist(), [len(d.split()) for d in self.docs])
+        self.assertAlmostEqual(avg_len, float(np.mean(lens)))
+
+    def test_tfidf_rows_have_unit_norm(self):
+        from src.vsm_ir import tfidf_matrix
+
+        _, _, TF, DF, lens, _ = self.stats
+        for sublinear in (False, True):
+            TFIDF, idf = tfidf_matrix(TF, DF, len(self.docs), sublinear=sublinear)
+            self.assertEqual((TFIDF.format, TFIDF.dtype, idf.dtype),
+                             ("csr", np.float32, np.float32))
+            norms = np.sqrt(np.asarray(TFIDF.multiply(TFIDF).sum(axis=1)).ravel())
+            np.testing.assert_allclose(norms[lens > 0], 1.0, rtol=1e-5)
+            self.assertEqual(norms[-1], 0.0)  # dokumen kosong tetap nol, bukan NaN
+            self.assertTrue(np.isfinite(TFIDF.data).all())
+        self.assertEqual(TF.data.dtype, np.float32)  # TF tidak ikut dinormalisasi
+
+    def test_scores_match_dense_baseline_and_inverted_index(self):
+        from src.vsm_ir import build_index
+
+        index = build_index(self.docs, self.names)
+        every = np.arange(len(self.docs))
+        for stems in self.QUERIES:
+            q_ids, q_tf = index.stem_ids(stems)
+            for scheme in SCHEMES:
+                with self.subTest(stems=stems, scheme=scheme):
+                    got = self.csr_scores(stems, scheme)
+                    np.testing.assert_allclose(got, self.dense_scores(stems, scheme),
+                                               rtol=1e-5, atol=1e-6)
+                    np.testing.assert_allclose(got, index.score_docs(q_ids, q_tf, every,
+                                                                     scheme=scheme),
+                                               rtol=1e-5, atol=1e-6)
+
+
+class InMemoryStemCacheMixin:
+    """Stem cache tanpa sqlite, supaya test tidak menulis ke data/cache."""
+
+    @classmethod
+    def setUpClass(cls):
+        import src.stem_cache as stem_cache
+
+        super().setUpClass()
+        cls._saved_cache = stem_cache._cache, stem_cache._cache_pid
+        stem_cache._cache = stem_cache.StemCache(path=None)
+        stem_cache._cache_pid = os.getpid()
+
+    @classmethod
+    def tearDownClass(cls):
+        import src.stem_cache as stem_cache
+
+        stem_cache._cache, stem_cache._cache_pid = cls._saved_cache
+        super().tearDownClass()
+
+
+class FusedNormalizerTest(InMemoryStemCacheMixin, SimpleTestCase):
+    """`iter_tokens` harus identik dengan clean -> tokenize -> remove_stopwords."""
+
+    PIECES = ["Uang", "KULIAH", "dan", "di", "ke", "a", "x", "perpustakaan", "Rp1.000", "2024",
+              "e-mail", "https://kampus.ac.id/ukt?x=1", "http://a.b", "HTTPS://X.Y", "lihat:http",
+              "café", "naïve", "İstanbul", "ß", "—", "«kutip»", "tab\tkata", "baris\nbaru",
+              "nbsp\u00a0spasi", "emoji🙂", "(kurung)", "titik.", "koma,", "!!!", "ukt_bca",
+              "  ", " ", "\r\n", "12abc34", "ABC-def"]
+
+    def old_pipeline(self, text):
+        from src.preprocess import clean, remove_stopwords, tokenize
+
+        return remove_stopwords(tokenize(clean(text)))
+
+    def assert_same(self, text):
+        from src.preprocess import iter_tokens
+
+        self.assertEqual(list(iter_tokens(text)), self.old_pipeline(text), repr(text[:200]))
+
+    def test_random_strings(self):
+        from src import preprocess
+
+        rng = np.random.RandomState(0)
+        texts = []
+        for _ in range(1500):
+            parts = rng.choice(self.PIECES, size=rng.randint(0, 25))
+            seps = rng.choice(["", " ", "\n", ".", "/"], size=len(parts))
+            texts.append("".join(p + sep for p, sep in zip(parts, seps)))
+        for text in texts:
+            self.assert_same(text)
+        # potongan kecil: hampir setiap token / URL melintasi batas potongan
+        for size in (1, 3, 8, 17):
+            with mock.patch.object(preprocess, "_CHUNK_CHARS", size):
+                for text in texts[:300]:
+                    self.assert_same(text)
+
+    def test_token_across_chunk_boundary(self):
+        from src.preprocess import _CHUNK_CHARS, iter_tokens
+
+        pad = "kata " * (_CHUNK_CHARS // 5)                # berakhir tepat sebelum batas 64K
+        for tail in ("perpustakaan umum", "https://kampus.ac.id/" + "x" * 100 + " ukt",
+                     "x" * (_CHUNK_CHARS + 10) + " bank", "Rp1.000,00 (lunas)"):
+            for shift in range(-6, 7, 3):
+                text = pad[:len(pad) + shift] + tail if shift <= 0 else pad + "k" * shift + tail
+                self.assert_same(text)
+        self.assertEqual(list(iter_tokens(pad + "perpustakaan umum"))[-2:],
+                         ["perpustakaan", "umum"])
+
+    def test_preprocess_text_matches_old_pipeline(self):
+        from src.preprocess import preprocess_text, stem
+
+        for text in ["Pembayaran UKT lewat https://bank.ac.id paling lambat tgl. 10!",
+                     "Mahasiswa-mahasiswa MEMBAYAR denda perpustakaan Rp1.000 per hari."]:
+            self.assertEqual(preprocess_text(text), stem(self.old_pipeline(text)))
+
+
+class BooleanQueryTest(InMemoryStemCacheMixin, SimpleTestCase):
+    DOCS = ["ukt bca", "ukt mandiri denda", "ukt denda", "bca mandiri", "ukt mandiri", "wisuda"]
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.index = build_index(cls.DOCS, [f"d{i}" for i in range(len(cls.DOCS))])
+
+    def docs(self, query):
+        from src.boolean_ir import _resolve, evaluate, parse_query
+
+        return evaluate(_resolve(parse_query(query), self.index), self.index).tolist()
+
+    def test_parse_precedence(self):
+        from src.boolean_ir import parse_query
+
+        a, b, c, d = (("TERM", w) for w in "abcd")
+        self.assertEqual(parse_query("a AND (b OR c) NOT d"),
+                         ("AND", [a, ("OR", [b, c]), ("NOT", d)]))
+        self.assertEqual(parse_query("a OR b c"), ("OR", [a, ("AND", [b, c])]))
+        self.assertEqual(parse_query("NOT a OR b"), ("OR", [("NOT", a), b]))
+        self.assertEqual(parse_query("NOT NOT a"), ("NOT", ("NOT", a)))
+
+    def test_parse_malformed(self):
+        from src.boolean_ir import parse_query
+
+        a, b = ("TERM", "a"), ("TERM", "b")
+        self.assertEqual(parse_query("(a OR b"), ("OR", [a, b]))       # kurung tidak ditutup
+        self.assertEqual(parse_query("a OR b)"), ("OR", [a, b]))       # kurung tutup berlebih
+        self.assertEqual(parse_query("a) b"), ("AND", [a, b]))
+        self.assertEqual(parse_query("((a"), a)
+        for bare in ("", "AND", "OR", "NOT", "()", "AND OR NOT", ")("):
+            self.assertIsNone(parse_query(bare), bare)
+        self.assertEqual(parse_query("OR a AND"), a)
+        self.assertEqual(parse_query("a NOT"), a)
+        self.assertEqual(parse_query("a OR OR b"), ("OR", [a, b]))
+
+    def test_evaluate(self):
+        self.assertEqual(self.docs("ukt AND (bca OR mandiri) NOT denda"), [0, 4])
+        self.assertEqual(self.docs("ukt OR bca AND denda"), [0, 1, 2, 4])   # AND > OR
+        self.assertEqual(self.docs("(ukt OR bca) AND denda"), [1, 2])
+        self.assertEqual(self.docs("NOT ukt OR wisuda"), [3, 5])           # NOT > OR
+        self.assertEqual(self.docs("NOT wisuda"), [0, 1, 2, 3, 4])         # NOT = difference
+        self.assertEqual(self.docs("mandiri NOT (ukt AND denda)"), [3, 4])
+        self.assertEqual(self.docs("ukt AND tidakada"), [])
+        self.assertEqual(self.docs("tidakada OR wisuda"), [5])
+
+    def test_search_ranks_and_breaks_ties_by_doc_id(self):
+        from src.boolean_ir import boolean_search
+
+        self.assertEqual([d for _, _, d in boolean_search(self.index, "NOT wisuda", top_k=3)],
+                         [0, 1, 2])
+        hits = boolean_search(self.index, "mandiri AND (ukt OR bca)", top_k=5)
+        self.assertEqual(sorted(d for _, _, d in hits), [1, 3, 4])
+        self.assertEqual([s for _, s, _ in hits], sorted((s for _, s, _ in hits), reverse=True))
+
+    def test_parenthesised_plain_question(self):
+        from src.boolean_ir import is_boolean_query
+        from src.corpus_index import CorpusIndex
+        from src.preprocess import preprocess_text
+        from src.segment_index import Segment
+
+        raw = ["Cara bayar UKT lewat bank BCA.", "Jadwal wisuda diumumkan rektorat.",
+               "Denda perpustakaan dibayar di loket."]
+        docs = [" ".join(preprocess_text(r)) for r in raw]
+        names = [f"d{i}" for i in range(len(raw))]
+        corpus = CorpusIndex([Segment.build(0, docs, names, raw)])
+        for query in ("bagaimana cara bayar ukt (uang kuliah tunggal)?", "(ukt)", "ukt ()"):
+            self.assertFalse(is_boolean_query(query), query)
+            for scheme in SCHEMES:
+                self.assertEqual([d for _, _, d in corpus.search(query, k=3, scheme=scheme)][:1],
+                                 [0], (query, scheme))
+        self.assertTrue(is_boolean_query("ukt AND (bca OR mandiri)"))
+        self.assertFalse(is_boolean_query("ukt and bca or mandiri"))  # operator harus kapital
+
+
+class PhraseQueryTest(InMemoryStemCacheMixin, SimpleTestCase):
+    def test_phrase_spans_stopword(self):
+        from src.phrase_ir import parse_phrases, phrase_candidates
+        from src.preprocess import preprocess_text
+
+        raw = ["Cicilan uang untuk gedung dibayar per semester.",
+               "Uang gedung bisa dicicil.",
+               "Gedung baru, uang kuliah naik.",          # urutan terbalik
+               "Uang kuliah dan gedung dibayar terpisah."]  # tidak berdampingan
+        index = build_index([" ".join(preprocess_text(r)) for r in raw],
+                            [f"d{i}" for i in range(len(raw))])
+        for query in ('"uang untuk gedung"', '"uang gedung"', '"Uang, gedung!"'):
+            self.assertEqual(phrase_candidates(index, parse_phrases(query)).tolist(), [0, 1],
+                             query)
+        self.assertEqual(phrase_candidates(index, parse_phrases('"uang kuliah" "gedung"'))
+                         .tolist(), [2, 3])
+
+    def test_phrase_across_block_boundary(self):
+        from src.phrase_ir import phrase_docs
+
+        # 400 dokumen memuat "uang" dan "gedung" (4 blok posting); hanya
+        # sebagian yang berdampingan, termasuk di sekitar batas blok 128/256
+        pattern = ["isi uang gedung", "gedung uang isi", "uang isi gedung", "isi isi uang gedung"]
+        docs = [pattern[(i * 7) % 4 if i not in (127, 128, 255, 256) else 0] for i in range(400)]
+        index = build_index(docs, [f"d{i}" for i in range(400)])
+        ids = [index.term_id("uang"), index.term_id("gedung")]
+        expected = [i for i, d in enumerate(docs) if "uang gedung" in d]
+        self.assertEqual(phrase_docs(index, ids).tolist(), expected)
+        cands = np.array([0, 1, 127, 128, 129, 255, 256, 399])
+        self.assertEqual(phrase_docs(index, ids, cands).tolist(),
+                         [c for c in cands.tolist() if c in expected])
+        self.assertEqual(phrase_docs(index, ids[::-1]).tolist(),
+                         [i for i, d in enumerate(docs) if "gedung uang" in d])
+
+    def test_min_span(self):
+        from src.phrase_ir import min_span
+
+        self.assertEqual(min_span([np.array([0, 10]), np.array([5]), np.array([11])]), 7)
+        self.assertEqual(min_span([np.array([3]), np.array([4])]), 2)
+        self.assertEqual(min_span([np.array([1, 9]), np.array([20, 2])]), 2)
+
+    def test_proximity_boost_ordering(self):
+        from src.corpus_index import CorpusIndex
+        from src.phrase_ir import proximity_boost
+        from src.segment_index import Segment
+
+        # bag-of-words identik (skor sama), hanya jarak term query yang beda
+        docs = ["uang buku kartu rak meja gedung",
+                "uang gedung buku kartu rak meja",
+                "uang buku gedung kartu rak meja"]
+        names = [f"d{i}" for i in range(len(docs))]
+        corpus = CorpusIndex([Segment.build(0, docs, names, docs)])
+        index = corpus.segments[0].index
+        q_ids, q_tf = index.stem_ids(["uang", "gedung"])
+        for scheme in SCHEMES:
+            _, scores = index.top_k(q_ids, q_tf, k=3, scheme=scheme)
+            self.assertAlmostEqual(scores[0], scores[-1])
+
+        boost = proximity_boost(index, q_ids, [0, 1, 2])
+        self.assertGreater(boost[1], boost[2])
+        self.assertGreater(boost[2], boost[0])
+        for scheme in SCHEMES:
+            ranked = functools.partial(corpus.search, k=3, scheme=scheme)
+            self.assertEqual([d for _, _, d in ranked("uang gedung", proximity=True)],
+                             [1, 2, 0], scheme)
+            self.assertEqual([d for _, _, d in ranked('"uang" gedung')], [1, 2, 0], scheme)
+            self.assertEqual([d for _, _, d in corpus.search_batch(
+                ["uang gedung"], k=3, scheme=scheme, proximity=True)[0]], [1, 2, 0], scheme)
+
+    def test_plain_query_skips_proximity(self):
+        from src.corpus_index import CorpusIndex
+        from src.segment_index import Segment
+        from src.vsm_ir import InvertedIndex
+
+        docs = ["uang buku kartu rak meja gedung",
+                "uang gedung buku kartu rak meja",
+                "uang buku gedung kartu rak meja"] + ["buku rak"] * 30
+        names = [f"d{i}" for i in range(len(docs))]
+        corpus = CorpusIndex([Segment.build(0, docs, names, docs)])
+        with mock.patch.object(InvertedIndex, "positions",
+                               side_effect=AssertionError("posisi di-decode")), \
+                mock.patch.object(InvertedIndex, "top_k", autospec=True,
+                                  side_effect=InvertedIndex.top_k) as top_k:
+            for scheme in SCHEMES:
+                plain = [d for _, _, d in corpus.search("uang gedung", k=2, scheme=scheme)]
+                self.assertEqual(plain, [0, 1])  # seri bag-of-words -> doc-id, tanpa boost
+                self.assertEqual(top_k.call_args.kwargs["k"], 2)  # pool tidak diperbesar
+                batch = corpus.search_batch(["uang gedung"], k=2, scheme=scheme)
+                self.assertEqual([d for _, _, d in batch[0]], plain)
+
+
+class SentenceTableTest(InMemoryStemCacheMixin, SimpleTestCase):
+    RAW = ["Perpustakaan buka setiap hari kerja sampai sore.",
+           "Pembayaran UKT dilakukan lewat bank BCA. Jadwal wisuda diumumkan oleh rektorat "
+           "kampus. Info lengkap: https://bank.kampus.ac.id/ukt ada di portal akademik.\n"
+           "Mahasiswa membayar UKT, uang gedung dan denda di bank! Singkat."]
+
+    @classmethod
+    def setUpClass(cls):
+        from src.corpus_index import CorpusIndex
+        from src.preprocess import preprocess_text
+        from src.segment_index import Segment
+
+        super().setUpClass()
+        docs = [" ".join(preprocess_text(r)) for r in cls.RAW]
+        cls.corpus = CorpusIndex([Segment.build(0, docs, ["a.txt", "b.txt"], cls.RAW)])
+
+    def pick(self, query, doc=1, n=5):
+        terms = self.corpus.query_terms(query)
+        return [(score, int(sid)) for score, sid in self.corpus.top_sentences(doc, terms, n=n)]
+
+    def test_sentence_spans(self):
+        table = self.corpus.segments[0].sentences
+        self.assertEqual(table.doc_sent_ptr.tolist(), [0, 1, 5])  # "Singkat." terlalu pendek
+        self.assertEqual(table.text(self.RAW[1], 4),
+                         "Mahasiswa membayar UKT, uang gedung dan denda di bank!")
+
+    def test_top_sentences(self):
+        # seri -> kalimat lebih awal; kalimat URL (bank/ukt hanya di URL) bernilai 0
+        self.assertEqual(self.pick("bagaimana bayar ukt di bank?"), [(3, 1), (3, 4)])
+        self.assertEqual(self.pick("bagaimana bayar ukt di bank?", n=1), [(3, 1)])
+        self.assertEqual(self.pick("uang gedung denda bank"), [(4, 4), (1, 1)])
+        self.assertEqual(self.pick("wisuda"), [(1, 2)])
+        self.assertEqual(self.pick("beasiswa"), [])             # skor 0 tidak pernah dipilih
+        self.assertEqual(self.pick("bank NOT ukt"), [(1, 1), (1, 4)])
+        self.assertEqual(self.pick("buka perpustakaan", doc=0), [(2, 0)])
+        self.assertEqual(self.pick("bank", doc=0), [])
+
+    def test_snippet_highlights_matched_tokens(self):
+        terms = self.corpus.query_terms("bayar ukt di bank")
+        self.assertEqual(self.corpus.snippet(1, 1, terms),
+                         "**Pembayaran** **UKT** dilakukan lewat **bank** BCA.")
+        self.assertEqual(self.corpus.snippet(1, 4, terms),
+                         "Mahasiswa **membayar** **UKT**, uang gedung dan denda di **bank**!")
+        self.assertEqual(self.corpus.snippet(1, 3, terms),  # URL tidak ditandai
+                         "Info lengkap: https://bank.kampus.ac.id/ukt ada di portal akademik.")
+        self.assertEqual(self.corpus.snippet(1, 2, terms),
+                         "Jadwal wisuda diumumkan oleh rektorat kampus.")
+        seg = self.corpus.segments[0]
+        q_ids = self.corpus._term_ids(seg, self.corpus.query_terms("perpustakaan"))
+        self.assertEqual(seg.sentences.snippet(self.RAW[0], 0, q_ids, mark=("<b>", "</b>")),
+                         "<b>Perpustakaan</b> buka setiap hari kerja sampai sore.")
+
+
+class IndexStoreTest(InMemoryStemCacheMixin, SimpleTestCase):
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.idx = Path(tmp.name)
+        self.next_id = 1
+
+    def test_file_roundtrip(self):
+        from src.index_store import _ALIGN, MappedIndexFile, write_index_file
+        from src.vsm_ir import StringTable
+
+        names = StringTable.from_strings(["uang", "gedung", "", "ulasan ü"])
+        sections = {"u8": np.arange(7, dtype=np.uint8),
+                    "i64": np.array([-1, 0, 2 ** 62], dtype=np.int64),
+                    "f32": np.linspace(0, 1, 5, dtype=np.float32),
+                    "kosong": np.zeros(0, dtype=np.int32),
+                    "names_buf": names.buf, "names_off": names.off}
+        path = self.idx / "x.bin"
+        write_index_file(path, sections, file_id=42, meta={"N": 3, "nama": "uji"})
+        f = MappedIndexFile(path)
+        self.assertEqual((f.file_id, f.meta), (42, {"N": 3, "nama": "uji"}))
+        self.assertEqual(f.sections.keys(), sections.keys())
+        for name, a in sections.items():
+            got = f.sections[name]
+            self.assertEqual(got.dtype, a.dtype, name)
+            np.testing.assert_array_equal(got, a)
+            self.assertFalse(got.flags.writeable)       # view read-only di atas mmap
+            self.assertEqual(got.ctypes.data % _ALIGN, 0, name)
+        self.assertEqual(list(StringTable(f.sections["names_buf"], f.sections["names_off"])),
+                         ["uang", "gedung", "", "ulasan ü"])
+        self.assertEqual(list(self.idx.iterdir()), [path])  # tidak ada sisa .tmp
+
+        data = path.read_bytes()
+        for bad in (b"BUKANIDX" + data[8:], data[:5], b""):  # magic salah / terpotong / kosong
+            path.write_bytes(bad)
+            with self.assertRaises(ValueError):
+                MappedIndexFile(path)
+
+    def test_segment_roundtrip(self):
+        from src.segment_index import Segment
+
+        raw = ["Uang kuliah dibayar lewat bank setiap semester.",
+               "Denda perpustakaan dibayar saat buku dikembalikan."]
+        docs, names = synthetic_corpus(200, seed=3)
+        seg = Segment.build(7, docs + ["uang kuliah bank", "denda buku"], names + ["a", "b"],
+                            [""] * 200 + raw)
+        entry = self.write_segment(seg)
+        opened = Segment.open(7, self.idx / entry["file"])
+        expected, got = seg.to_sections(), opened.to_sections()
+        self.assertEqual(got.keys(), expected.keys())
+        for name in expected:
+            np.testing.assert_array_equal(got[name], np.asarray(expected[name]), name)
+        self.assertEqual(opened.index.names[200:], ["a", "b"])
+        self.assertEqual(opened.raw[201], raw[1])
+        q_ids, q_tf = opened.index.stem_ids(["uang", "bank"])
+        for scheme in SCHEMES:
+            np.testing.assert_array_equal(opened.index.top_k(q_ids, q_tf, k=5, scheme=scheme)[0],
+                                          seg.index.top_k(q_ids, q_tf, k=5, scheme=scheme)[0])
+
+    def write_segment(self, seg):
+        from src.segment_index import _write_segment
+
+        return _write_segment(seg, self.idx)
+
+    def publish(self, docs):
+        """Publikasikan generasi baru berisi satu segmen `docs`; return nama file segmennya."""
+        from src.index_store import load_manifest, publish_manifest
+        from src.segment_index import GlobalStats, Segment, _write_stats
+
+        names = [f"d{i}.txt" for i in range(len(docs))]
+        seg = Segment.build(self.next_id, docs, names, docs)
+        entry = self.write_segment(seg)
+        manifest = load_manifest(self.idx) or {"docs": {}}
+        manifest.update(segments=[entry], next_id=self.next_id + 2,
+                        stats=_write_stats(GlobalStats.of_segment(seg), self.next_id + 1, self.idx))
+        self.next_id += 2
+        publish_manifest(manifest, self.idx)
+        return entry["file"]
+
+    def test_get_index_follows_current(self):
+        from src import corpus_index
+        from src.index_store import current_path, current_stamp
+
+        with mock.patch.multiple(corpus_index, _index=None, _published=(None, None),
+                                 current_path=functools.partial(current_path, self.idx),
+                                 current_stamp=functools.partial(current_stamp, self.idx)):
+            self.publish(["uang kuliah bank", "jadwal wisuda"])
+            first = corpus_index.get_index()
+            self.assertEqual(first.version[0], "mmap")
+            self.assertIs(corpus_index.get_index(), first)  # CURRENT tetap: objek sama
+            self.assertEqual([n for n, _, _ in first.search("wisuda")], ["d1.txt"])
+
+            self.publish(["denda buku", "uang kuliah", "wisuda sarjana"])
+            second = corpus_index.get_index()
+            self.assertIsNot(second, first)
+            self.assertEqual(second.N, 3)
+            self.assertEqual([n for n, _, _ in second.search("wisuda")], ["d2.txt"])
+            self.assertEqual([n for n, _, _ in first.search("wisuda")], ["d1.txt"])  # snapshot lama
+
+    def test_gc_keeps_two_previous_generations(self):
+        from src.corpus_index import CorpusIndex
+        from src.index_store import KEEP_GENERATIONS, current_path
+
+        self.assertEqual(KEEP_GENERATIONS, 2)
+        files, readers, words = [], [], ["buku", "kartu", "denda", "jurnal", "katalog"]
+        for word in words:
+            files.append(self.publish([f"uang kuliah {word}", "jadwal wisuda"]))
+            readers.append(CorpusIndex.open(current_path(self.idx)))
+        manifests = sorted(p.name for p in self.idx.glob("manifest-*.json"))
+        self.assertEqual(manifests, [f"manifest-{g:08d}.json" for g in (3, 4, 5)])
+        segs = sorted(p.name for p in self.idx.glob("seg-*.bin"))
+        self.assertEqual(segs, sorted(files[2:]))
+        self.assertEqual(len(list(self.idx.glob("stats-*.bin"))), 3)
+        self.assertFalse(list(self.idx.glob("*.tmp")))
+        # pembaca yang tertinggal dua generasi masih bisa membuka generasinya
+        lagging = CorpusIndex.open(self.idx / manifests[0])
+        self.assertEqual([n for n, _, _ in lagging.search(words[2])], ["d0.txt"])
+        self.assertEqual([n for n, _, _ in readers[0].search(words[0])], ["d0.txt"])  # mmap lama
+
+
+class TokenCorpusTest(InMemoryStemCacheMixin, SimpleTestCase):
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.docs, self.proc = Path(tmp.name) / "docs", Path(tmp.name) / "processed"
+        self.docs.mkdir()
+        self.proc.mkdir()
+
+    def preprocess(self, **docs):
+        from src.preprocess import preprocess_files
+
+        for name, text in docs.items():
+            (self.docs / f"{name}.txt").write_text(text, encoding="utf-8")
+        return preprocess_files([self.docs / f"{n}.txt" for n in docs], self.proc, workers=1)
+
+    def assert_corpus_matches_txt(self):
+        from src.preprocess import processed_names
+        from src.token_corpus import TokenCorpus
+
+        corpus = TokenCorpus.open(self.proc)
+        self.assertEqual(corpus.names, processed_names(self.proc))
+        for i, name in enumerate(corpus.names):
+            self.assertEqual(corpus[i], (self.proc / name).read_text(encoding="utf-8"), name)
+        return corpus
+
+    def build(self):
+        from src import corpus_index
+        from src.vsm_ir import load_raw
+
+        with mock.patch.multiple(corpus_index, PROC_DIR=self.proc,
+                                 load_raw=functools.partial(load_raw, docs_dir=self.docs)):
+            return corpus_index.CorpusIndex.build()
+
+    def test_vocab_ids_stable_and_append_only(self):
+        from src.preprocess import remove_processed
+        from src.token_corpus import load_vocab
+
+        self.preprocess(a="Uang kuliah dibayar lewat bank.", b="Jadwal wisuda sarjana.")
+        first = load_vocab(self.proc)
+        ids_a = self.assert_corpus_matches_txt().doc_ids(0).tolist()
+
+        self.preprocess(b="Denda perpustakaan dan jadwal ujian.", c="Beasiswa bank daerah.")
+        second = load_vocab(self.proc)
+        self.assertEqual(second[:len(first)], first)          # id lama tidak berubah
+        self.assertEqual(len(set(second)), len(second))
+        self.assertTrue({"denda", "pustaka", "uji", "beasiswa"} <= set(second[len(first):]))
+        corpus = self.assert_corpus_matches_txt()
+        self.assertEqual(corpus.doc_ids(corpus.position("a.txt")).tolist(), ids_a)
+
+        (self.docs / "b.txt").unlink()                       # dokumen hilang: vocab tetap
+        remove_processed(["b.txt"], self.proc)
+        self.assertEqual(load_vocab(self.proc), second)
+        self.assertEqual(self.assert_corpus_matches_txt().names, ["a.txt", "c.txt"])
+
+    def test_fallback_when_corpus_out_of_sync(self):
+        from src.token_corpus import CORPUS_NAME, VOCAB_NAME, TokenCorpus, update_corpus
+
+        self.preprocess(a="Uang kuliah dibayar lewat bank.", b="Jadwal wisuda sarjana.")
+        # .txt ditulis di luar preprocess_files (mis. versi lama): corpus_ids.bin tertinggal
+        (self.proc / "c.txt").write_text("denda buku", encoding="utf-8")
+        (self.docs / "c.txt").write_text("Denda buku.", encoding="utf-8")
+        self.assertEqual(TokenCorpus.open(self.proc).names, ["a.txt", "b.txt"])
+        index = self.build()
+        self.assertEqual(list(index.segments[0].index.names), ["a.txt", "b.txt", "c.txt"])
+        self.assertEqual([n for n, _, _ in index.search("denda")], ["c.txt"])
+
+        # update berikutnya menokenisasi dokumen tanpa id langsung dari .txt
+        update_corpus(self.proc, {}, ["a.txt", "b.txt", "c.txt"])
+        self.assert_corpus_matches_txt()
+
+        # vocab.lst lebih pendek dari yang dirujuk corpus_ids.bin -> korpus tidak dipakai
+        vocab = (self.proc / VOCAB_NAME).read_text(encoding="utf-8").split("\n")
+        (self.proc / VOCAB_NAME).write_text("\n".join(vocab[:2]) + "\n", encoding="utf-8")
+        self.assertIsNone(TokenCorpus.open(self.proc))
+        self.assertEqual(list(self.build().segments[0].index.names), ["a.txt", "b.txt", "c.txt"])
+        (self.proc / CORPUS_NAME).write_bytes(b"rusak")
+        self.assertIsNone(TokenCorpus.open(self.proc))
+
+    def test_bincount_build_matches_txt_build(self):
+        from src.token_corpus import CORPUS_NAME, TokenCorpus
+        from src.vsm_ir import load_processed, tokenize_corpus
+
+        self.preprocess(a="Uang kuliah dan uang gedung dibayar lewat bank BCA.",
+                        b="Jadwal wisuda sarjana diumumkan rektorat.",
+                        c="Denda perpustakaan dibayar di bank, bukan lewat rektorat.",
+                        d="")
+        self.preprocess(b="Jadwal wisuda pascasarjana diundur.")  # vocab tidak lagi terurut
+        term_ids, lens, vocab = TokenCorpus.open(self.proc).index_terms()
+        docs, _ = load_processed(self.proc)
+        exp_vocab, _, exp_ids, exp_lens = tokenize_corpus(docs)
+        self.assertEqual(vocab, exp_vocab)
+        np.testing.assert_array_equal(term_ids, exp_ids)
+        np.testing.assert_array_equal(lens, exp_lens)
+
+        from_ids = self.build().segments[0].to_sections()
+        (self.proc / CORPUS_NAME).unlink()
+        from_txt = self.build().segments[0].to_sections()
+        self.assertEqual(from_ids.keys(), from_txt.keys())
+        for name in from_txt:
+            np.testing.assert_array_equal(from_ids[name], from_txt[name], name)
+
+
+class SegmentUpdateTest(InMemoryStemCacheMixin, SimpleTestCase):
+    QUERIES = ["uang kuliah", "jadwal wisuda sarjana", "denda perpustakaan",
+               '"uang gedung"', "ukt AND denda", "beasiswa OR wisuda NOT jadwal"]
+
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.tmp = Path(tmp.name)
+        self.docs, self.proc, self.idx = (self.tmp / n for n in ("docs", "processed", "index"))
+        self.docs.mkdir()
+        self.proc.mkdir()
+
+    def write(self, **docs):
+        for name, text in docs.items():
+            (self.docs / f"{name}.txt").write_text(text, encoding="utf-8")
+
+    def fresh_results(self):
+        """Hasil `CorpusIndex.build` dari nol atas isi `docs` saat ini."""
+        from src import corpus_index
+        from src.preprocess import preprocess_files
+        from src.vsm_ir import load_raw
+
+        proc = self.tmp / f"fresh-{len(list(self.tmp.iterdir()))}"
+        proc.mkdir()
+        preprocess_files(sorted(self.docs.glob("*.txt")), proc)
+        with mock.patch.multiple(corpus_index, PROC_DIR=proc,
+                                 load_raw=functools.partial(load_raw, docs_dir=self.docs)):
+            return self.results(corpus_index.CorpusIndex.build())
+
+    def results(self, index):
+        # doc-id global berbeda antar-layout; bandingkan {nama: skor}
+        return {(q, scheme): {name: round(score, 5)
+                              for name, score, _ in index.search(q, k=50, scheme=scheme)}
+                for q in self.QUERIES for scheme in SCHEMES}
+
+    def assert_matches_fresh_build(self):
+        from src.corpus_index import CorpusIndex
+        from src.index_store import current_path
+
+        got = self.results(CorpusIndex.open(current_path(self.idx)))
+        for key, expected in self.fresh_results().items():
+            self.assertEqual(got[key].keys(), expected.keys(), key)
+            for name, score in expected.items():
+                self.assertAlmostEqual(got[key][name], score, places=4, msg=(key, name))
+
+    def assert_processed_removed(self, *names):
+        """Hasil preprocess dokumen yang hilang ikut dihapus (tidak kembali saat build penuh)."""
+        from src import corpus_index
+        from src.preprocess import load_manifest, processed_names
+        from src.token_corpus import TokenCorpus
+        from src.vsm_ir import load_raw
+
+        for name in names:
+            self.assertFalse((self.proc / name).exists(), name)
+            self.assertNotIn(name, load_manifest(self.proc))
+        self.assertEqual(TokenCorpus.open(self.proc).names, processed_names(self.proc))
+        with mock.patch.multiple(corpus_index, PROC_DIR=self.proc,
+                                 load_raw=functools.partial(load_raw, docs_dir=self.docs)):
+            rebuilt = corpus_index.CorpusIndex.build()
+        self.assertEqual(sorted(rebuilt.segments[0].index.names),
+                         sorted(p.name for p in self.docs.glob("*.txt")))
+
+    def test_writers_serialized_across_processes(self):
+        import multiprocessing
+        import time
+
+        from src import segment_index, stem_cache
+        from src.index_store import current_path, index_lock, load_manifest
+
+        self.write(a="Pembayaran uang kuliah melalui bank.")
+        in_memory = functools.partial(stem_cache.StemCache, path=None)
+        with mock.patch.object(stem_cache, "StemCache", in_memory):
+            with index_lock(self.idx):  # mis. worker lain sedang merge
+                child = multiprocessing.get_context("fork").Process(
+                    target=segment_index.update_index, args=(self.docs, self.proc, self.idx))
+                child.start()
+                time.sleep(0.5)
+                self.assertTrue(child.is_alive())
+                self.assertIsNone(current_path(self.idx))
+            child.join(timeout=60)
+        self.assertEqual(child.exitcode, 0)
+        self.assertEqual(list(load_manifest(self.idx)["docs"]), ["a.txt"])
+
+    def test_update_and_merge_match_fresh_build(self):
+        from src import segment_index
+        from src.index_store import load_manifest
+
+        update = functools.partial(segment_index.update_index, self.docs, self.proc, self.idx)
+        self.write(a="Pembayaran uang kuliah dan uang gedung melalui bank.",
+                   b="Denda perpustakaan dibayar saat mengembalikan buku.",
+                   c="Jadwal wisuda sarjana diumumkan bulan depan.",
+                   d="Mahasiswa penerima beasiswa dibebaskan dari ukt dan denda.")
+        self.assertIsNotNone(update())
+        self.assert_matches_fresh_build()
+
+        self.write(a="Uang kuliah dicicil; uang gedung dibayar sekali.",
+                   e="Wisuda sarjana dan pascasarjana digelar di gedung utama.")
+        self.assertIsNotNone(update())
+        self.assert_matches_fresh_build()
+
+        (self.docs / "b.txt").unlink()
+        (self.docs / "c.txt").unlink()
+        self.assertIsNotNone(update())
+        self.assert_matches_fresh_build()
+        self.assert_processed_removed("b.txt", "c.txt")
+        self.assertIsNone(update())  # tidak ada perubahan
+
+        self.write(f="Denda ukt dikenakan bila uang kuliah terlambat dibayar.")
+        self.assertIsNotNone(update())
+        self.assertEqual(len(load_manifest(self.idx)["segments"]), 3)
+        self.assert_matches_fresh_build()
+
+        with mock.patch.object(segment_index, "MERGE_FACTOR", 2):
+            merges = 0
+            while segment_index.merge_once(self.idx) is not None:
+                merges += 1
+                self.assert_matches_fresh_build()
+        self.assertGreater(merges, 0)
+        manifest = load_manifest(self.idx)
+        self.assertLess(len(manifest["segments"]), 3)
+        self.assertEqual(sorted(manifest["docs"]), ["a.txt", "d.txt", "e.txt", "f.txt"])
+
+
+def _check_child_cache(parent_cache):
+    from src import stem_cache
+
+    cache = stem_cache.get_stem_cache()  # lock induk terkunci: tidak boleh menunggu
+    if cache is parent_cache or stem_cache._cache_pid != os.getpid():
+        raise SystemExit(1)
+
+
+class StemCacheForkTest(InMemoryStemCacheMixin, SimpleTestCase):
+    def test_forked_child_gets_its_own_cache(self):
+        import multiprocessing
+
+        from src import stem_cache
+
+        parent = stem_cache.get_stem_cache()
+        in_memory = functools.partial(stem_cache.StemCache, path=None)
+        # lock dipegang saat fork, mis. thread lain sedang membuat cache
+        with mock.patch.object(stem_cache, "StemCache", in_memory), stem_cache._cache_lock:
+            child = multiprocessing.get_context("fork").Process(
+                target=_check_child_cache, args=(parent,))
+            child.start()
+            child.join(timeout=60)
+        if child.is_alive():
+            child.kill()
+            self.fail("anak fork menunggu lock cache stem milik induk")
+        self.assertEqual(child.exitcode, 0)
+        self.assertIs(stem_cache.get_stem_cache(), parent)
+
+
+class ParallelPreprocessTest(InMemoryStemCacheMixin, SimpleTestCase):
+    TEXTS = ["Pembayaran UKT lewat Bank BCA paling lambat tanggal 10.",
+             "Denda keterlambatan pengembalian buku perpustakaan Rp1.000 per hari.",
+             "Jadwal wisuda sarjana dan pascasarjana diumumkan di https://kampus.ac.id.",
+             "Mahasiswa penerima beasiswa dibebaskan dari pembayaran uang gedung.",
+             "Kartu anggota perpustakaan berlaku selama masa studi.",
+             "Pengajuan cuti akademik dilakukan sebelum perkuliahan dimulai."]
+
+    def test_parallel_matches_serial(self):
+        from src.preprocess import preprocess_files
+
+        with tempfile.TemporaryDirectory() as tmp:
+            tmp = Path(tmp)
+            docs = tmp / "docs"
+            docs.mkdir()
+            paths = []
+            for i, text in enumerate(self.TEXTS):
+                paths.append(docs / f"d{i}.txt")
+                paths[-1].write_text(text * (i + 1), encoding="utf-8")
+            out = {}
+            # worker hasil spawn membuka cache stem sendiri: jangan di data/cache
+            with mock.patch.dict(os.environ, STEM_CACHE_PATH=str(tmp / "stems.sqlite")):
+                for workers in (1, 3):
+                    proc = tmp / f"proc{workers}"
+                    proc.mkdir()
+                    stats = preprocess_files(paths, proc, workers=workers, chunk_size=2)
+                    out[workers] = (stats, {p.name: p.read_bytes()
+                                            for p in sorted(proc.iterdir())})
+            self.assertEqual(sorted(out[1][0]), [p.name for p in paths])
+            self.assertEqual(out[3][0], out[1][0])
+            self.assertEqual(out[3][1].keys(), out[1][1].keys())
+            for name, data in out[1][1].items():
+                self.assertEqual(out[3][1][name], data, name)
+
+
+class BatchApiTest(SimpleTestCase):
+    def setUp(self):
+        patcher = mock.patch("ragapp.views.rag_batch",
+                             side_effect=lambda qs, **kw: [{"question": q} for q in qs])
+        self.rag_batch = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def post(self, body):
+        import json
+
+        if not isinstance(body, str):
+            body = json.dumps(body)
+        return self.client.post("/api/batch/", body, content_type="application/json")
+
+    def assert_rejected(self, body):
+        res = self.post(body)
+        self.assertEqual(res.status_code, 400, body)
+        self.assertEqual(res.json()["status"], "error")
+        self.rag_batch.assert_not_called()
+
+    def test_rejects_invalid_bodies(self):
+        self.assertEqual(self.client.get("/api/batch/").status_code, 405)
+        for body in ("{", "", "[]", '"teks"', "null", "3",
+                     [{"questions": ["a"]}], {}, {"questions": []}, {"questions": "ukt"},
+                     {"questions": ["ukt", 3]}, {"questions": ["ukt"], "scheme": "tfidf"}):
+            self.assert_rejected(body)
+
+    def test_k_must_be_int_in_range(self):
+        for k in (0, MAX_K + 1, -1, True, False, 3.0, "3", None, [3]):
+            self.assert_rejected({"questions": ["ukt"], "k": k})
+        for k in (1, MAX_K):
+            self.assertEqual(self.post({"questions": ["ukt"], "k": k}).status_code, 200)
+            self.assertEqual(self.rag_batch.call_args.kwargs["k"], k)
+
+    def test_batch_size_limit(self):
+        self.assert_rejected({"questions": ["ukt"] * (MAX_BATCH + 1)})
+        res = self.post({"questions": [f"q{i}" for i in range(MAX_BATCH)], "scheme": "bm25",
+                         "answer": False})
+        self.assertEqual(res.status_code, 200)
+        self.assertEqual(len(res.json()["results"]), MAX_BATCH)
+        self.rag_batch.assert_called_once()
+        self.assertEqual(self.rag_batch.call_args.kwargs,
+                         {"k": 3, "scheme": "bm25", "with_answer": False})
+
+
+class BatchSearchTest(InMemoryStemCacheMixin, SimpleTestCase):
+    """`search_batch` (satu perkalian matriks) = `search` berulang (inverted index)."""
+
+    QUERIES = ["buku", "beasiswa ukt bayar", "jadwal ujian nilai dosen", "denda denda kartu",
+               "wisuda skripsi jurnal katalog bank", "tidakada", "", "buku tidakada",
+               '"kartu anggota"', "ukt AND bank"]
+
+    def test_batch_matches_single_queries(self):
+        from src.corpus_index import CorpusIndex
+        from src.segment_index import Segment
+
+        docs, names = synthetic_corpus(400, seed=1)
+        corpus = CorpusIndex([Segment.build(0, docs, names, docs)])
+        for scheme in SCHEMES:
+            for proximity in (False, True):
+                batch = corpus.search_batch(self.QUERIES, k=7, scheme=scheme,
+                                            proximity=proximity)
+                self.assertEqual(len(batch), len(self.QUERIES))
+                for query, got in zip(self.QUERIES, batch):
+                    with self.subTest(scheme=scheme, proximity=proximity, query=query):
+                        single = corpus.search(query, k=7, scheme=scheme, proximity=proximity)
+                        self.assertEqual([(n, d) for n, _, d in got],
+                                         [(n, d) for n, _, d in single])
+                        np.testing.assert_allclose([s for _, s, _ in got],
+                                                   [s for _, s, _ in single], rtol=1e-5)
+
+
+class RagPipelineCacheTest(InMemoryStemCacheMixin, SimpleTestCase):
+    def corpus(self, docs, version):
+        from src.corpus_index import CorpusIndex
+        from src.segment_index import Segment
+
+        names = [f"d{i}.txt" for i in range(len(docs))]
+        return CorpusIndex([Segment.build(0, docs, names, docs)], version=version)
+
+    def test_cache_hit_until_index_changes(self):
+        from ragapp import rag_engine
+        from src.answer_cache import AnswerCache
+
+        old = self.corpus(["uang kuliah dibayar bank", "jadwal wisuda"], ("build", 1))
+        new = self.corpus(["jadwal wisuda", "denda uang kuliah"], ("build", 2))
+        current = {"index": old}
+        with mock.patch.object(rag_engine, "answer_cache", AnswerCache()), \
+                mock.patch.object(rag_engine, "get_index", lambda: current["index"]), \
+                mock.patch.object(rag_engine, "_rag_pipeline",
+                                  wraps=rag_engine._rag_pipeline) as compute:
+            first = rag_engine.rag_pipeline("Uang kuliah?")
+            self.assertEqual(first[1][0]["title"], "d0.txt")
+            self.assertEqual(rag_engine.rag_pipeline("uang  KULIAH"), first)  # hit
+            self.assertEqual(compute.call_count, 1)
+            self.assertIs(compute.call_args.kwargs["index"], old)
+
+            current["index"] = new                                           # update berita
+            second = rag_engine.rag_pipeline("uang kuliah")
+            self.assertEqual(compute.call_count, 2)                           # miss
+            self.assertIs(compute.call_args.kwargs["index"], new)
+            self.assertEqual(second[1][0]["title"], "d1.txt")
+            self.assertEqual(rag_engine.rag_pipeline("uang kuliah"), second)
+            self.assertEqual(compute.call_count, 2)
+
+    def test_key_and_answer_use_one_index(self):
+        from ragapp import rag_engine
+        from src.answer_cache import AnswerCache
+
+        # indeks berganti tepat setelah kunci dibuat (update di thread lain)
+        indexes = iter([self.corpus(["uang kuliah"], ("build", 1)),
+                        self.corpus(["jadwal wisuda"], ("build", 2))])
+        cache = AnswerCache()
+        with mock.patch.object(rag_engine, "answer_cache", cache), \
+                mock.patch.object(rag_engine, "get_index", lambda: next(indexes)):
+            _, citations = rag_engine.rag_pipeline("uang kuliah")
+        self.assertEqual([c["title"] for c in citations], ["d0.txt"])
@@ -3,4 +3,5 @@ from . import views
 
 urlpatterns = [
     path("", views.index, name="index"),
+    path("api/batch/", views.batch_api, name="batch_api"),
 ]
\ No newline at end of file
@@ -1,6 +1,10 @@
+import json
+
 from django.shortcuts import render, redirect
 from django.contrib import messages
-from .rag_engine import rag_pipeline
+from django.http import JsonResponse
+from django.views.decorators.csrf import csrf_exempt
+from .rag_engine import rag_pipeline, rag_batch
 from .scrape import scrape_news, run_preprocess
 
 def index(request):
@@ -62,3 +66,40 @@ def index(request):
         "citations": citation_text,
         "question": question
     })
+
+
+MAX_BATCH = 1000
+MAX_K = 50
+
+
+@csrf_exempt
+def batch_api(request):
+    """
+    POST JSON {"questions": [...], "k": 3, "scheme": "normal", "answer": true}
+    -> {"status": "success", "results": [{question, citations, answer}, ...]}.
+    Semua pertanyaan diskor dalam satu perkalian matriks sparse.
+    """
+    if request.method != "POST":
+        return JsonResponse({"status": "error", "msg": "Hanya POST yang diterima."}, status=405)
+    try:
+        data = json.loads(request.body)
+    except ValueError:
+        return JsonResponse({"status": "error", "msg": "Body harus JSON."}, status=400)
+    if not isinstance(data, dict):
+        return JsonResponse({"status": "error", "msg": "Body harus objek JSON."}, status=400)
+
+    questions = data.get("questions")
+    if (not isinstance(questions, list) or not questions
+            or not all(isinstance(q, str) for q in questions)):
+        return JsonResponse({"status": "error", "msg": "'questions' harus list string."}, status=400)
+    if len(questions) > MAX_BATCH:
+        return JsonResponse({"status": "error", "msg": f"Maksimal {MAX_BATCH} pertanyaan."}, status=400)
+    k = data.get("k", 3)
+    if isinstance(k, bool) or not isinstance(k, int) or not 1 <= k <= MAX_K:
+        return JsonResponse({"status": "error", "msg": f"'k' harus 1..{MAX_K}."}, status=400)
+    scheme = data.get("scheme", "normal")
+    if scheme not in ("normal", "sublinear", "bm25"):
+        return JsonResponse({"status": "error", "msg": "'scheme' tidak dikenal."}, status=400)
+
+    results = rag_batch(questions, k=k, scheme=scheme, with_answer=bool(data.get("answer", True)))
+    return JsonResponse({"status": "success", "results": results})
@@ -0,0 +1,98 @@
+# benchmarks/bench_preprocess.py
+"""
+Benchmark throughput (MB/s) preprocessing teks: pipeline lama (clean dengan
+4x re.sub -> split -> filter stopword -> stem, tiap tahap membuat list/string
+baru) vs normalizer streaming satu regex (`iter_tokens` / `preprocess_text`).
+
+Teks sintetis: kata acak bergaya berita (huruf besar, tanda baca, angka, URL).
+Stem memakai cache di memori yang sudah dipanaskan, sehingga yang terukur
+adalah biaya normalisasi, bukan Sastrawi.
+
+    python benchmarks/bench_preprocess.py
+    python benchmarks/bench_preprocess.py --sizes-mb 1 10 --repeat 5
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+import src.stem_cache as stem_cache
+from src.preprocess import (STOPWORDS, clean, tokenize, remove_stopwords, stem,
+                            iter_tokens, preprocess_text)
+
+WORDS = ("mahasiswa universitas pendaftaran beasiswa kuliah semester jadwal ujian "
+         "pembayaran gedung fakultas teknik informatika penelitian dosen wisuda "
+         "rektor kampus program studi akreditasi kegiatan organisasi").split()
+
+
+def synthetic_text(n_bytes, rng):
+    """Teks kira-kira `n_bytes` byte dengan campuran kata, stopword, angka, URL."""
+    vocab = WORDS + sorted(STOPWORDS)
+    parts, size = [], 0
+    while size < n_bytes:
+        r = rng.random()
+        if r < 0.02:
+            w = f"https://kampus.ac.id/berita/{rng.randrange(10**6)}"
+        elif r < 0.06:
+            w = str(rng.randrange(10**4))
+        else:
+            w = rng.choice(vocab)
+            if rng.random() < 0.1:
+                w = w.capitalize()
+            if rng.random() < 0.08:
+                w += rng.choice(".,;:!?")
+        parts.append(w)
+        size += len(w) + 1
+    return " ".join(parts)
+
+
+def legacy_pipeline(text):
+    return stem(remove_stopwords(tokenize(clean(text))))
+
+
+def legacy_tokens(text):
+    return remove_stopwords(tokenize(clean(text)))
+
+
+def mb_per_s(fn, text, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn(text)
+        best = min(best, time.perf_counter() - t0)
+    return len(text.encode("utf-8")) / 2**20 / best
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    ap.add_argument("--sizes-mb", type=float, nargs="+", default=[0.1, 1, 10])
+    ap.add_argument("--repeat", type=int, default=3)
+    ap.add_argument("--seed", type=int, default=42)
+    args = ap.parse_args()
+    rng = random.Random(args.seed)
+
+    # Cache stem di memori saja (tidak menyentuh data/cache), dipanaskan dulu
+    stem_cache._cache = stem_cache.StemCache(path=None)
+    preprocess_text(" ".join(WORDS))
+
+    header = (f"{'MB':>6} {'token lama':>11} {'token stream':>13} "
+              f"{'lengkap lama':>13} {'lengkap stream':>15}   (MB/s)")
+    print(header)
+    print("-" * len(header))
+    for size in args.sizes_mb:
+        text = synthetic_text(int(size * 2**20), rng)
+        assert list(iter_tokens(text)) == legacy_tokens(text)
+        assert preprocess_text(text) == legacy_pipeline(text)
+        print(f"{size:>6g} "
+              f"{mb_per_s(legacy_tokens, text, args.repeat):>11.1f} "
+              f"{mb_per_s(lambda t: list(iter_tokens(t)), text, args.repeat):>13.1f} "
+              f"{mb_per_s(legacy_pipeline, text, args.repeat):>13.1f} "
+              f"{mb_per_s(preprocess_text, text, args.repeat):>15.1f}")
+
+
+if __name__ == "__main__":
+    main()
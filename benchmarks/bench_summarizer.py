@@ -0,0 +1,71 @@
+# benchmarks/bench_summarizer.py
+"""
+Benchmark latensi per panggilan `ringkas_dokumen`: mode lama (fit
+TfidfVectorizer baru di setiap panggilan) vs IDF korpus (`GlobalIDF`, di-fit
+sekali, panggilan cukup transform + reduksi sparse).
+
+Kalimat diambil dari data/ir_docs/dataset.csv (dengan pengulangan bila perlu);
+IDF korpus di-fit pada seluruh dataset, seperti saat training.
+
+    python benchmarks/bench_summarizer.py
+    python benchmarks/bench_summarizer.py --sizes 10 100 1000 10000 --repeat 20
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from src.summarizer import GlobalIDF, ringkas_dokumen
+
+DATASET = os.path.join(os.path.dirname(__file__), "..", "data", "ir_docs", "dataset.csv")
+
+
+def load_sentences():
+    import pandas as pd
+
+    return pd.read_csv(DATASET)["dokumen"].astype(str).tolist()
+
+
+def ms_per_call(fn, repeat):
+    times = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - t0)
+    times.sort()
+    return times[len(times) // 2] * 1000  # median
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    ap.add_argument("--sizes", type=int, nargs="+", default=[10, 100, 1000])
+    ap.add_argument("--repeat", type=int, default=10)
+    ap.add_argument("--seed", type=int, default=42)
+    args = ap.parse_args()
+    rng = random.Random(args.seed)
+
+    corpus = load_sentences()
+    t0 = time.perf_counter()
+    idf = GlobalIDF.fit(corpus)
+    print(f"fit IDF korpus: {len(corpus)} dokumen, {len(idf.feature_names)} fitur, "
+          f"{(time.perf_counter() - t0) * 1000:.1f} ms (sekali saat training)\n")
+
+    header = f"{'kalimat':>8} {'fit per call':>13} {'IDF korpus':>11} {'speedup':>8}   (ms/call, median)"
+    print(header)
+    print("-" * len(header))
+    for n in args.sizes:
+        kalimat = [rng.choice(corpus) for _ in range(n)]
+        ringkas_dokumen(kalimat, 3, return_features=True, idf=idf)  # pemanasan
+        lama = ms_per_call(lambda: ringkas_dokumen(kalimat, 3, return_features=True),
+                           args.repeat)
+        baru = ms_per_call(lambda: ringkas_dokumen(kalimat, 3, return_features=True, idf=idf),
+                           args.repeat)
+        print(f"{n:>8} {lama:>13.2f} {baru:>11.2f} {lama / baru:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
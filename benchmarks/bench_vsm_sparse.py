@@ -0,0 +1,119 @@
+# benchmarks/bench_vsm_sparse.py
+"""
+Benchmark memori & latensi skoring cosine: TF-IDF CSR float32 (baris
+ter-normalisasi L2) vs baseline matriks dense float64 [docs x vocab].
+
+Korpus sintetis: panjang dokumen acak, term mengikuti distribusi Zipf.
+Baseline dense hanya dibangun bila ukurannya <= --max-dense-mb; selebihnya
+hanya estimasi memori yang ditampilkan.
+
+    python benchmarks/bench_vsm_sparse.py
+    python benchmarks/bench_vsm_sparse.py --sizes 10000 100000 --vocab 20000
+"""
+
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+from src.vsm_ir import tf_csr, tfidf_matrix, idf_weights
+
+CHUNK_DOCS = 100_000
+
+
+def synthetic_tf(n_docs, vocab, avg_len, rng):
+    """TF CSR sintetis, dibangun per chunk agar memori puncak tetap kecil."""
+    import scipy.sparse as sp
+    parts = []
+    for start in range(0, n_docs, CHUNK_DOCS):
+        n = min(CHUNK_DOCS, n_docs - start)
+        lens = rng.integers(max(1, avg_len // 4), avg_len * 2, size=n)
+        term_ids = np.minimum(rng.zipf(1.15, size=int(lens.sum())) - 1, vocab - 1)
+        parts.append(tf_csr(term_ids, lens, vocab))
+    return sp.vstack(parts, format="csr")
+
+
+def csr_nbytes(X):
+    return X.data.nbytes + X.indices.nbytes + X.indptr.nbytes
+
+
+def time_queries(score_fn, queries, repeat=3):
+    """Median latensi (ms) satu query."""
+    times = []
+    for q in queries:
+        best = float("inf")
+        for _ in range(repeat):
+            t0 = time.perf_counter()
+            score_fn(q)
+            best = min(best, time.perf_counter() - t0)
+        times.append(best)
+    return float(np.median(times)) * 1000
+
+
+def make_queries(vocab, n_queries, rng):
+    """Query 2-5 term dari rentang frekuensi menengah, ter-normalisasi L2."""
+    queries = []
+    for _ in range(n_queries):
+        ids = rng.choice(np.arange(10, min(vocab, 5000)), size=rng.integers(2, 6), replace=False)
+        q = np.zeros(vocab, dtype=np.float32)
+        q[ids] = 1.0
+        queries.append(q / np.linalg.norm(q))
+    return queries
+
+
+def bench(n_docs, vocab, avg_len, max_dense_mb, n_queries, rng):
+    t0 = time.perf_counter()
+    TF = synthetic_tf(n_docs, vocab, avg_len, rng)
+    DF = np.bincount(TF.indices, minlength=vocab)
+    TFIDF, _ = tfidf_matrix(TF, DF, n_docs)
+    build_s = time.perf_counter() - t0
+    queries = make_queries(vocab, n_queries, rng)
+
+    row = {
+        "docs": n_docs,
+        "nnz": TFIDF.nnz,
+        "csr_mb": csr_nbytes(TFIDF) / 2**20,
+        "dense_mb": n_docs * vocab * 8 / 2**20,
+        "build_s": build_s,
+        "csr_ms": time_queries(lambda q: TFIDF @ q, queries),
+        "dense_ms": None,
+    }
+
+    if row["dense_mb"] <= max_dense_mb:
+        # Baseline lama: matriks dense float64, norma dihitung saat query
+        D = TF.toarray().astype(np.float64) * idf_weights(DF, n_docs)
+        norms = np.linalg.norm(D, axis=1)
+        row["dense_ms"] = time_queries(
+            lambda q: D @ q.astype(np.float64) / np.maximum(norms, 1e-12), queries)
+        del D
+    return row
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    ap.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000, 1_000_000])
+    ap.add_argument("--vocab", type=int, default=20_000)
+    ap.add_argument("--avg-len", type=int, default=60)
+    ap.add_argument("--max-dense-mb", type=float, default=2048)
+    ap.add_argument("--queries", type=int, default=20)
+    ap.add_argument("--seed", type=int, default=42)
+    args = ap.parse_args()
+    rng = np.random.default_rng(args.seed)
+
+    print(f"vocab={args.vocab}, rata-rata panjang dokumen={args.avg_len}")
+    header = f"{'docs':>10} {'nnz':>12} {'CSR MB':>9} {'dense MB':>10} {'build s':>8} {'CSR ms':>8} {'dense ms':>9}"
+    print(header)
+    print("-" * len(header))
+    for n in args.sizes:
+        r = bench(n, args.vocab, args.avg_len, args.max_dense_mb, args.queries, rng)
+        dense_ms = f"{r['dense_ms']:9.2f}" if r["dense_ms"] is not None else f"{'skip':>9}"
+        print(f"{r['docs']:>10} {r['nnz']:>12} {r['csr_mb']:>9.1f} {r['dense_mb']:>10.0f} "
+              f"{r['build_s']:>8.2f} {r['csr_ms']:>8.2f} {dense_ms}")
+
+
+if __name__ == "__main__":
+    main()
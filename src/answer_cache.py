@@ -0,0 +1,164 @@
+# src/answer_cache.py
+"""
+Cache jawaban (LRU + TTL) untuk `rag_pipeline` dan `get_response`.
+
+Kunci = (query ter-normalisasi, parameter, versi indeks/model). Versi ikut di
+kunci sehingga update berita / retraining otomatis membuat entri lama tidak
+pernah cocok lagi (entri itu lalu tersingkir oleh LRU/TTL).
+
+Memori dibatasi `maxsize` entri. Cache bisa disimpan ke JSON saat proses
+berhenti (`atexit`) lalu dimuat lagi saat start (`load`), supaya pertanyaan
+yang sering (PMB/UKT) langsung hit setelah restart.
+"""
+
+import json
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+CACHE_DIR = ROOT / "data" / "cache"
+
+_OPERATORS = ("AND", "OR", "NOT", "(", ")")
+_WORD_RE = re.compile(r"(?u)\b\w\w+\b")
+
+
+def normalize_query(query):
+    """
+    Bentuk kanonik query: stem (preprocess yang sama dengan indeks) terurut,
+    karena ranking bag-of-words tidak bergantung urutan kata. Query boolean
+    mempertahankan operator dan urutan; frasa bertanda kutip mempertahankan
+    urutan stem di dalamnya.
+    """
+    from src.vsm_ir import preprocess_query
+    from src.boolean_ir import is_boolean_query, _TOKEN_RE
+    from src.phrase_ir import has_phrase, parse_phrases
+
+    if is_boolean_query(query):
+        parts = []
+        for tok in _TOKEN_RE.findall(query):
+            parts.append(tok if tok in _OPERATORS else " ".join(preprocess_query(tok)))
+        return " ".join(p for p in parts if p)
+    key = " ".join(sorted(preprocess_query(query)))
+    if has_phrase(query):
+        phrases = sorted('"' + " ".join(p) + '"' for p in parse_phrases(query))
+        key = " ".join(phrases + [key])
+    return key
+
+
+def normalize_text(text):
+    """
+    Bentuk kanonik untuk model sklearn (TfidfVectorizer default): lowercase +
+    token `\\b\\w\\w+\\b` berurutan. Model bot tidak memakai stemming, jadi
+    kunci tidak boleh di-stem agar hit selalu identik dengan hasil tanpa cache.
+    """
+    return " ".join(_WORD_RE.findall(text.lower()))
+
+
+class AnswerCache:
+    """LRU + TTL thread-safe dengan penghitung hit/miss; nilai harus bisa di-JSON-kan."""
+
+    def __init__(self, maxsize=1024, ttl=3600, path=None):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.path = Path(path) if path else None
+        self._data = OrderedDict()  # kunci -> (expires_at, nilai)
+        self._lock = threading.Lock()
+        self.hits = self.misses = self.evictions = self.expired = 0
+
+    @staticmethod
+    def make_key(*parts):
+        return json.dumps(parts, separators=(",", ":"), default=str)
+
+    def get(self, key):
+        """Nilai untuk `key` atau None (miss / kedaluwarsa)."""
+        now = time.time()
+        with self._lock:
+            item = self._data.get(key)
+            if item is not None and item[0] <= now:
+                del self._data[key]
+                self.expired += 1
+                item = None
+            if item is None:
+                self.misses += 1
+                return None
+            self._data.move_to_end(key)
+            self.hits += 1
+            return item[1]
+
+    def put(self, key, value):
+        with self._lock:
+            self._data[key] = (time.time() + self.ttl, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def get_or_compute(self, key, compute):
+        """Ambil dari cache atau hitung dengan `compute()` lalu simpan."""
+        value = self.get(key)
+        if value is None:
+            value = compute()
+            self.put(key, value)
+        return value
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def stats(self):
+        with self._lock:
+            total = self.hits + self.misses
+            return {"size": len(self._data), "maxsize": self.maxsize, "ttl": self.ttl,
+                    "hits": self.hits, "misses": self.misses,
+                    "evictions": self.evictions, "expired": self.expired,
+                    "hit_rate": self.hits / total if total else 0.0}
+
+    # --------------------------------------------------------
+    # Persistensi
+    # --------------------------------------------------------
+    def save(self, path=None):
+        """Tulis entri yang belum kedaluwarsa ke JSON (atomik)."""
+        path = Path(path or self.path)
+        now = time.time()
+        with self._lock:
+            items = [[k, exp, v] for k, (exp, v) in self._data.items() if exp > now]
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_name(path.name + ".tmp")
+        tmp.write_text(json.dumps(items), encoding="utf-8")
+        os.replace(tmp, path)
+        return len(items)
+
+    def load(self, path=None):
+        """Muat entri dari JSON (urutan LRU dipertahankan); file rusak/hilang diabaikan."""
+        path = Path(path or self.path)
+        try:
+            items = json.loads(path.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return 0
+        now = time.time()
+        with self._lock:
+            for key, exp, value in items[-self.maxsize:]:
+                if exp > now:
+                    self._data[key] = (exp, value)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+        return len(self._data)
+
+    def persist_on_exit(self):
+        """Muat cache sekarang dan simpan otomatis saat proses berhenti."""
+        import atexit
+
+        self.load()
+
+        def _save():
+            try:
+                self.save()
+            except OSError as e:
+                print(f"[WARN] Gagal menyimpan cache {self.path}: {e}")
+
+        atexit.register(_save)
+        return self
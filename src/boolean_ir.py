@@ -0,0 +1,259 @@
+# src/boolean_ir.py
+"""
+Boolean retrieval (AND / OR / NOT) langsung di atas posting list `InvertedIndex`.
+
+Sintaks query:
+- operator AND, OR, NOT (huruf kapital), tanda kurung untuk pengelompokan
+- kata berurutan tanpa operator dianggap AND (implisit)
+- prioritas: NOT > AND > OR
+- mode boolean hanya aktif bila ada operator; kurung tanpa operator (mis.
+  "bayar ukt (uang kuliah tunggal)?") diperlakukan sebagai teks biasa
+
+Evaluasi:
+- anak AND diurutkan dari yang paling selektif (df terkecil); term berikutnya
+  hanya di-decode pada blok posting yang memuat kandidat (skip pointer),
+  sehingga query selektif hanya menyentuh sebagian kecil korpus
+- OR = union terurut, NOT di dalam AND = difference terhadap kandidat
+- dokumen yang lolos diranking dengan skema yang dipilih (bm25/normal/sublinear)
+"""
+
+import re
+
+import numpy as np
+
+from src.vsm_ir import preprocess_query, top_k_stable
+
+_TOKEN_RE = re.compile(r"\(|\)|[^\s()]+")
+_BOOLEAN_RE = re.compile(r"\b(?:AND|OR|NOT)\b")
+
+
+def is_boolean_query(query):
+    """True jika query memakai operator boolean (AND/OR/NOT huruf kapital)."""
+    return bool(_BOOLEAN_RE.search(query))
+
+
+# ------------------------------------------------------------
+# Parser (recursive descent) -> AST tuple
+#   ("TERM", kata) | ("AND", [anak...]) | ("OR", [anak...]) | ("NOT", anak)
+# ------------------------------------------------------------
+def parse_query(query):
+    """Parse query boolean menjadi AST; return None jika query kosong."""
+    tokens = _TOKEN_RE.findall(query)
+    pos = 0
+
+    def peek():
+        return tokens[pos] if pos < len(tokens) else None
+
+    def take():
+        nonlocal pos
+        pos += 1
+        return tokens[pos - 1]
+
+    def parse_or():
+        children = [parse_and()]
+        while peek() == "OR":
+            take()
+            children.append(parse_and())
+        children = [c for c in children if c is not None]
+        if not children:
+            return None
+        return children[0] if len(children) == 1 else ("OR", children)
+
+    def parse_and():
+        children = []
+        while peek() is not None and peek() not in ("OR", ")"):
+            if peek() == "AND":
+                take()
+                continue
+            children.append(parse_not())
+        children = [c for c in children if c is not None]
+        if not children:
+            return None
+        return children[0] if len(children) == 1 else ("AND", children)
+
+    def parse_not():
+        tok = peek()
+        if tok is None or tok in ("OR", ")"):
+            return None
+        take()
+        if tok == "NOT":
+            inner = parse_not()
+            return ("NOT", inner) if inner is not None else None
+        if tok == "AND":
+            return parse_not()
+        if tok == "(":
+            node = parse_or()
+            if peek() == ")":
+                take()
+            return node
+        return ("TERM", tok)
+
+    node = parse_or()
+    while pos < len(tokens):  # kurung tutup berlebih: lanjutkan sebagai AND
+        take()
+        rest = parse_or()
+        if rest is not None:
+            node = rest if node is None else ("AND", [node, rest])
+    return node
+
+
+def positive_words(query):
+    """Kata query (lowercase) yang tidak berada di bawah NOT, untuk skoring kalimat."""
+    words = []
+
+    def walk(node, negated):
+        if node is None:
+            return
+        if node[0] == "TERM":
+            if not negated:
+                words.append(node[1].lower())
+        elif node[0] == "NOT":
+            walk(node[1], not negated)
+        else:
+            for child in node[1]:
+                walk(child, negated)
+
+    walk(parse_query(query), False)
+    return words
+
+
+# ------------------------------------------------------------
+# Resolusi kata -> term-id
+# ------------------------------------------------------------
+def _resolve(node, index):
+    """
+    Ubah kata menjadi term-id (preprocess yang sama dengan dokumen).
+    Kata yang habis oleh stopword/cleaning dibuang dari AST; kata yang tidak
+    ada di vocab menjadi ("TERM", -1) = himpunan kosong.
+    """
+    if node is None:
+        return None
+    kind = node[0]
+    if kind == "TERM":
+        stems = preprocess_query(node[1])
+        if not stems:
+            return None
+        ids = [index.term_id(s) for s in stems]
+        leaves = [("TERM", -1 if i is None else i) for i in ids]
+        return leaves[0] if len(leaves) == 1 else ("AND", leaves)
+    if kind == "NOT":
+        inner = _resolve(node[1], index)
+        return ("NOT", inner) if inner is not None else None
+    children = [c for c in (_resolve(c, index) for c in node[1]) if c is not None]
+    if not children:
+        return None
+    return children[0] if len(children) == 1 else (kind, children)
+
+
+def _cost(node, index):
+    """Estimasi ukuran hasil (untuk mengurutkan anak AND)."""
+    kind = node[0]
+    if kind == "TERM":
+        return 0 if node[1] < 0 else int(index.df[node[1]])
+    if kind == "NOT":
+        return index.N
+    costs = [_cost(c, index) for c in node[1]]
+    return min(costs) if kind == "AND" else sum(costs)
+
+
+# ------------------------------------------------------------
+# Operasi himpunan pada posting list terurut
+# ------------------------------------------------------------
+def union(a, b):
+    return np.union1d(a, b)
+
+
+def difference(a, b):
+    """a - b, keduanya terurut."""
+    if a.size == 0 or b.size == 0:
+        return a
+    return a[~np.isin(a, b, assume_unique=True)]
+
+
+def evaluate(node, index, cands=None):
+    """
+    Evaluasi AST pada indeks -> array doc-id terurut.
+    `cands` (opsional) membatasi hasil ke kandidat; term di-decode hanya
+    pada blok posting yang memuat kandidat.
+    """
+    kind = node[0]
+    if kind == "TERM":
+        t = node[1]
+        if t < 0:
+            return np.zeros(0, np.int64)
+        if cands is None:
+            return index.postings(t)[0]
+        return index.postings_for(t, cands)[0]
+
+    if kind == "OR":
+        result = np.zeros(0, np.int64)
+        for child in node[1]:
+            result = union(result, evaluate(child, index, cands))
+        return result
+
+    if kind == "NOT":
+        base = np.arange(index.N, dtype=np.int64) if cands is None else cands
+        return difference(base, evaluate(node[1], index, base))
+
+    # AND: positif dulu (paling selektif), lalu kurangi dengan anak NOT
+    positives = sorted((c for c in node[1] if c[0] != "NOT"), key=lambda c: _cost(c, index))
+    negatives = [c[1] for c in node[1] if c[0] == "NOT"]
+    cur = cands
+    for child in positives:
+        cur = evaluate(child, index, cur)
+        if cur.size == 0:
+            return cur
+    if cur is None:
+        cur = np.arange(index.N, dtype=np.int64)
+    for child in negatives:
+        cur = difference(cur, evaluate(child, index, cur))
+        if cur.size == 0:
+            break
+    return cur
+
+
+def _positive_terms(node, negated=False, out=None):
+    out = [] if out is None else out
+    if node is None:
+        return out
+    if node[0] == "TERM":
+        if not negated and node[1] >= 0:
+            out.append(node[1])
+    elif node[0] == "NOT":
+        _positive_terms(node[1], not negated, out)
+    else:
+        for child in node[1]:
+            _positive_terms(child, negated, out)
+    return out
+
+
+def boolean_search(index, query, top_k=5, scheme="bm25", q_norm=None):
+    """
+    Evaluasi query boolean lalu ranking dokumen yang lolos dengan `scheme`
+    (`q_norm` diteruskan ke `score_docs`, untuk segmen).
+    Return list of (nama_dokumen, skor, idx) terurut menurun.
+    """
+    node = _resolve(parse_query(query), index)
+    if node is None:
+        return []
+    docs = evaluate(node, index)
+    if docs.size == 0:
+        return []
+
+    terms = _positive_terms(node)
+    if terms:
+        q_ids, q_tf = np.unique(np.array(terms, dtype=np.int64), return_counts=True)
+        scores = index.score_docs(q_ids, q_tf, docs, scheme=scheme, q_norm=q_norm)
+    else:
+        scores = np.zeros(docs.size)
+
+    if docs.size > top_k:
+        part = top_k_stable(scores, top_k)  # seri (mis. query NOT saja) -> doc-id terkecil
+        docs, scores = docs[part], scores[part]
+    order = np.lexsort((docs, -scores))
+    return [(index.names[d], float(scores[i]), int(d)) for i, d in ((i, docs[i]) for i in order)]
+
+
+if __name__ == "__main__":
+    for q in ["ukt AND (bca OR mandiri) NOT denda", "beasiswa prestasi", "NOT wisuda"]:
+        print(q, "->", parse_query(q))
@@ -0,0 +1,368 @@
+# src/corpus_index.py
+"""
+Indeks korpus yang hidup lama (long-lived) untuk RAG.
+
+Inverted index (lihat `src.vsm_ir.InvertedIndex`) dibangun SEKALI per versi
+`data/processed` lalu dipakai bersama oleh semua request. Matriks CSR term-dokumen
+dan varian TF-IDF (normal / sublinear) hanya dihitung bila jalur matriks
+benar-benar diminta. Tabel kalimat (`src.sentence_index`) ikut dibangun
+agar ekstraksi jawaban tidak perlu memecah/men-tokenisasi ulang dokumen.
+
+Jika indeks sudah dipublikasikan lewat `src.segment_index.update_index()`
+(setelah scraping), worker cukup membuka segmen biner dengan mmap
+(`src.index_store`): semua worker berbagi satu salinan di page cache dan
+startup hanya membaca header. Query dijalankan per segmen dengan statistik
+koleksi global lalu hasilnya digabung. Manifest mencatat versi korpus saat
+dipublikasikan; bila `data/processed` berubah sesudahnya tanpa `update_index`
+(mis. `preprocess.run_all()` biasa), indeks dibangun ulang dari `data/processed`.
+"""
+
+import json
+import threading
+from pathlib import Path
+
+import numpy as np
+import scipy.sparse as sp
+
+from src.vsm_ir import (SCHEMES, load_processed, load_raw, preprocess_query, tfidf_matrix,
+                        bm25_matrix, query_matrix, batch_scores, top_k_rows, query_norm)
+from src.index_store import current_path, current_stamp
+from src.boolean_ir import is_boolean_query, boolean_search, positive_words
+from src.phrase_ir import (has_phrase, parse_phrases, phrase_candidates, proximity_boost,
+                           rerank_pool)
+from src.segment_index import GlobalStats, Segment
+from src.token_corpus import TokenCorpus
+from src.preprocess import processed_names
+
+ROOT = Path(__file__).resolve().parents[1]
+PROC_DIR = ROOT / "data" / "processed"
+LOG_FILE = PROC_DIR / "preprocess_log.txt"
+
+
+def corpus_version(proc_dir=PROC_DIR, log_file=LOG_FILE):
+    """
+    Stempel versi korpus yang murah (dua kali stat, tanpa membaca isi file).
+    `run_all` menulis log di akhir proses, sehingga stempel hanya berubah
+    setelah preprocess selesai menulis file baru.
+    """
+    stamp = []
+    for p in (proc_dir, log_file):
+        try:
+            st = p.stat()
+            stamp.append((st.st_mtime_ns, st.st_size))
+        except FileNotFoundError:
+            stamp.append(None)
+    return tuple(stamp)
+
+
+class CorpusIndex:
+    """
+    Segmen indeks + statistik koleksi global + matriks TF/TF-IDF (lazy) untuk
+    satu versi korpus. Doc-id global = offset segmen + doc-id lokal.
+    """
+
+    def __init__(self, segments, stats=None, version=None):
+        self.version = version
+        self.segments = segments
+        self.stats = stats if stats is not None else GlobalStats.of_segment(segments[0])
+        self.base = np.zeros(len(segments) + 1, dtype=np.int64)
+        np.cumsum([seg.N for seg in segments], out=self.base[1:])
+        self.N = int(self.base[-1])
+        self._views = [None] * len(segments)
+        self._stats = None
+        self._matrices = {}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def build(cls, version=None):
+        """
+        Bangun satu segmen di memori dari `data/processed` (+ teks asli di
+        `data/docs`). Korpus term-id hasil preprocess dipakai langsung bila
+        sinkron dengan file `.txt`; jika tidak, token dibaca dari teks.
+        """
+        corpus = TokenCorpus.open(PROC_DIR)
+        names = processed_names(PROC_DIR)
+        if corpus is not None and corpus.names == names:
+            term_ids, lens, vocab = corpus.index_terms()
+            seg = Segment.from_token_ids(0, term_ids, lens, vocab, names,
+                                         load_raw(names, fallback=corpus))
+        else:
+            docs, names = load_processed(PROC_DIR)
+            seg = Segment.build(0, docs, names, load_raw(names, fallback=docs))
+        return cls([seg], version=version)
+
+    @classmethod
+    def open(cls, manifest_path, version=None):
+        """Buka generasi indeks dari manifest: segmen di-mmap (zero-copy)."""
+        manifest_path = Path(manifest_path)
+        manifest = json.loads(manifest_path.read_text(encoding="utf-8"))
+        index_dir = manifest_path.parent
+        segments = [Segment.open(e["id"], index_dir / e["file"], e["dead"])
+                    for e in manifest["segments"]]
+        return cls(segments, GlobalStats.open(index_dir / manifest["stats"]), version=version)
+
+    def _locate(self, doc):
+        i = int(np.searchsorted(self.base, doc, side="right")) - 1
+        return i, int(doc - self.base[i])
+
+    def view(self, i):
+        """Indeks segmen `i` yang diskor dengan statistik global."""
+        view = self._views[i]
+        if view is None:
+            seg = self.segments[i]
+            if len(self.segments) == 1 and seg.n_dead == 0:
+                view = seg.index  # statistik lokal = statistik global
+            else:
+                view = seg.index.with_stats(self.stats.df_for(seg.index.vocab.to_array()),
+                                            self.stats.N, self.stats.avg_len)
+            self._views[i] = view
+        return view
+
+    def term_stats(self):
+        """(vocab, t2i, TF, DF, lens, avg_len) untuk jalur matriks; dibangun saat pertama diminta."""
+        if self._stats is None:
+            with self._lock:
+                if self._stats is None:
+                    vocab = self.stats.vocab
+                    parts, lens = [], []
+                    for seg in self.segments:
+                        TF = seg.index.tf_csr().tocoo()
+                        cols = np.searchsorted(vocab, seg.index.vocab.to_array())[TF.col]
+                        keep = ~seg.dead[TF.row]  # dokumen terhapus -> baris kosong
+                        parts.append(sp.csr_matrix(
+                            (TF.data[keep], (TF.row[keep], cols[keep])),
+                            shape=(seg.N, vocab.size), dtype=np.float32))
+                        lens.append(np.where(seg.dead, 0, seg.index.lens))
+                    TF = sp.vstack(parts, format="csr") if parts else sp.csr_matrix((0, 0))
+                    vocab = list(vocab)
+                    t2i = {t: i for i, t in enumerate(vocab)}
+                    self._stats = (vocab, t2i, TF, self.stats.df, np.concatenate(lens),
+                                   self.stats.avg_len)
+        return self._stats
+
+    def tfidf(self, scheme="normal"):
+        """Kembalikan (TFIDF, idf) untuk skema; dihitung sekali saat pertama diminta."""
+        sublinear = scheme == "sublinear"
+        cached = self._matrices.get(sublinear)
+        if cached is None:
+            _, _, TF, DF, _, _ = self.term_stats()
+            with self._lock:
+                cached = self._matrices.get(sublinear)
+                if cached is None:
+                    cached = tfidf_matrix(TF, DF, self.stats.N, sublinear=sublinear)
+                    self._matrices[sublinear] = cached
+        return cached
+
+    def bm25(self):
+        """Matriks bagian-tf BM25 (CSR) untuk skoring batch; dihitung sekali."""
+        cached = self._matrices.get("bm25")
+        if cached is None:
+            _, _, TF, _, lens, avg_len = self.term_stats()
+            with self._lock:
+                cached = self._matrices.get("bm25")
+                if cached is None:
+                    cached = bm25_matrix(TF, lens, avg_len)
+                    self._matrices["bm25"] = cached
+        return cached
+
+    def doc_name(self, doc):
+        i, local = self._locate(doc)
+        return self.segments[i].index.names[local]
+
+    def search_batch(self, queries, k=3, scheme="normal", proximity=False):
+        """
+        Top-k untuk banyak query sekaligus: matriks query sparse x matriks
+        dokumen dalam SATU perkalian (proximity rerank opsional, seperti `search`).
+        Query boolean / frasa dievaluasi satu per satu.
+        Return list (per query) of list of (nama_dokumen, skor, idx).
+        """
+        if scheme not in SCHEMES:
+            raise ValueError(f"Skema tidak dikenal: {scheme}")
+        _, t2i, _, DF, _, _ = self.term_stats()
+        plain = [i for i, q in enumerate(queries)
+                 if not is_boolean_query(q) and not has_phrase(q)]
+        stems = [preprocess_query(queries[i]) for i in plain]
+        Q = query_matrix(stems, t2i)
+        if scheme == "bm25":
+            S = batch_scores(Q, scheme, DF, self.stats.N, B=self.bm25())
+        else:
+            TFIDF, idf = self.tfidf(scheme)
+            S = batch_scores(Q, scheme, DF, self.stats.N, TFIDF=TFIDF, idf=idf)
+
+        results = [None] * len(queries)
+        pool = rerank_pool(k, 2) if proximity else k
+        for i, q_stems, (docs, scores) in zip(plain, stems, top_k_rows(S, pool)):
+            hits = [(self.doc_name(d), float(s), int(d)) for d, s in zip(docs, scores)]
+            results[i] = self._rerank(q_stems, hits, k) if proximity else _top(hits, k)
+        for i, q in enumerate(queries):
+            if results[i] is None:
+                results[i] = self.search(q, k=k, scheme=scheme)
+        return results
+
+    def search(self, query, k=3, scheme="normal", proximity=False):
+        """
+        Retrieval top-k via inverted index per segmen (statistik global), hasil
+        digabung. Frasa bertanda kutip wajib ada di dokumen, dan kandidatnya
+        diranking ulang dengan proximity boost; query biasa hanya bila
+        `proximity=True`. Query dengan AND/OR/NOT dievaluasi sebagai boolean
+        lalu diranking. Return list of (nama_dokumen, skor, idx global).
+        """
+        boolean = is_boolean_query(query)
+        stems = None if boolean else preprocess_query(query)
+        phrases = [] if boolean else parse_phrases(query)
+        pool = rerank_pool(k, len(set(stems))) if proximity and not boolean else k
+        q_norm = self.query_norm(preprocess_query(" ".join(positive_words(query))) if boolean
+                                 else stems, scheme)
+        hits = []
+        for i, seg in enumerate(self.segments):
+            view, extra = self.view(i), seg.n_dead  # cadangan untuk dokumen terhapus
+            if boolean:
+                res = boolean_search(view, query, top_k=k + extra, scheme=scheme, q_norm=q_norm)
+                hits += [(name, score, int(self.base[i]) + d)
+                         for name, score, d in res if not seg.dead[d]]
+                continue
+            q_ids, q_tf = view.stem_ids(stems)
+            if phrases:
+                docs = phrase_candidates(view, phrases)
+                scores = view.score_docs(q_ids, q_tf, docs, scheme=scheme, q_norm=q_norm)
+            else:
+                docs, scores = view.top_k(q_ids, q_tf, k=pool + extra, scheme=scheme,
+                                          q_norm=q_norm)
+            hits += [(view.names[d], float(s), int(self.base[i]) + int(d))
+                     for d, s in zip(docs, scores) if not seg.dead[d]]
+        if phrases or (proximity and not boolean):
+            return self._rerank(stems, hits, k)
+        return _top(hits, k)
+
+    def query_norm(self, stems, scheme):
+        """
+        Norma query cosine dengan DF global. Segmen yang tidak memuat sebagian
+        term query akan menghitung norma lebih kecil sendiri, sehingga skornya
+        tidak sebanding dengan segmen lain (dan dengan `build` dari nol).
+        """
+        if scheme == "bm25" or not stems:
+            return None
+        terms, q_tf = np.unique(np.array(stems), return_counts=True)
+        return query_norm(q_tf, self.stats.df_for(terms), self.stats.N,
+                          sublinear=scheme == "sublinear")
+
+    def _rerank(self, stems, hits, k):
+        """
+        Ambil kandidat teratas (bag-of-words) lalu kalikan skornya dengan
+        proximity boost; posisi hanya di-decode untuk kandidat ini.
+        """
+        n_terms = len(set(stems))
+        hits = _top(hits, rerank_pool(k, n_terms))
+        if n_terms < 2:
+            return hits[:k]
+        boosted = []
+        by_seg = {}
+        for h in hits:
+            by_seg.setdefault(self._locate(h[2])[0], []).append(h)
+        for i, seg_hits in by_seg.items():
+            view = self.view(i)
+            q_ids, _ = view.stem_ids(stems)
+            local = np.array([h[2] - self.base[i] for h in seg_hits], dtype=np.int64)
+            boost = proximity_boost(view, q_ids, local, n_terms=n_terms)
+            boosted += [(name, float(score * b), d) for (name, score, d), b in zip(seg_hits, boost)]
+        return _top(boosted, k)
+
+    # --------------------------------------------------------
+    # Ekstraksi kalimat jawaban
+    # --------------------------------------------------------
+    def query_terms(self, query):
+        """Stem query (kata di bawah NOT diabaikan) untuk skoring kalimat."""
+        return sorted(set(preprocess_query(" ".join(positive_words(query)))))
+
+    def _term_ids(self, seg, terms):
+        ids = {seg.index.term_id(t) for t in terms}
+        ids.discard(None)
+        return np.array(sorted(ids), dtype=np.int64)
+
+    def top_sentences(self, doc, terms, n=2):
+        """Return list of (skor, sent_id) kalimat paling relevan pada dokumen `doc`."""
+        i, local = self._locate(doc)
+        seg = self.segments[i]
+        return seg.sentences.top_sentences(local, self._term_ids(seg, terms), n=n)
+
+    def snippet(self, doc, sid, terms):
+        """Kalimat dengan kata query ditandai **...**."""
+        i, local = self._locate(doc)
+        seg = self.segments[i]
+        return seg.sentences.snippet(seg.raw[local], sid, self._term_ids(seg, terms))
+
+
+def _top(hits, k):
+    """k hit teratas: skor menurun, seri -> doc-id global terkecil."""
+    return sorted(hits, key=lambda h: (-h[1], h[2]))[:k]
+
+
+# ------------------------------------------------------------
+# Singleton per proses (dipakai bersama semua request)
+# ------------------------------------------------------------
+_index = None
+_index_lock = threading.Lock()
+_published = (None, None)  # (stempel CURRENT, versi korpus yang tercatat di manifest)
+
+
+def _published_corpus(stamp):
+    """Versi korpus di manifest generasi `stamp` (dibaca sekali per generasi)."""
+    global _published
+    if _published[0] != stamp:
+        try:
+            manifest = json.loads(current_path().read_text(encoding="utf-8"))
+        except (OSError, AttributeError, ValueError):
+            manifest = {}
+        _published = (stamp, manifest.get("corpus_version"))
+    return _published[1]
+
+
+def _active_version():
+    """
+    Versi indeks yang seharusnya aktif: generasi file biner (pointer CURRENT)
+    bila sudah dipublikasikan dan masih sesuai `data/processed`, selain itu
+    stempel `data/processed` (indeks dibangun di memori).
+    """
+    corpus = corpus_version(PROC_DIR, LOG_FILE)
+    stamp = current_stamp()
+    if stamp is not None:
+        published = _published_corpus(stamp)
+        # manifest lama tanpa versi korpus: selalu dipakai
+        if published is None or published == json.loads(json.dumps(corpus)):
+            return ("mmap", stamp)
+    return ("build", corpus)
+
+
+def _load(version):
+    if version[0] == "mmap":
+        path = current_path()
+        try:
+            return CorpusIndex.open(path, version=version)
+        except (OSError, ValueError, KeyError) as e:
+            print(f"[WARN] Gagal membuka indeks {path}: {e}; membangun dari data/processed")
+    return CorpusIndex.build(version=version)
+
+
+def get_index():
+    """
+    Ambil indeks aktif. Generasi baru (CURRENT berubah) atau korpus baru
+    dimuat sekali lalu referensinya ditukar; request yang sedang berjalan
+    tetap memakai objek lama sampai selesai.
+    """
+    global _index
+    version = _active_version()
+    idx = _index
+    if idx is not None and idx.version == version:
+        return idx
+    with _index_lock:
+        if _index is None or _index.version != version:
+            _index = _load(version)
+        return _index
+
+
+def invalidate_index():
+    """Paksa indeks dimuat ulang pada request berikutnya."""
+    global _index
+    with _index_lock:
+        _index = None
+
@@ -0,0 +1,233 @@
+# src/index_store.py
+"""
+Format indeks biner ber-versi yang dibuka dengan mmap.
+
+Satu file segmen `seg-<id>.bin` (juga `stats-<id>.bin`) berisi:
+
+    [0:8]    magic  b"MRAGIDX\\0"
+    [8:12]   uint32 FORMAT_VERSION
+    [12:16]  uint32 panjang header JSON
+    [16:24]  uint64 id file
+    [24:..]  header JSON: {"meta": {...}, "sections": {nama: [dtype, offset, count]}}
+    [...]    section (rata 64 byte): vocab, postings + tabel blok, posisi token,
+             panjang dokumen, norma, document store (teks asli), tabel kalimat
+
+Semua section adalah array 1-D yang dibuka dengan `np.frombuffer` di atas
+`mmap` read-only: N worker yang membuka file yang sama berbagi satu salinan
+di page cache, dan membuka indeks hanya seharga membaca header.
+
+Satu generasi indeks = `manifest-<gen>.json` yang mendaftar segmen aktif
+(lihat `src.segment_index`). File ditulis ke nama sementara, di-fsync, lalu
+di-rename; pointer `CURRENT` (berisi nama manifest aktif) diganti dengan
+`os.replace`. Pembaca cukup `stat` file CURRENT untuk mendeteksi generasi baru.
+Penulis (update / merge, bisa dari worker berbeda) memegang `index_lock` selama
+membaca-mengubah-mempublikasikan manifest; pembaca tidak pernah mengunci.
+"""
+
+import json
+import mmap
+import os
+import struct
+import time
+from contextlib import contextmanager
+from pathlib import Path
+
+import numpy as np
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+ROOT = Path(__file__).resolve().parents[1]
+INDEX_DIR = ROOT / "data" / "index"
+CURRENT_NAME = "CURRENT"
+LOCK_NAME = "LOCK"
+
+MAGIC = b"MRAGIDX\0"
+FORMAT_VERSION = 2  # 2: posisi token (phrase / proximity)
+_FIXED = struct.Struct("<8sIIQ")
+_ALIGN = 64
+KEEP_GENERATIONS = 2  # generasi sebelum yang aktif yang tetap disimpan
+
+
+def _align(n):
+    return (n + _ALIGN - 1) // _ALIGN * _ALIGN
+
+
+def _fsync_dir(path):
+    try:
+        fd = os.open(path, os.O_RDONLY)
+    except OSError:  # Windows: direktori tidak bisa dibuka
+        return
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+# ------------------------------------------------------------
+# Tulis / baca satu file indeks
+# ------------------------------------------------------------
+def write_index_file(path, sections, file_id, meta=None):
+    """Tulis dict nama -> array 1-D ke `path` secara atomik (tmp + fsync + rename)."""
+    path = Path(path)
+    arrays = {name: np.ascontiguousarray(a).reshape(-1) for name, a in sections.items()}
+
+    table, rel = {}, 0
+    for name, a in arrays.items():
+        table[name] = [a.dtype.str, rel, int(a.size)]
+        rel = _align(rel + a.nbytes)
+    header = json.dumps({"meta": meta or {}, "sections": table}).encode("utf-8")
+    data_start = _align(_FIXED.size + len(header))
+
+    tmp = path.with_name(path.name + ".tmp")
+    with open(tmp, "wb") as f:
+        f.write(_FIXED.pack(MAGIC, FORMAT_VERSION, len(header), file_id))
+        f.write(header)
+        for name, a in arrays.items():
+            f.seek(data_start + table[name][1])
+            f.write(a.tobytes())
+        f.truncate(data_start + rel)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, path)
+    _fsync_dir(path.parent)
+
+
+class MappedIndexFile:
+    """File indeks yang di-mmap; `sections[nama]` = array numpy read-only (zero-copy)."""
+
+    def __init__(self, path):
+        self.path = Path(path)
+        with open(self.path, "rb") as f:
+            self._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        if len(self._mm) < _FIXED.size:
+            raise ValueError(f"{self.path} terpotong (bukan file indeks MiniRAG)")
+        magic, version, header_len, file_id = _FIXED.unpack_from(self._mm, 0)
+        if magic != MAGIC:
+            raise ValueError(f"{self.path} bukan file indeks MiniRAG")
+        if version != FORMAT_VERSION:
+            raise ValueError(f"Versi format indeks {version} tidak didukung (butuh {FORMAT_VERSION})")
+        header = json.loads(self._mm[_FIXED.size:_FIXED.size + header_len].decode("utf-8"))
+        data_start = _align(_FIXED.size + header_len)
+
+        self.file_id = file_id
+        self.meta = header["meta"]
+        self.sections = {
+            name: np.frombuffer(self._mm, dtype=np.dtype(dtype), count=count,
+                                offset=data_start + rel)
+            for name, (dtype, rel, count) in header["sections"].items()
+        }
+
+
+# ------------------------------------------------------------
+# Direktori indeks: segmen + manifest per generasi + pointer CURRENT
+# ------------------------------------------------------------
+def current_stamp(index_dir=INDEX_DIR):
+    """Stempel murah (satu stat) untuk mendeteksi pergantian generasi; None jika belum ada."""
+    try:
+        st = (Path(index_dir) / CURRENT_NAME).stat()
+    except FileNotFoundError:
+        return None
+    return (st.st_mtime_ns, st.st_size, st.st_ino)
+
+
+def current_path(index_dir=INDEX_DIR):
+    """Path manifest generasi aktif, atau None."""
+    try:
+        name = (Path(index_dir) / CURRENT_NAME).read_text(encoding="utf-8").strip()
+    except FileNotFoundError:
+        return None
+    return Path(index_dir) / name if name else None
+
+
+@contextmanager
+def index_lock(index_dir=INDEX_DIR):
+    """
+    Lock tulis eksklusif antar-proses pada direktori indeks (flock pada file
+    `LOCK`; msvcrt di Windows). Dilepas otomatis oleh OS bila pemegangnya mati.
+    """
+    index_dir = Path(index_dir)
+    index_dir.mkdir(parents=True, exist_ok=True)
+    with open(index_dir / LOCK_NAME, "a+b") as f:
+        if fcntl is not None:
+            fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+        else:
+            while True:
+                f.seek(0)
+                try:
+                    msvcrt.locking(f.fileno(), msvcrt.LK_LOCK, 1)
+                    break
+                except OSError:  # LK_LOCK menyerah setelah ~10 detik
+                    time.sleep(0.1)
+        try:
+            yield
+        finally:
+            if fcntl is not None:
+                fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+            else:
+                f.seek(0)
+                msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+
+
+def load_manifest(index_dir=INDEX_DIR):
+    """Manifest generasi aktif (dict), atau None jika indeks belum pernah dipublikasikan."""
+    path = current_path(index_dir)
+    if path is None:
+        return None
+    return json.loads(path.read_text(encoding="utf-8"))
+
+
+def _write_atomic(path, data):
+    tmp = path.with_name(path.name + ".tmp")
+    with open(tmp, "wb") as f:
+        f.write(data)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, path)
+
+
+def _referenced_files(manifest):
+    files = {seg["file"] for seg in manifest["segments"]}
+    files.add(manifest["stats"])
+    return files
+
+
+def publish_manifest(manifest, index_dir=INDEX_DIR, keep=KEEP_GENERATIONS):
+    """
+    Publikasikan manifest sebagai generasi baru lalu pindahkan pointer CURRENT
+    secara atomik. Generasi aktif + `keep` generasi sebelumnya dipertahankan
+    (pembaca yang tertinggal masih bisa membuka segmennya); manifest yang lebih
+    lama dan file segmen/stat yang tidak lagi dirujuk dihapus, jadi penulis
+    harus memegang `index_lock` sejak membaca manifest. Return path manifest baru.
+
+    Manifest: {"generation", "next_id", "stats": file, "segments": [{"id",
+    "file", "n_docs", "dead": [doc lokal]}], "docs": {nama: {"seg", "doc", "sha1"}},
+    "corpus_version": stempel data/processed saat update}
+    """
+    index_dir = Path(index_dir)
+    index_dir.mkdir(parents=True, exist_ok=True)
+    manifest["generation"] = int(manifest.get("generation", 0)) + 1
+    path = index_dir / f"manifest-{manifest['generation']:08d}.json"
+    _write_atomic(path, json.dumps(manifest).encode("utf-8"))
+    _write_atomic(index_dir / CURRENT_NAME, path.name.encode("utf-8"))
+    _fsync_dir(index_dir)
+
+    # Pembaca yang masih memakai generasi lama tetap aman (mmap tetap valid di POSIX)
+    manifests = sorted(index_dir.glob("manifest-*.json"))
+    live = set()
+    kept = manifests[-(keep + 1):]
+    for m in kept:
+        try:
+            live |= _referenced_files(json.loads(m.read_text(encoding="utf-8")))
+        except (OSError, ValueError):
+            pass
+    stale = manifests[:-len(kept)] + [p for p in index_dir.glob("*.bin") if p.name not in live]
+    for old in stale:
+        try:
+            old.unlink()
+        except OSError:
+            pass
+    return path
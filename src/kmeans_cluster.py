@@ -1,21 +1,30 @@
 import os
 import pickle
-import numpy as np
+import threading
 
 # --- 1. KONFIGURASI PATH MODEL ---
 # Mengambil path root project secara dinamis
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 MODEL_DIR = os.path.join(BASE_DIR, 'bot_app', 'model', 'model_clustering_dokumen')
 
-# --- 2. INISIALISASI VARIABEL GLOBAL ---
-vectorizer = None
-kmeans = None
-data_dokumen = {}
+# --- 2. SNAPSHOT MODEL ---
+# (vectorizer, kmeans, data_dokumen) dari satu kali load. Reload membangun
+# tuple baru lalu menukar SATU referensi, jadi pembaca tidak pernah melihat
+# campuran model lama + baru dan tidak perlu menunggu lock.
+_snapshot = None
+_loaded = False
+_load_lock = threading.Lock()
+
+def snapshot_model():
+    """(vectorizer, kmeans, data_dokumen) aktif, atau None. Ambil SEKALI per request."""
+    _pastikan_dimuat()
+    return _snapshot
 
 # --- 3. FUNGSI LOAD MODEL (Dipakai saat Start & Reload) ---
 def load_resources():
     """Helper function untuk memuat file .pkl dari disk"""
-    global vectorizer, kmeans, data_dokumen
+    global _snapshot, _loaded
+    _loaded = True
     try:
         path_vec = os.path.join(MODEL_DIR, 'tfidf_vectorizer.pkl')
         path_kmeans = os.path.join(MODEL_DIR, 'kmeans_model.pkl')
@@ -27,9 +36,13 @@ def load_resources():
             return False
 
         print("Loading Model Clustering dari Disk...")
-        vectorizer = pickle.load(open(path_vec, 'rb'))
-        kmeans = pickle.load(open(path_kmeans, 'rb'))
-        data_dokumen = pickle.load(open(path_label, 'rb'))
+        with open(path_vec, 'rb') as f:
+            vectorizer = pickle.load(f)
+        with open(path_kmeans, 'rb') as f:
+            kmeans = pickle.load(f)
+        with open(path_label, 'rb') as f:
+            data_dokumen = pickle.load(f)
+        _snapshot = (vectorizer, kmeans, data_dokumen)  # publikasi atomik
         print("✅ Model Clustering Siap Digunakan!")
         return True
 
@@ -37,8 +50,17 @@ def load_resources():
         print(f"❌ Error Load Model: {e}")
         return False
 
-# Jalankan load pertama kali saat server nyala
-load_resources()
+def _pastikan_dimuat():
+    """Model dimuat saat pertama kali dibutuhkan (bukan saat modul di-import)"""
+    if not _loaded:
+        with _load_lock:
+            if not _loaded:
+                load_resources()
+
+def ambil_data_dokumen():
+    """Dictionary {cluster_id: [dokumen]} versi terbaru (ikut berganti saat reload)"""
+    snap = snapshot_model()
+    return snap[2] if snap else {}
 
 # --- 4. FUNGSI UTAMA: PENCARIAN ---
 def cari_dokumen_relevan(teks_user):
@@ -46,11 +68,14 @@ def cari_dokumen_relevan(teks_user):
     Menerima teks user -> Memprediksi Cluster -> Mengembalikan Dokumen terkait.
     Return: (ID Cluster, List Dokumen)
     """
-    # Cek apakah model sudah dimuat
-    if not vectorizer or not kmeans:
+    # Cek apakah model sudah dimuat; satu snapshot untuk seluruh request
+    snap = snapshot_model()
+    if snap is None:
         return None, ["Model belum tersedia. Silakan klik 'Latih Ulang Bot' di sidebar."]
 
     try:
+        vectorizer, kmeans, data_dokumen = snap
+
         # A. Vectorize: Ubah teks jadi angka
         vec = vectorizer.transform([teks_user])
         
@@ -87,7 +112,7 @@ def reload_model_otomatis():
 # --- 6. BLOCK TESTING MANUAL (Hanya jalan jika file dieksekusi langsung) ---
 if __name__ == "__main__":
     print("\n=== TEST MODUL CLUSTERING SEARCH ===")
-    if vectorizer is None:
+    if snapshot_model() is None:
         print("Model belum ada. Pastikan sudah training.")
     else:
         while True:
@@ -0,0 +1,138 @@
+# src/phrase_ir.py
+"""
+Phrase query dan proximity boost di atas posisi token `InvertedIndex`.
+
+- Frasa ditulis dengan tanda kutip: `"uang gedung" cicilan`. Dokumen wajib
+  memuat setiap frasa (stem berurutan pada posisi berturut-turut); semua kata
+  query tetap dipakai untuk ranking bag-of-words.
+- Proximity: kandidat teratas diranking ulang dengan boost berdasarkan
+  jendela terpendek yang memuat term query. Selalu untuk query frasa (posisi
+  toh sudah dibutuhkan); untuk query biasa hanya bila diminta
+  (`proximity=True`), karena butuh pool kandidat lebih besar dan decode
+  posisi. Tanpa itu query biasa tetap top-k MaxScore murni.
+"""
+
+import re
+
+import numpy as np
+
+from src.vsm_ir import preprocess_query
+
+_PHRASE_RE = re.compile(r'"([^"]*)"')
+
+PROXIMITY_WEIGHT = 0.5  # boost maksimum: semua term query berdampingan
+RERANK_FACTOR = 4       # kandidat yang diranking ulang = k * faktor (min RERANK_MIN)
+RERANK_MIN = 20
+
+
+def has_phrase(query):
+    return bool(_PHRASE_RE.search(query))
+
+
+def parse_phrases(query):
+    """Return list frasa (list stem) dari bagian query bertanda kutip."""
+    phrases = []
+    for m in _PHRASE_RE.finditer(query):
+        stems = preprocess_query(m.group(1))
+        if stems:
+            phrases.append(stems)
+    return phrases
+
+
+def rerank_pool(k, n_terms):
+    """Jumlah kandidat yang perlu diambil agar proximity bisa mengubah urutan top-k."""
+    return max(k * RERANK_FACTOR, RERANK_MIN) if n_terms >= 2 else k
+
+
+# ------------------------------------------------------------
+# Phrase matching
+# ------------------------------------------------------------
+def phrase_docs(index, ids, cands=None):
+    """
+    Dokumen (terurut) yang memuat term-id `ids` pada posisi berturut-turut.
+    Kandidat = irisan posting (term paling jarang dulu), lalu posisi hanya
+    di-decode untuk kandidat tersebut.
+    """
+    if any(t is None for t in ids):
+        return np.zeros(0, np.int64)
+    docs = cands
+    for t in sorted(set(ids), key=lambda t: index.df[t]):
+        docs = index.postings(t)[0] if docs is None else index.postings_for(t, docs)[0]
+        if docs.size == 0:
+            return docs
+    if len(ids) == 1:
+        return docs
+
+    pos = {t: index.positions(t, docs) for t in set(ids)}
+    keep = []
+    for j, d in enumerate(docs):
+        start = pos[ids[0]][j]
+        for i, t in enumerate(ids[1:], 1):
+            start = start[np.isin(start + i, pos[t][j])]
+            if start.size == 0:
+                break
+        if start.size:
+            keep.append(d)
+    return np.array(keep, dtype=np.int64)
+
+
+def phrase_candidates(index, phrases):
+    """Dokumen yang memuat SEMUA frasa (array terurut)."""
+    docs = None
+    for stems in phrases:
+        docs = phrase_docs(index, [index.term_id(s) for s in stems], docs)
+        if docs.size == 0:
+            break
+    return docs
+
+
+# ------------------------------------------------------------
+# Proximity
+# ------------------------------------------------------------
+def min_span(lists):
+    """Panjang jendela terpendek yang memuat minimal satu posisi dari setiap list."""
+    pos = np.concatenate(lists)
+    lab = np.repeat(np.arange(len(lists)), [len(p) for p in lists])
+    order = np.argsort(pos, kind="stable")
+    pos, lab = pos[order].tolist(), lab[order].tolist()
+
+    need, have, lo, best = len(lists), 0, 0, pos[-1] - pos[0] + 1
+    count = [0] * need
+    for hi, label in enumerate(lab):
+        if count[label] == 0:
+            have += 1
+        count[label] += 1
+        while have == need:
+            best = min(best, pos[hi] - pos[lo] + 1)
+            count[lab[lo]] -= 1
+            if count[lab[lo]] == 0:
+                have -= 1
+            lo += 1
+    return best
+
+
+def proximity_boost(index, q_ids, docs, n_terms=None):
+    """
+    Faktor pengali skor per dokumen: 1 + PROXIMITY_WEIGHT * kedekatan, dengan
+    kedekatan = (m-1)/(span-1) * (m-1)/(n-1); m = term query yang muncul di
+    dokumen, n = jumlah term query (`n_terms`, default len(q_ids)),
+    span = jendela terpendek memuat m term.
+    """
+    n = len(q_ids) if n_terms is None else n_terms
+    boost = np.ones(len(docs))
+    if n < 2 or len(docs) == 0:
+        return boost
+    docs = np.asarray(docs, dtype=np.int64)
+    sorted_docs = np.sort(docs)
+    per_term = []
+    for t in q_ids:
+        d, _ = index.postings_for(t, sorted_docs)
+        per_term.append(dict(zip(d.tolist(), index.positions(t, d))))
+
+    for j, d in enumerate(docs.tolist()):
+        lists = [p[d] for p in per_term if d in p]
+        m = len(lists)
+        if m >= 2:
+            span = min_span(lists)
+            boost[j] += PROXIMITY_WEIGHT * (m - 1) / max(span - 1, 1) * (m - 1) / (n - 1)
+    return boost
@@ -1,16 +1,24 @@
 # src/preprocess.py
 
+import hashlib
+import json
+import multiprocessing
+import os
 import re
 from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
-from Sastrawi.Stemmer.StemmerFactory import StemmerFactory
-import matplotlib.pyplot as plt
+
+from src.stem_cache import get_stem_cache
 
 # --- Direktori utama ---
 ROOT = Path(__file__).resolve().parents[1]
 DOCS_DIR = ROOT / "data" / "docs"
 PROC_DIR = ROOT / "data" / "processed"
 LOG_FILE = PROC_DIR / "preprocess_log.txt"
+MANIFEST_NAME = "preprocess_manifest.json"
+CHUNK_SIZE = 32  # dokumen per unit kerja worker
+TOP_N = 10
 PROC_DIR.mkdir(parents=True, exist_ok=True)
 
 # --- Stopwords sederhana (bisa ditambah) ---
@@ -20,7 +28,28 @@ akan tidak dapat telah atau lebih karena para mereka kita kamu saya anda
 sebuah suatu bila saja setiap serta namun masih maka
 """.split())
 
-stemmer = StemmerFactory().create_stemmer()
+_stemmer = None
+
+def get_stemmer():
+    """Stemmer Sastrawi, dibuat saat pertama dipakai (memuat kamus cukup mahal)"""
+    global _stemmer
+    if _stemmer is None:
+        from Sastrawi.Stemmer.StemmerFactory import StemmerFactory
+        _stemmer = StemmerFactory().create_stemmer()
+    return _stemmer
+
+def __getattr__(name):
+    # Kompatibilitas: `from src.preprocess import stemmer` tetap bekerja (lazy)
+    if name == "stemmer":
+        return get_stemmer()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+# Normalizer streaming = clean() + tokenize() per potongan teks: lowercase,
+# URL dibuang dengan satu regex, lalu satu tabel translate (level byte)
+# mengganti semua selain a-z (tanda baca, angka, non-ASCII) dengan spasi.
+_URL_RE = re.compile(r"http\S+")
+_LETTERS_ONLY = bytes(c if 97 <= c <= 122 else 32 for c in range(256))
+_CHUNK_CHARS = 1 << 16  # teks besar diproses per potongan (dipotong di spasi)
 
 # ------------------------------------------------------------
 # 🔧 Tahapan Preprocessing
@@ -43,42 +72,162 @@ def remove_stopwords(tokens):
     return [t for t in tokens if t not in STOPWORDS and len(t) > 1]
 
 def stem(tokens):
-    """Melakukan stemming menggunakan Sastrawi"""
-    return [stemmer.stem(t) for t in tokens]
+    """Stemming Sastrawi per kata unik lewat cache stem persisten"""
+    return get_stem_cache().stem_tokens(tokens)
+
+def _chunks(text):
+    start, n = 0, len(text)
+    while start < n:
+        end = start + _CHUNK_CHARS
+        if end < n:
+            cut = text.rfind(" ", start, end)
+            end = cut + 1 if cut > start else text.find(" ", end) + 1 or n
+        yield text[start:end]
+        start = end
+
+def iter_tokens(text):
+    """Streaming clean + tokenize + stopword: yield token lowercase satu per satu"""
+    for chunk in _chunks(text):
+        chunk = _URL_RE.sub(" ", chunk.lower())
+        chunk = chunk.encode("ascii", "replace").translate(_LETTERS_ONLY).decode("ascii")
+        for tok in chunk.split():
+            if len(tok) > 1 and tok not in STOPWORDS:
+                yield tok
+
+def iter_stems(text):
+    """Streaming pipeline lengkap; stem diambil dari cache sekali per kata unik"""
+    cache = get_stem_cache()
+    seen = {}
+    for tok in iter_tokens(text):
+        s = seen.get(tok)
+        if s is None:
+            s = seen[tok] = cache.stem(tok)
+        yield s
 
 def preprocess_text(text):
-    """Pipeline preprocessing"""
-    text = clean(text)
-    tokens = tokenize(text)
-    tokens = remove_stopwords(tokens)
-    tokens = stem(tokens)
-    return tokens
+    """Pipeline preprocessing (hasil identik dengan clean -> tokenize -> remove_stopwords -> stem)"""
+    return list(iter_stems(text))
 
 # ------------------------------------------------------------
-# 🚀 Eksekusi Preprocessing ke Semua Dokumen
+# 🚀 Eksekusi Preprocessing ke Semua Dokumen (inkremental + paralel)
 # ------------------------------------------------------------
-def run_all(plot=True):
-    stats = []
-    log_lines = []
-
+def file_sha1(path):
+    return hashlib.sha1(Path(path).read_bytes()).hexdigest()
+
+def load_manifest(proc_dir=PROC_DIR):
+    """Manifest {nama: {"sha1", "tokens", "top"}} hasil preprocess di `proc_dir`"""
+    try:
+        return json.loads((Path(proc_dir) / MANIFEST_NAME).read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return {}
+
+def save_manifest(manifest, proc_dir=PROC_DIR):
+    path = Path(proc_dir) / MANIFEST_NAME
+    tmp = path.with_name(path.name + ".tmp")
+    tmp.write_text(json.dumps(manifest, ensure_ascii=False), encoding="utf-8")
+    os.replace(tmp, path)
+
+def processed_names(proc_dir=PROC_DIR):
+    """Nama dokumen hasil preprocess di `proc_dir` (terurut, tanpa file log)"""
+    return sorted(p.name for p in Path(proc_dir).glob("*.txt") if p.name != LOG_FILE.name)
+
+def remove_processed(names, proc_dir=PROC_DIR, manifest=None, corpus=True):
+    """
+    Hapus hasil preprocess dokumen yang sumbernya hilang: file `.txt`, entri
+    manifest, dan (jika `corpus`) dokumennya di korpus term-id. Return manifest
+    """
+    from src.token_corpus import update_corpus
+
+    manifest = load_manifest(proc_dir) if manifest is None else manifest
+    for name in names:
+        manifest.pop(name, None)
+        (Path(proc_dir) / name).unlink(missing_ok=True)
+    save_manifest(manifest, proc_dir)
+    if corpus:
+        update_corpus(proc_dir, {}, processed_names(proc_dir))
+    return manifest
+
+def _process_chunk(paths, proc_dir):
+    """
+    Unit kerja worker: preprocess beberapa dokumen, tulis hasil + statistik
+    sekali jalan. Token juga dikirim sebagai (kosakata lokal, id lokal uint32).
+    """
+    import numpy as np
+
+    out = []
+    for p in map(Path, paths):
+        data = p.read_bytes()
+        toks = preprocess_text(data.decode("utf-8", errors="ignore"))
+        (Path(proc_dir) / p.name).write_text(" ".join(toks), encoding="utf-8")
+        local = {}
+        ids = np.fromiter((local.setdefault(t, len(local)) for t in toks),
+                          dtype=np.uint32, count=len(toks))
+        out.append((p.name, {"sha1": hashlib.sha1(data).hexdigest(), "tokens": len(toks),
+                             "top": Counter(toks).most_common(TOP_N)}, (list(local), ids)))
+    get_stem_cache().flush()  # worker pool tidak menjalankan atexit
+    return out
+
+def preprocess_files(paths, proc_dir=PROC_DIR, workers=None, chunk_size=CHUNK_SIZE):
+    """
+    Preprocess `paths` ke `proc_dir`; chunk dokumen dikerjakan paralel di
+    ProcessPoolExecutor (serial jika hanya satu chunk). Worker di-spawn, bukan
+    fork: proses ini bisa memegang koneksi sqlite cache stem dan lock-nya
+    (mis. dari thread update di server). Manifest dan korpus
+    term-id (`src.token_corpus`) di `proc_dir` ikut diperbarui.
+    Return {nama: statistik}.
+    """
+    from src.token_corpus import update_corpus
+
+    paths = [str(p) for p in paths]
+    chunks = [paths[i:i + chunk_size] for i in range(0, len(paths), chunk_size)]
+    workers = min(workers or os.cpu_count() or 1, len(chunks))
+    results = []
+    if workers <= 1:
+        for c in chunks:
+            results += _process_chunk(c, proc_dir)
+    else:
+        with ProcessPoolExecutor(max_workers=workers,
+                                 mp_context=multiprocessing.get_context("spawn")) as pool:
+            futures = [pool.submit(_process_chunk, c, str(proc_dir)) for c in chunks]
+            for fut in futures:  # urutan input: manifest sama dengan jalur serial
+                results += fut.result()
+    stats = {name: st for name, st, _ in results}
+    if stats:
+        manifest = load_manifest(proc_dir)
+        manifest.update(stats)
+        save_manifest(manifest, proc_dir)
+        update_corpus(proc_dir, {name: tok for name, _, tok in results},
+                      processed_names(proc_dir))
+    return stats
+
+def run_all(plot=True, workers=None, chunk_size=CHUNK_SIZE):
+    """Preprocess hanya dokumen baru/berubah (hash konten), hapus hasil dokumen yang hilang"""
+    manifest = load_manifest(PROC_DIR)
     files = sorted([p for p in DOCS_DIR.iterdir() if p.suffix == ".txt"])
-    for p in files:
-        raw = p.read_text(encoding="utf-8", errors="ignore")
-        toks = preprocess_text(raw)
-        out = PROC_DIR / p.name
-        out.write_text(" ".join(toks), encoding="utf-8")
-
-        stats.append((p.name, len(toks)))
-        log_lines.append(f"{p.name}: {len(toks)} tokens")
-
-        print(f"[preprocess] {p.name} -> {len(toks)} tokens -> {out}")
+    changed = [p for p in files
+               if manifest.get(p.name, {}).get("sha1") != file_sha1(p)
+               or not (PROC_DIR / p.name).exists()]
+    names = {p.name for p in files}
+    gone = [n for n in manifest if n not in names]
+    if gone:  # korpus term-id ditulis ulang oleh preprocess_files bila ada yang berubah
+        remove_processed(gone, PROC_DIR, manifest, corpus=not changed)
+
+    print(f"[preprocess] {len(changed)} berubah, {len(files) - len(changed)} dilewati")
+    done = preprocess_files(changed, PROC_DIR, workers=workers, chunk_size=chunk_size)
+    manifest.update(done)
+    for p in changed:
+        print(f"[preprocess] {p.name} -> {done[p.name]['tokens']} tokens -> {PROC_DIR / p.name}")
+
+    stats = [(p.name, manifest[p.name]["tokens"]) for p in files]
 
     # Simpan log proses
+    log_lines = [f"{name}: {n} tokens" for name, n in stats]
     LOG_FILE.write_text("\n".join(log_lines), encoding="utf-8")
     print(f"\n✅ Log tersimpan di: {LOG_FILE}")
 
     # --- Opsional: Plot distribusi panjang dokumen ---
     if plot and stats:
+        import matplotlib.pyplot as plt
         plt.figure(figsize=(8, 4))
         names = [s[0] for s in stats]
         vals = [s[1] for s in stats]
@@ -89,12 +238,10 @@ def run_all(plot=True):
         plt.savefig(PROC_DIR / "doc_length_distribution.png")
         print(f"[plot] saved to {PROC_DIR / 'doc_length_distribution.png'}")
 
-    # --- Tampilkan top token per dokumen ---
-    for name, _ in stats:
-        toks = (PROC_DIR / name).read_text(encoding="utf-8").split()
-        freq = Counter(toks)
-        print(f"\nTop 10 tokens untuk {name}:")
-        for t, c in freq.most_common(10):
+    # --- Tampilkan top token per dokumen yang diproses (dari statistik worker) ---
+    for p in changed:
+        print(f"\nTop 10 tokens untuk {p.name}:")
+        for t, c in done[p.name]["top"]:
             print(f"  {t:15} {c}")
 
 def main():
@@ -0,0 +1,362 @@
+# src/segment_index.py
+"""
+Indeks tersegmentasi (gaya Lucene) untuk update inkremental korpus.
+
+- Dokumen baru / berubah di `data/docs` (dideteksi lewat hash isi) di-preprocess
+  dan ditulis sebagai SATU segmen kecil baru; versi lama dokumen ditandai
+  terhapus (tombstone) di segmennya.
+- Statistik koleksi (DF per term, jumlah dokumen, total panjang) disimpan di
+  `stats-<id>.bin` dan diperbarui inkremental: + segmen baru, - dokumen terhapus.
+- Query menjalankan top-k per segmen dengan statistik global lalu menggabungkan
+  hasil (lihat `src.corpus_index.CorpusIndex`).
+- Merge bertingkat (tiered) di thread latar: bila satu tier berisi
+  MERGE_FACTOR segmen, segmen-segmen itu digabung (dokumen terhapus dibuang)
+  tanpa preprocess ulang. Query tetap dilayani dari generasi lama selama
+  update/merge berjalan.
+- Update dan merge dari proses mana pun diserialisasi dengan `index_lock`
+  (baca manifest -> tulis segmen -> publikasi), sehingga tidak ada dua
+  penulis yang mempublikasikan generasi / `next_id` yang sama.
+"""
+
+import hashlib
+import json
+import math
+import threading
+from pathlib import Path
+
+import numpy as np
+
+from src.vsm_ir import DOCS_DIR, PROC_DIR, InvertedIndex, StringTable, tokenize_corpus
+from src.token_corpus import TokenCorpus
+from src.sentence_index import SentenceTable
+from src.index_store import (INDEX_DIR, MappedIndexFile, index_lock, load_manifest,
+                             publish_manifest, write_index_file)
+
+MERGE_FACTOR = 10       # segmen per tier sebelum digabung
+MAX_DEAD_RATIO = 0.5    # segmen dengan tombstone lebih dari ini ikut di-merge
+
+_write_lock = threading.Lock()  # antar-thread; antar-proses lewat `index_lock`
+
+
+# ------------------------------------------------------------
+# Segmen
+# ------------------------------------------------------------
+class Segment:
+    """Satu segmen: inverted index + document store + tabel kalimat + forward index."""
+
+    def __init__(self, seg_id, index, raw, sentences, doc_term_ptr=None, doc_terms=None,
+                 dead=()):
+        self.id = seg_id
+        self.index = index
+        self.raw = raw
+        self.sentences = sentences
+        if doc_term_ptr is None:
+            doc_term_ptr, doc_terms = forward_index(index)
+        self.doc_term_ptr = doc_term_ptr
+        self.doc_terms = doc_terms
+        self.dead = np.zeros(index.N, dtype=bool)
+        self.dead[list(dead)] = True
+        self.n_dead = int(self.dead.sum())
+
+    @property
+    def N(self):
+        return self.index.N
+
+    @classmethod
+    def build(cls, seg_id, docs, names, raw):
+        """Segmen dari dokumen hasil preprocess (string token) + teks asli."""
+        vocab, _, term_ids, lens = tokenize_corpus(docs)
+        return cls.from_token_ids(seg_id, term_ids, lens, vocab, names, raw)
+
+    @classmethod
+    def from_token_ids(cls, seg_id, term_ids, lens, vocab, names, raw):
+        """Segmen langsung dari term-id (vocab terurut), mis. `TokenCorpus.index_terms`."""
+        index = InvertedIndex.from_token_ids(term_ids, lens, vocab, names)
+        return cls(seg_id, index, StringTable.from_strings(raw),
+                   SentenceTable.build(raw, index.term_id))
+
+    @classmethod
+    def open(cls, seg_id, path, dead=()):
+        arrays = MappedIndexFile(path).sections
+        return cls(seg_id, InvertedIndex.from_arrays(arrays),
+                   StringTable(arrays["raw_buf"], arrays["raw_off"]),
+                   SentenceTable.from_arrays(arrays),
+                   arrays["doc_term_ptr"], arrays["doc_terms"], dead=dead)
+
+    def to_sections(self):
+        sections = self.index.to_arrays()
+        sections.update(self.sentences.to_arrays())
+        sections.update(raw_buf=self.raw.buf, raw_off=self.raw.off,
+                        doc_term_ptr=self.doc_term_ptr, doc_terms=self.doc_terms)
+        return sections
+
+    def doc_terms_of(self, docs):
+        """Term unik (string) milik dokumen `docs`, berulang per dokumen (untuk DF)."""
+        docs = np.asarray(docs, dtype=np.int64)
+        n = self.doc_term_ptr[docs + 1] - self.doc_term_ptr[docs]
+        idx = np.repeat(self.doc_term_ptr[docs] - np.cumsum(n) + n, n) + np.arange(int(n.sum()))
+        return self.index.vocab.to_array()[self.doc_terms[idx]]
+
+
+def forward_index(index):
+    """(doc_term_ptr, doc_terms): term unik per dokumen dari posting list."""
+    terms, docs, _ = index.all_postings()
+    order = np.lexsort((terms, docs))
+    ptr = np.zeros(index.N + 1, dtype=np.int64)
+    np.cumsum(np.bincount(docs, minlength=index.N), out=ptr[1:])
+    return ptr, terms[order].astype(np.int32)
+
+
+def merge_segments(seg_id, segments):
+    """
+    Gabungkan segmen (dokumen hidup saja, urutan dipertahankan) tanpa
+    preprocess ulang: urutan token direkonstruksi dari posisi (posisi ikut
+    terbawa), term dipetakan ke vocab gabungan.
+    """
+    vocabs = [s.index.vocab.to_array() for s in segments]
+    vocab = np.unique(np.concatenate(vocabs)) if vocabs else np.zeros(0, dtype="<U1")
+
+    term_ids, lens, names, raw, tables = [], [], [], [], []
+    for seg, local_vocab in zip(segments, vocabs):
+        live = np.flatnonzero(~seg.dead)
+        term_map = np.searchsorted(vocab, local_vocab)
+        keep = np.repeat(~seg.dead, seg.index.lens)
+        term_ids.append(term_map[seg.index.token_stream()[keep]])
+        lens.append(seg.index.lens[live])
+        names += [seg.index.names[d] for d in live]
+        raw += [seg.raw[d] for d in live]
+        tables.append(seg.sentences.take(live, term_map))
+
+    index = InvertedIndex.from_token_ids(
+        np.concatenate(term_ids) if term_ids else np.zeros(0, np.int64),
+        np.concatenate(lens) if lens else np.zeros(0, np.int32),
+        list(vocab), names)
+    return Segment(seg_id, index, StringTable.from_strings(raw), SentenceTable.concat(tables))
+
+
+# ------------------------------------------------------------
+# Statistik koleksi global
+# ------------------------------------------------------------
+class GlobalStats:
+    """DF per term (vocab terurut), jumlah dokumen hidup dan total panjang dokumen."""
+
+    def __init__(self, vocab, df, N, total_len):
+        self.vocab = vocab          # array unicode terurut
+        self.df = df
+        self.N = int(N)
+        self.total_len = int(total_len)
+
+    @property
+    def avg_len(self):
+        return self.total_len / self.N if self.N else 0.0
+
+    @classmethod
+    def empty(cls):
+        return cls(np.zeros(0, dtype="<U1"), np.zeros(0, dtype=np.int64), 0, 0)
+
+    @classmethod
+    def of_segment(cls, seg):
+        return cls(seg.index.vocab.to_array(), seg.index.df.astype(np.int64),
+                   seg.N, int(seg.index.lens.sum()))
+
+    def updated(self, terms, counts, d_docs, d_len):
+        """Statistik baru setelah DF `terms` berubah sebesar `counts` (boleh negatif)."""
+        vocab = np.union1d(self.vocab, terms)
+        df = np.zeros(vocab.size, dtype=np.int64)
+        df[np.searchsorted(vocab, self.vocab)] += self.df
+        np.add.at(df, np.searchsorted(vocab, terms), counts)
+        keep = df > 0
+        return GlobalStats(vocab[keep], df[keep], self.N + d_docs, self.total_len + d_len)
+
+    def df_for(self, terms):
+        """DF global untuk array term (0 jika tidak ada)."""
+        if self.vocab.size == 0:
+            return np.zeros(len(terms), dtype=np.int64)
+        pos = np.minimum(np.searchsorted(self.vocab, terms), self.vocab.size - 1)
+        return np.where(self.vocab[pos] == terms, self.df[pos], 0)
+
+    def to_sections(self):
+        table = StringTable.from_strings(self.vocab)
+        return {"vocab_buf": table.buf, "vocab_off": table.off, "df": self.df}
+
+    @classmethod
+    def open(cls, path):
+        f = MappedIndexFile(path)
+        vocab = StringTable(f.sections["vocab_buf"], f.sections["vocab_off"]).to_array()
+        return cls(vocab, f.sections["df"], f.meta["N"], f.meta["total_len"])
+
+
+# ------------------------------------------------------------
+# Update inkremental
+# ------------------------------------------------------------
+def _jsonable(value):
+    """Bentuk nilai setelah melewati JSON (tuple -> list), untuk dibandingkan dengan manifest."""
+    return json.loads(json.dumps(value))
+
+
+def _sha1(path):
+    return hashlib.sha1(path.read_bytes()).hexdigest()
+
+
+def _write_segment(seg, index_dir):
+    name = f"seg-{seg.id:08d}.bin"
+    write_index_file(Path(index_dir) / name, seg.to_sections(), seg.id)
+    return {"id": seg.id, "file": name, "n_docs": seg.N, "dead": []}
+
+
+def _write_stats(stats, file_id, index_dir):
+    name = f"stats-{file_id:08d}.bin"
+    write_index_file(Path(index_dir) / name, stats.to_sections(), file_id,
+                     meta={"N": stats.N, "total_len": stats.total_len})
+    return name
+
+
+def update_index(docs_dir=DOCS_DIR, proc_dir=PROC_DIR, index_dir=INDEX_DIR):
+    """
+    Indeks dokumen baru / berubah di `docs_dir` sebagai segmen baru dan tandai
+    dokumen yang dihapus / diganti. Hanya dokumen yang berubah yang
+    di-preprocess (paralel, hasilnya juga ditulis ke `proc_dir`); hasil
+    preprocess dokumen yang sumbernya hilang ikut dihapus dari `proc_dir`.
+    Return path manifest baru, atau None jika tidak ada perubahan.
+    """
+    from src.corpus_index import LOG_FILE, corpus_version
+    from src.preprocess import preprocess_files, remove_processed
+
+    index_dir = Path(index_dir)
+    with _write_lock, index_lock(index_dir):
+        manifest = load_manifest(index_dir) or {"next_id": 1, "segments": [], "docs": {}}
+        stats = (GlobalStats.open(index_dir / manifest["stats"]) if "stats" in manifest
+                 else GlobalStats.empty())
+        known = manifest["docs"]
+
+        hashes = {p.name: _sha1(p) for p in sorted(Path(docs_dir).glob("*.txt"))}
+        changed = [n for n, h in hashes.items() if known.get(n, {}).get("sha1") != h]
+        gone = [n for n in known if n not in hashes]
+        proc_dir = Path(proc_dir)
+        if not changed and not gone:
+            # Dokumen sama, tapi run_all sempat menulis ulang data/processed:
+            # catat versi korpusnya agar worker kembali memakai indeks mmap
+            corpus = _jsonable(corpus_version(proc_dir, proc_dir / LOG_FILE.name))
+            if "segments" not in manifest or manifest.get("corpus_version") in (None, corpus):
+                return None
+            manifest["corpus_version"] = corpus
+            return publish_manifest(manifest, index_dir)
+
+        # Tombstone versi lama + kurangi statistiknya
+        by_seg = {}
+        for name in changed + gone:
+            old = known.pop(name, None)
+            if old is not None:
+                by_seg.setdefault(old["seg"], []).append(old["doc"])
+        for entry in manifest["segments"]:
+            docs = by_seg.get(entry["id"])
+            if not docs:
+                continue
+            seg = Segment.open(entry["id"], index_dir / entry["file"])
+            terms = seg.doc_terms_of(docs)
+            stats = stats.updated(terms, -np.ones(terms.size, dtype=np.int64),
+                                  -len(docs), -int(seg.index.lens[docs].sum()))
+            entry["dead"] = sorted(set(entry["dead"]) | set(docs))
+        if gone:
+            # jangan sampai dokumen yang dihapus muncul lagi saat build penuh
+            remove_processed(gone, proc_dir, corpus=not changed)
+
+        # Segmen baru dari dokumen yang berubah
+        if changed:
+            done = preprocess_files([Path(docs_dir) / n for n in changed], proc_dir)
+            corpus = TokenCorpus.open(proc_dir)
+            raw = []
+            for name in changed:
+                raw.append((Path(docs_dir) / name).read_text(encoding="utf-8", errors="ignore"))
+                print(f"[segment] {name} -> {done[name]['tokens']} tokens")
+            term_ids, lens, vocab = corpus.index_terms([corpus.position(n) for n in changed])
+            seg = Segment.from_token_ids(manifest["next_id"], term_ids, lens, vocab, changed, raw)
+            manifest["next_id"] += 1
+            index_dir.mkdir(parents=True, exist_ok=True)
+            manifest["segments"].append(_write_segment(seg, index_dir))
+            stats = stats.updated(seg.index.vocab.to_array(), seg.index.df.astype(np.int64),
+                                  seg.N, int(seg.index.lens.sum()))
+            for d, name in enumerate(changed):
+                known[name] = {"seg": seg.id, "doc": d, "sha1": hashes[name]}
+
+        manifest["segments"] = [e for e in manifest["segments"] if len(e["dead"]) < e["n_docs"]]
+        manifest["stats"] = _write_stats(stats, manifest["next_id"], index_dir)
+        manifest["next_id"] += 1
+        # Versi `proc_dir` yang tercermin di generasi ini: run_all sesudahnya
+        # mengubahnya, dan get_index kembali membangun dari data/processed
+        manifest["corpus_version"] = _jsonable(corpus_version(proc_dir, proc_dir / LOG_FILE.name))
+        return publish_manifest(manifest, index_dir)
+
+
+
+# ------------------------------------------------------------
+# Merge bertingkat (tiered) di latar
+# ------------------------------------------------------------
+def _tier(entry):
+    live = max(entry["n_docs"] - len(entry["dead"]), 1)
+    return int(math.log(live, MERGE_FACTOR))
+
+
+def pick_merge(segments):
+    """
+    Pilih segmen untuk digabung: MERGE_FACTOR segmen terkecil pada tier
+    terendah yang penuh, atau segmen yang sebagian besar isinya terhapus.
+    """
+    tiers = {}
+    for entry in segments:
+        tiers.setdefault(_tier(entry), []).append(entry)
+    for tier in sorted(tiers):
+        if len(tiers[tier]) >= MERGE_FACTOR:
+            smallest = sorted(tiers[tier], key=lambda e: e["n_docs"] - len(e["dead"]))
+            return smallest[:MERGE_FACTOR]
+    dirty = [e for e in segments if len(e["dead"]) > MAX_DEAD_RATIO * e["n_docs"]]
+    return dirty[:MERGE_FACTOR]
+
+
+def merge_once(index_dir=INDEX_DIR):
+    """Jalankan satu merge sesuai kebijakan; return path manifest baru atau None."""
+    index_dir = Path(index_dir)
+    with _write_lock, index_lock(index_dir):
+        manifest = load_manifest(index_dir)
+        if manifest is None:
+            return None
+        picked = pick_merge(manifest["segments"])
+        if not picked:
+            return None
+        segs = [Segment.open(e["id"], index_dir / e["file"], e["dead"]) for e in picked]
+        merged = merge_segments(manifest["next_id"], segs)
+        manifest["next_id"] += 1
+        entry = _write_segment(merged, index_dir)
+
+        # Petakan doc-id lama -> doc-id di segmen gabungan
+        new_doc, base = {}, 0
+        for seg in segs:
+            rank = np.cumsum(~seg.dead) - 1
+            for d in np.flatnonzero(~seg.dead):
+                new_doc[(seg.id, int(d))] = base + int(rank[d])
+            base += seg.N - seg.n_dead
+        for info in manifest["docs"].values():
+            key = (info["seg"], info["doc"])
+            if key in new_doc:
+                info["seg"], info["doc"] = merged.id, new_doc[key]
+
+        ids = {e["id"] for e in picked}
+        pos = min(i for i, e in enumerate(manifest["segments"]) if e["id"] in ids)
+        rest = [e for e in manifest["segments"] if e["id"] not in ids]
+        manifest["segments"] = rest[:pos] + [entry] + rest[pos:]
+        print(f"[merge] {len(segs)} segmen -> seg {merged.id} ({merged.N} dokumen)")
+        return publish_manifest(manifest, index_dir)
+
+
+def merge_in_background(index_dir=INDEX_DIR):
+    """Jalankan merge berulang di thread daemon sampai kebijakan tidak memilih segmen lagi."""
+    def loop():
+        try:
+            while merge_once(index_dir) is not None:
+                pass
+        except Exception as e:
+            print(f"[merge] gagal: {e}")
+
+    thread = threading.Thread(target=loop, name="segment-merge", daemon=True)
+    thread.start()
+    return thread
@@ -0,0 +1,189 @@
+# src/sentence_index.py
+"""
+Tabel kalimat untuk ekstraksi jawaban RAG.
+
+Segmentasi kalimat, tokenisasi + stemming, dan offset karakter dihitung SEKALI
+saat indexing dan disimpan di samping inverted index:
+
+- doc_sent_ptr[d] .. doc_sent_ptr[d+1]  -> id kalimat milik dokumen d
+- sent_start / sent_end                 -> offset karakter kalimat di teks asli
+- sent_tok_ptr[s] .. sent_tok_ptr[s+1]  -> token kalimat s (posting kalimat->token)
+- tok_term / tok_start / tok_end        -> term-id dan offset karakter tiap token
+
+Memilih kalimat paling relevan = lookup token kalimat milik dokumen hit +
+heap kecil; snippet ter-highlight dibentuk langsung dari offset yang disimpan.
+"""
+
+import heapq
+import re
+
+import numpy as np
+
+from src.preprocess import STOPWORDS
+from src.stem_cache import get_stem_cache
+
+# Sama dengan heuristik extract_sentences: pecah setelah . ! ? atau di newline
+_SENT_BREAK_RE = re.compile(r"(?<=[.!?])\s+|\n+")
+# URL dilewati (seperti clean()), selain itu token = deret huruf a-z
+_WORD_RE = re.compile(r"[Hh][Tt][Tt][Pp]\S+|([A-Za-z]+)")
+MIN_SENT_CHARS = 20
+
+
+def split_sentences(text):
+    """Return list of (start, end) offset kalimat (sudah di-strip, > MIN_SENT_CHARS)."""
+    spans = []
+    pos = 0
+    for m in _SENT_BREAK_RE.finditer(text):
+        spans.append((pos, m.start()))
+        pos = m.end()
+    spans.append((pos, len(text)))
+
+    out = []
+    for s, e in spans:
+        while s < e and text[s].isspace():
+            s += 1
+        while e > s and text[e - 1].isspace():
+            e -= 1
+        if e - s > MIN_SENT_CHARS:
+            out.append((s, e))
+    return out
+
+
+def _ranges(starts, ends):
+    """Gabungan arange(starts[i], ends[i]) tervektorisasi."""
+    n = (ends - starts).astype(np.int64)
+    return np.repeat(starts - np.cumsum(n) + n, n) + np.arange(int(n.sum()))
+
+
+def _ptr(counts):
+    ptr = np.zeros(len(counts) + 1, dtype=np.int64)
+    np.cumsum(counts, out=ptr[1:])
+    return ptr
+
+
+class SentenceTable:
+    """Kalimat + token (term-id, offset) seluruh korpus dalam array numpy."""
+
+    ARRAYS = ("doc_sent_ptr", "sent_start", "sent_end", "sent_tok_ptr",
+              "tok_term", "tok_start", "tok_end")
+
+    def __init__(self, doc_sent_ptr, sent_start, sent_end, sent_tok_ptr,
+                 tok_term, tok_start, tok_end):
+        self.doc_sent_ptr = doc_sent_ptr
+        self.sent_start = sent_start
+        self.sent_end = sent_end
+        self.sent_tok_ptr = sent_tok_ptr
+        self.tok_term = tok_term
+        self.tok_start = tok_start
+        self.tok_end = tok_end
+
+    @classmethod
+    def build(cls, raw_docs, term_id):
+        """
+        Bangun tabel dari teks asli. `term_id(stem)` memetakan stem ke term-id
+        indeks (None = di luar vocab, token tidak disimpan).
+        """
+        stem_ids = {}  # kata -> term-id (stem sekali per kata unik)
+        stems = get_stem_cache()
+
+        def word_id(word):
+            if word not in stem_ids:
+                if len(word) <= 1 or word in STOPWORDS:
+                    stem_ids[word] = None
+                else:
+                    stem_ids[word] = term_id(stems.stem(word))
+            return stem_ids[word]
+
+        doc_sent_ptr = [0]
+        sent_start, sent_end, sent_tok_ptr = [], [], [0]
+        tok_term, tok_start, tok_end = [], [], []
+        for text in raw_docs:
+            for s, e in split_sentences(text):
+                for m in _WORD_RE.finditer(text, s, e):
+                    if m.group(1) is None:
+                        continue
+                    tid = word_id(m.group(1).lower())
+                    if tid is not None:
+                        tok_term.append(tid)
+                        tok_start.append(m.start())
+                        tok_end.append(m.end())
+                sent_start.append(s)
+                sent_end.append(e)
+                sent_tok_ptr.append(len(tok_term))
+            doc_sent_ptr.append(len(sent_start))
+
+        return cls(np.array(doc_sent_ptr, dtype=np.int64),
+                   np.array(sent_start, dtype=np.int32), np.array(sent_end, dtype=np.int32),
+                   np.array(sent_tok_ptr, dtype=np.int64),
+                   np.array(tok_term, dtype=np.int32),
+                   np.array(tok_start, dtype=np.int32), np.array(tok_end, dtype=np.int32))
+
+    def to_arrays(self):
+        return {name: getattr(self, name) for name in self.ARRAYS}
+
+    @classmethod
+    def from_arrays(cls, arrays):
+        return cls(*(arrays[name] for name in cls.ARRAYS))
+
+    def take(self, docs, term_map=None):
+        """
+        Sub-tabel untuk dokumen `docs` (urutan dipertahankan, dinomori ulang 0..).
+        `term_map` (opsional) memetakan term-id lama -> term-id baru.
+        """
+        docs = np.asarray(docs, dtype=np.int64)
+        sids = _ranges(self.doc_sent_ptr[docs], self.doc_sent_ptr[docs + 1])
+        tids = _ranges(self.sent_tok_ptr[sids], self.sent_tok_ptr[sids + 1])
+        tok_term = self.tok_term[tids]
+        if term_map is not None:
+            tok_term = term_map[tok_term].astype(np.int32)
+        return SentenceTable(
+            _ptr(self.doc_sent_ptr[docs + 1] - self.doc_sent_ptr[docs]),
+            self.sent_start[sids], self.sent_end[sids],
+            _ptr(self.sent_tok_ptr[sids + 1] - self.sent_tok_ptr[sids]),
+            tok_term, self.tok_start[tids], self.tok_end[tids])
+
+    @classmethod
+    def concat(cls, tables):
+        """Gabungkan beberapa tabel (dokumen berurutan sesuai urutan `tables`)."""
+        return cls(
+            _ptr(np.concatenate([np.diff(t.doc_sent_ptr) for t in tables])),
+            np.concatenate([t.sent_start for t in tables]),
+            np.concatenate([t.sent_end for t in tables]),
+            _ptr(np.concatenate([np.diff(t.sent_tok_ptr) for t in tables])),
+            *(np.concatenate([getattr(t, name) for t in tables])
+              for name in ("tok_term", "tok_start", "tok_end")))
+
+    def top_sentences(self, doc, q_ids, n=2):
+        """
+        n kalimat dokumen `doc` dengan jumlah token query terbanyak (skor > 0).
+        Return list of (skor, sent_id), skor menurun; seri -> kalimat lebih awal.
+        """
+        s0, s1 = self.doc_sent_ptr[doc], self.doc_sent_ptr[doc + 1]
+        if s1 == s0 or len(q_ids) == 0:
+            return []
+        t0, t1 = self.sent_tok_ptr[s0], self.sent_tok_ptr[s1]
+        hit = np.isin(self.tok_term[t0:t1], q_ids)
+        if not hit.any():
+            return []
+        # token -> kalimat pemiliknya, lalu hitung token query per kalimat
+        owner = np.searchsorted(self.sent_tok_ptr[s0:s1 + 1], np.arange(t0, t1), side="right") - 1
+        counts = np.bincount(owner[hit], minlength=s1 - s0)
+        cand = np.flatnonzero(counts)
+        best = heapq.nlargest(n, ((int(counts[i]), -int(i)) for i in cand))
+        return [(score, s0 - neg) for score, neg in best]
+
+    def text(self, raw, sid):
+        return raw[self.sent_start[sid]:self.sent_end[sid]]
+
+    def snippet(self, raw, sid, q_ids, mark=("**", "**")):
+        """Teks kalimat dengan token query dibungkus `mark`, dari offset tersimpan."""
+        s, e = int(self.sent_start[sid]), int(self.sent_end[sid])
+        t0, t1 = self.sent_tok_ptr[sid], self.sent_tok_ptr[sid + 1]
+        hit = np.flatnonzero(np.isin(self.tok_term[t0:t1], q_ids)) + t0
+        parts, pos = [], s
+        for t in hit:
+            a, b = int(self.tok_start[t]), int(self.tok_end[t])
+            parts += [raw[pos:a], mark[0], raw[a:b], mark[1]]
+            pos = b
+        parts.append(raw[pos:e])
+        return "".join(parts)
@@ -0,0 +1,181 @@
+# src/stem_cache.py
+"""
+Cache kata -> stem Sastrawi dua lapis, dipakai bersama preprocessing dokumen,
+indexing (tabel kalimat) dan query.
+
+- Lapis 1: LRU di memori, dibatasi `maxsize` kata.
+- Lapis 2: sqlite `data/cache/stems.sqlite` (env STEM_CACHE_PATH; tabel
+  `stems(word, stem)`), dibaca saat miss LRU. Stem baru ditampung lalu ditulis
+  per batch (`flush`) dan otomatis saat proses berhenti, jadi kata yang sama
+  tidak pernah di-stem dua kali, juga antar-run. Saat dibuka, hingga `maxsize`
+  entri dimuat ke LRU. Proses anak hasil fork membuka cache (dan koneksi) baru.
+
+Dokumen di-stem per kosakata unik (`stem_tokens`), bukan per kemunculan.
+"""
+
+import os
+import sqlite3
+import threading
+from collections import OrderedDict
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+CACHE_PATH = Path(os.environ.get("STEM_CACHE_PATH", ROOT / "data" / "cache" / "stems.sqlite"))
+
+FLUSH_EVERY = 5000  # stem baru yang ditampung sebelum ditulis ke sqlite
+
+
+class StemCache:
+    """Kata -> stem: LRU di memori + sqlite di disk; thread-safe."""
+
+    def __init__(self, path=CACHE_PATH, maxsize=200_000, stem_fn=None):
+        self.path = Path(path) if path else None
+        self.maxsize = maxsize
+        self._stem_fn = stem_fn
+        self._lru = OrderedDict()
+        self._pending = {}
+        self._lock = threading.Lock()
+        self._db = None
+        self.hits = self.disk_hits = self.misses = 0
+        if self.path is not None:
+            self._open_db()
+
+    def _open_db(self):
+        try:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            self._db = sqlite3.connect(self.path, timeout=30, check_same_thread=False)
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute("CREATE TABLE IF NOT EXISTS stems "
+                             "(word TEXT PRIMARY KEY, stem TEXT NOT NULL) WITHOUT ROWID")
+            rows = self._db.execute("SELECT word, stem FROM stems LIMIT ?", (self.maxsize,))
+            self._lru.update(rows)
+        except sqlite3.Error as e:
+            print(f"[WARN] Cache stem {self.path} tidak bisa dibuka: {e}")
+            self._db = None
+
+    def _stemmer(self):
+        if self._stem_fn is None:
+            from src.preprocess import get_stemmer
+            self._stem_fn = get_stemmer().stem
+        return self._stem_fn
+
+    # --------------------------------------------------------
+    # Lookup
+    # --------------------------------------------------------
+    def stem_many(self, words):
+        """dict kata -> stem untuk kata unik `words` (LRU -> sqlite -> Sastrawi)."""
+        out, missing = {}, []
+        with self._lock:
+            for w in set(words):
+                s = self._lru.get(w)
+                if s is None:
+                    missing.append(w)
+                else:
+                    self._lru.move_to_end(w)
+                    out[w] = s
+            self.hits += len(out)
+
+            if missing and self._db is not None:
+                found = {}
+                for i in range(0, len(missing), 900):  # batas parameter sqlite
+                    chunk = missing[i:i + 900]
+                    found.update(self._db.execute(
+                        f"SELECT word, stem FROM stems WHERE word IN ({','.join('?' * len(chunk))})",
+                        chunk))
+                self.disk_hits += len(found)
+                self._remember(found)
+                out.update(found)
+                missing = [w for w in missing if w not in found]
+
+        if missing:
+            stem = self._stemmer()
+            new = {w: stem(w) for w in missing}
+            with self._lock:
+                self.misses += len(new)
+                self._remember(new)
+                self._pending.update(new)
+                flush = len(self._pending) >= FLUSH_EVERY
+            out.update(new)
+            if flush:
+                self.flush()
+        return out
+
+    def stem(self, word):
+        return self.stem_many((word,))[word]
+
+    def stem_tokens(self, tokens):
+        """Stem list token: setiap kata unik di-stem sekali."""
+        table = self.stem_many(tokens)
+        return [table[t] for t in tokens]
+
+    def _remember(self, items):
+        self._lru.update(items)
+        for w in items:
+            self._lru.move_to_end(w)
+        while len(self._lru) > self.maxsize:
+            self._lru.popitem(last=False)
+
+    # --------------------------------------------------------
+    # Persistensi
+    # --------------------------------------------------------
+    def flush(self):
+        """Tulis stem baru ke sqlite; return jumlah entri yang ditulis."""
+        with self._lock:
+            items, self._pending = list(self._pending.items()), {}
+            if not items or self._db is None:
+                return 0
+            try:
+                with self._db:
+                    self._db.executemany("INSERT OR IGNORE INTO stems VALUES (?, ?)", items)
+            except sqlite3.Error as e:
+                print(f"[WARN] Gagal menyimpan cache stem: {e}")
+                return 0
+        return len(items)
+
+    def stats(self):
+        with self._lock:
+            total = self.hits + self.disk_hits + self.misses
+            return {"size": len(self._lru), "maxsize": self.maxsize,
+                    "hits": self.hits, "disk_hits": self.disk_hits, "misses": self.misses,
+                    "pending": len(self._pending),
+                    "hit_rate": (self.hits + self.disk_hits) / total if total else 0.0}
+
+
+_cache = None
+_cache_pid = None
+_cache_lock = threading.Lock()
+_inherited = []  # cache milik proses induk (fork): dipegang agar koneksinya tidak ditutup
+
+
+def _reset_after_fork():
+    """
+    Anak hasil fork tidak boleh memakai koneksi sqlite induk, dan lock yang
+    sedang dipegang thread lain saat fork tidak akan pernah dilepas di anak.
+    """
+    global _cache, _cache_pid, _cache_lock
+    if _cache is not None:
+        _inherited.append(_cache)
+    _cache, _cache_pid, _cache_lock = None, None, threading.Lock()
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_reset_after_fork)
+
+
+def _flush_at_exit():
+    if _cache is not None and _cache_pid == os.getpid():
+        _cache.flush()
+
+
+def get_stem_cache():
+    """Cache stem bersama per proses (disimpan otomatis saat proses berhenti)."""
+    global _cache, _cache_pid
+    if _cache_pid != os.getpid():
+        _reset_after_fork()  # cadangan bila register_at_fork tidak tersedia
+    if _cache is None:
+        with _cache_lock:
+            if _cache is None:
+                import atexit
+                _cache, _cache_pid = StemCache(), os.getpid()
+                atexit.register(_flush_at_exit)
+    return _cache
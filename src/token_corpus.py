@@ -0,0 +1,151 @@
+# src/token_corpus.py
+"""
+Keluaran biner preprocessing: korpus sebagai term-id, siap dipakai indexer
+tanpa parsing string.
+
+- `vocab.lst`       : kosakata bersama, append-only (baris ke-i = term-id i),
+                      sehingga id lama tidak pernah berubah antar-run.
+- `corpus_ids.bin`  : file indeks ber-mmap (`src.index_store`) berisi
+                      `ids` (uint32, token seluruh dokumen berurutan),
+                      `offsets` (int64, N+1) dan nama dokumen.
+
+Worker preprocess mengirim kosakata lokal + id lokal per dokumen; proses
+utama memetakannya ke id global (`update_corpus`). Dokumen lama yang belum
+punya id (hasil versi sebelumnya) di-tokenisasi sekali dari `.txt`-nya.
+"""
+
+import os
+from pathlib import Path
+
+import numpy as np
+
+from src.index_store import MappedIndexFile, write_index_file
+
+VOCAB_NAME = "vocab.lst"
+CORPUS_NAME = "corpus_ids.bin"
+
+
+def load_vocab(proc_dir, size=None):
+    """Kosakata bersama (list), opsional hanya `size` entri pertama."""
+    try:
+        with open(Path(proc_dir) / VOCAB_NAME, encoding="utf-8") as f:
+            words = f.read().split("\n")
+    except FileNotFoundError:
+        return []
+    words = words[:-1] if words and words[-1] == "" else words
+    return words if size is None else words[:size]
+
+
+def _append_vocab(proc_dir, words):
+    with open(Path(proc_dir) / VOCAB_NAME, "a", encoding="utf-8") as f:
+        f.write("".join(w + "\n" for w in words))
+        f.flush()
+        os.fsync(f.fileno())
+
+
+class TokenCorpus:
+    """Korpus term-id: dokumen i = ids[offsets[i]:offsets[i+1]] (id -> `vocab`)."""
+
+    def __init__(self, vocab, ids, offsets, names):
+        self.vocab = vocab
+        self.ids = ids
+        self.offsets = offsets
+        self.names = names
+        self._pos = None
+
+    @classmethod
+    def open(cls, proc_dir):
+        """Buka `corpus_ids.bin` (mmap); None jika belum ada atau tidak valid."""
+        try:
+            f = MappedIndexFile(Path(proc_dir) / CORPUS_NAME)
+        except (OSError, ValueError):
+            return None
+        from src.vsm_ir import StringTable
+
+        vocab = load_vocab(proc_dir, f.meta["vocab_size"])
+        if len(vocab) < f.meta["vocab_size"]:
+            return None
+        names = list(StringTable(f.sections["names_buf"], f.sections["names_off"]))
+        return cls(vocab, f.sections["ids"], f.sections["offsets"], names)
+
+    def __len__(self):
+        return len(self.names)
+
+    @property
+    def lens(self):
+        return np.diff(self.offsets).astype(np.int32)
+
+    def position(self, name):
+        if self._pos is None:
+            self._pos = {n: i for i, n in enumerate(self.names)}
+        return self._pos.get(name)
+
+    def doc_ids(self, i):
+        return self.ids[self.offsets[i]:self.offsets[i + 1]]
+
+    def __getitem__(self, i):
+        """Teks hasil preprocess dokumen i (token dipisah spasi)."""
+        return " ".join(self.vocab[t] for t in self.doc_ids(i))
+
+    def index_terms(self, docs=None):
+        """
+        (term_ids, lens, vocab) untuk indexer: hanya term yang muncul, dengan
+        id dipetakan ke vocab terurut. `docs` = subset dokumen (default semua).
+        """
+        if docs is None:
+            ids, lens = self.ids, self.lens
+        else:
+            docs = np.asarray(docs, dtype=np.int64)
+            lens = (self.offsets[docs + 1] - self.offsets[docs]).astype(np.int32)
+            ids = np.concatenate([self.doc_ids(d) for d in docs]) if len(docs) else \
+                np.zeros(0, np.uint32)
+        used = np.flatnonzero(np.bincount(ids, minlength=len(self.vocab)))
+        words = np.array([self.vocab[t] for t in used], dtype=str)
+        order = np.argsort(words, kind="stable")
+        remap = np.zeros(len(self.vocab), dtype=np.int64)
+        remap[used[order]] = np.arange(used.size)
+        return remap[ids], lens, list(words[order])
+
+
+def update_corpus(proc_dir, new, names):
+    """
+    Tulis ulang `corpus_ids.bin` untuk dokumen `names` (urutan dipertahankan).
+    `new` = {nama: (kosakata_lokal, id_lokal)} dari worker; dokumen lain diambil
+    dari korpus lama, atau di-tokenisasi dari `.txt` bila belum ada.
+    """
+    from src.vsm_ir import StringTable
+
+    proc_dir = Path(proc_dir)
+    old = TokenCorpus.open(proc_dir)
+    vocab = load_vocab(proc_dir)
+    t2i = {w: i for i, w in enumerate(vocab)}
+    added = []
+
+    def global_ids(words):
+        for w in words:
+            if w not in t2i:
+                t2i[w] = len(t2i)
+                added.append(w)
+        return np.array([t2i[w] for w in words], dtype=np.uint32)
+
+    parts = []
+    for name in names:
+        if name in new:
+            local_vocab, local_ids = new[name]
+            parts.append(global_ids(local_vocab)[local_ids] if len(local_ids) else
+                         np.zeros(0, np.uint32))
+        elif old is not None and old.position(name) is not None:
+            parts.append(np.asarray(old.doc_ids(old.position(name))))
+        else:
+            toks = (proc_dir / name).read_text(encoding="utf-8", errors="ignore").split()
+            parts.append(global_ids(toks))
+
+    if added:
+        _append_vocab(proc_dir, added)
+    offsets = np.zeros(len(parts) + 1, dtype=np.int64)
+    np.cumsum([p.size for p in parts], out=offsets[1:])
+    table = StringTable.from_strings(names)
+    write_index_file(proc_dir / CORPUS_NAME,
+                     {"ids": np.concatenate(parts) if parts else np.zeros(0, np.uint32),
+                      "offsets": offsets, "names_buf": table.buf, "names_off": table.off},
+                     file_id=0, meta={"vocab_size": len(t2i)})
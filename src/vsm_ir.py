@@ -0,0 +1,772 @@
+# src/vsm_ir.py
+"""
+Vector Space Model IR: TF-IDF (normal / sublinear) dan BM25.
+
+Dua jalur retrieval:
+1. Inverted index terkompresi (`InvertedIndex`) dengan top-k MaxScore,
+   dipakai oleh RAG. Latensi sebanding dengan posting list term query,
+   bukan ukuran korpus.
+2. Matriks term-dokumen CSR float32 (`build_term_stats` + `tfidf_matrix`,
+   baris TF-IDF ter-normalisasi L2) untuk skoring penuh / evaluasi.
+
+Format posting list:
+- posting per term diurutkan berdasarkan doc-id, dipecah per blok BLOCK_SIZE
+- tiap blok = [delta doc-id x n][tf x n] dalam varint (7 bit per byte)
+- `blk_last` (doc-id terakhir tiap blok) berfungsi sebagai skip pointer
+- per term disimpan `max_tf`, `min_len` (batas atas BM25) dan batas atas
+  kontribusi cosine per skema TF-IDF.
+- posisi token per posting (delta+varint) di buffer terpisah dengan offset
+  per blok (`blk_pos_off`), hanya di-decode untuk dokumen kandidat
+  (phrase query / proximity, lihat `src.phrase_ir`).
+"""
+
+import copy
+from itertools import chain
+from pathlib import Path
+
+import numpy as np
+import scipy.sparse as sp
+
+from src.preprocess import preprocess_text
+
+# --- Direktori utama ---
+ROOT = Path(__file__).resolve().parents[1]
+DOCS_DIR = ROOT / "data" / "docs"
+PROC_DIR = ROOT / "data" / "processed"
+LOG_NAME = "preprocess_log.txt"
+
+BLOCK_SIZE = 128
+BM25_K1 = 1.5
+BM25_B = 0.75
+SCHEMES = ("normal", "sublinear", "bm25")
+
+
+# ------------------------------------------------------------
+# Load korpus hasil preprocessing
+# ------------------------------------------------------------
+def load_processed(proc_dir=PROC_DIR):
+    """Baca semua dokumen hasil preprocess (token ter-stem dipisah spasi)."""
+    files = sorted(p for p in Path(proc_dir).glob("*.txt") if p.name != LOG_NAME)
+    docs = [p.read_text(encoding="utf-8", errors="ignore") for p in files]
+    names = [p.name for p in files]
+    return docs, names
+
+
+def load_raw(names, docs_dir=DOCS_DIR, fallback=None):
+    """
+    Teks asli dokumen (data/docs) untuk ekstraksi kalimat. Jika file asli
+    tidak ada, pakai `fallback[i]` (mis. teks hasil preprocess).
+    """
+    raw = []
+    for i, name in enumerate(names):
+        p = Path(docs_dir) / name
+        if p.exists():
+            raw.append(p.read_text(encoding="utf-8", errors="ignore"))
+        else:
+            raw.append(fallback[i] if fallback is not None else "")
+    return raw
+
+
+def preprocess_query(query):
+    """Query diproses dengan pipeline yang sama seperti dokumen."""
+    return preprocess_text(query)
+
+
+# ------------------------------------------------------------
+# Bobot
+# ------------------------------------------------------------
+def idf_weights(DF, N):
+    """IDF halus (smooth) untuk TF-IDF: log((N+1)/(df+1)) + 1."""
+    return np.log((N + 1) / (np.asarray(DF, dtype=np.float64) + 1)) + 1.0
+
+
+def bm25_idf(DF, N):
+    """IDF BM25 (selalu non-negatif)."""
+    DF = np.asarray(DF, dtype=np.float64)
+    return np.log(1.0 + (N - DF + 0.5) / (DF + 0.5))
+
+
+def tf_weight(tf, sublinear=False):
+    tf = np.asarray(tf, dtype=np.float64)
+    if sublinear:
+        return np.where(tf > 0, 1.0 + np.log(np.maximum(tf, 1.0)), 0.0)
+    return tf
+
+
+def bm25_tf_part(tf, doc_len, avg_len, k1=BM25_K1, b=BM25_B):
+    """Komponen tf BM25: tf*(k1+1) / (tf + k1*(1-b+b*len/avg))."""
+    tf = np.asarray(tf, dtype=np.float64)
+    norm = k1 * (1.0 - b + b * np.asarray(doc_len, dtype=np.float64) / max(avg_len, 1e-9))
+    return tf * (k1 + 1.0) / (tf + norm)
+
+
+# ------------------------------------------------------------
+# Varint (delta) encoding, tervektorisasi dengan numpy
+# ------------------------------------------------------------
+def encode_varints(values, return_offsets=False):
+    """Encode bilangan non-negatif ke varint (LEB128). Opsional: offset byte tiap nilai."""
+    v = np.asarray(values, dtype=np.uint64)
+    if v.size == 0:
+        out = np.zeros(0, dtype=np.uint8)
+        return (out, np.zeros(0, dtype=np.int64)) if return_offsets else out
+
+    nbytes = np.ones(v.size, dtype=np.int64)
+    rest = v >> np.uint64(7)
+    while rest.any():
+        nbytes += rest > 0
+        rest >>= np.uint64(7)
+
+    starts = np.cumsum(nbytes) - nbytes
+    owner = np.repeat(np.arange(v.size), nbytes)
+    pos = np.arange(int(nbytes.sum())) - starts[owner]
+    out = ((v[owner] >> (pos * 7).astype(np.uint64)) & np.uint64(0x7F)).astype(np.uint8)
+    out[pos < nbytes[owner] - 1] |= 0x80
+    return (out, starts) if return_offsets else out
+
+
+def decode_varints(buf):
+    """Decode buffer varint menjadi array int64."""
+    buf = np.asarray(buf, dtype=np.uint8)
+    if buf.size == 0:
+        return np.zeros(0, dtype=np.int64)
+    if buf.max() < 0x80:  # jalur cepat: semua nilai muat dalam 1 byte
+        return buf.astype(np.int64)
+
+    ends = np.flatnonzero(buf < 0x80)
+    starts = np.empty_like(ends)
+    starts[0] = 0
+    starts[1:] = ends[:-1] + 1
+    group_start = np.repeat(starts, ends - starts + 1)
+    shift = ((np.arange(buf.size) - group_start) * 7).astype(np.uint64)
+    vals = (buf & 0x7F).astype(np.uint64) << shift
+    return np.add.reduceat(vals, starts).astype(np.int64)
+
+
+# ------------------------------------------------------------
+# Tabel string (vocab, nama dokumen, document store)
+# ------------------------------------------------------------
+class StringTable:
+    """
+    Daftar string sebagai satu buffer UTF-8 kontigu + array offset, sehingga
+    bisa disimpan / di-mmap apa adanya tanpa membuat jutaan objek str.
+    """
+
+    def __init__(self, buf, off):
+        self.buf = buf
+        self.off = off
+
+    @classmethod
+    def from_strings(cls, strings):
+        enc = [s.encode("utf-8") for s in strings]
+        off = np.zeros(len(enc) + 1, dtype=np.int64)
+        np.cumsum([len(e) for e in enc], out=off[1:])
+        return cls(np.frombuffer(b"".join(enc), dtype=np.uint8), off)
+
+    def __len__(self):
+        return len(self.off) - 1
+
+    def raw_bytes(self, i):
+        return self.buf[self.off[i]:self.off[i + 1]].tobytes()
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return [self[j] for j in range(*i.indices(len(self)))]
+        i = int(i)
+        if i < 0:
+            i += len(self)
+        if not 0 <= i < len(self):
+            raise IndexError(i)
+        return self.raw_bytes(i).decode("utf-8")
+
+    def __iter__(self):
+        return (self[i] for i in range(len(self)))
+
+    def to_array(self):
+        """Semua string sebagai array numpy unicode (untuk searchsorted / union)."""
+        return np.array(list(self), dtype=str) if len(self) else np.zeros(0, dtype="<U1")
+
+    def find(self, s):
+        """Posisi `s` pada tabel yang terurut (binary search); None jika tidak ada."""
+        key = s.encode("utf-8")
+        lo, hi = 0, len(self)
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self.raw_bytes(mid) < key:
+                lo = mid + 1
+            else:
+                hi = mid
+        if lo < len(self) and self.raw_bytes(lo) == key:
+            return lo
+        return None
+
+
+def as_string_table(strings):
+    return strings if isinstance(strings, StringTable) else StringTable.from_strings(strings)
+
+
+# ------------------------------------------------------------
+# Inverted index terkompresi
+# ------------------------------------------------------------
+class InvertedIndex:
+    """
+    Inverted index dengan posting list delta+varint per blok dan top-k MaxScore.
+
+    Dibangun lewat `build_index(docs, names)`. Vocab (terurut) dan nama dokumen
+    disimpan sebagai `StringTable`, sisanya array numpy, sehingga seluruh indeks
+    bisa ditulis / di-mmap apa adanya (lihat `src.index_store`).
+    """
+
+    ARRAYS = ("lens", "df", "term_blk_ptr", "blk_last", "blk_n", "blk_off", "postings",
+              "max_tf", "min_len", "ub_normal", "ub_sublinear", "norm_normal", "norm_sublinear",
+              "positions", "blk_pos_off")
+
+    def __init__(self, vocab, names, lens, df, term_blk_ptr, blk_last, blk_n, blk_off,
+                 postings, max_tf, min_len, ub_normal, ub_sublinear,
+                 norm_normal, norm_sublinear, positions, blk_pos_off):
+        self.vocab = as_string_table(vocab)
+        self.names = as_string_table(names)
+        self.lens = lens
+        self.N = len(names)
+        self.avg_len = float(lens.mean()) if self.N else 0.0
+        self.df = df
+        self.term_blk_ptr = term_blk_ptr
+        self.blk_last = blk_last
+        self.blk_n = blk_n
+        self.blk_off = blk_off
+        self.postings_buf = postings
+        self.positions_buf = positions
+        self.blk_pos_off = blk_pos_off
+        self.max_tf = max_tf
+        self.min_len = min_len
+        # skema cosine -> (batas atas kontribusi per term, norma dokumen)
+        self._cos = {"normal": (ub_normal, norm_normal),
+                     "sublinear": (ub_sublinear, norm_sublinear)}
+        self.idf = idf_weights(df, self.N)
+        self.idf_bm25 = bm25_idf(df, self.N)
+
+    # --------------------------------------------------------
+    # Pembangunan indeks
+    # --------------------------------------------------------
+    @classmethod
+    def from_token_ids(cls, term_ids, lens, vocab, names, block_size=BLOCK_SIZE):
+        """
+        Bangun indeks dari urutan term-id seluruh korpus (dokumen berurutan,
+        panjang tiap dokumen = `lens`). Semua langkah tervektorisasi.
+        """
+        N, V = len(names), len(vocab)
+        lens = np.asarray(lens, dtype=np.int32)
+        term_ids = np.asarray(term_ids, dtype=np.int64)
+        doc_ids = np.repeat(np.arange(N, dtype=np.int64), lens)
+        tok_pos = np.arange(term_ids.size) - np.repeat(np.cumsum(lens) - lens, lens)
+
+        # Pasangan (term, doc) unik + tf, terurut term lalu doc
+        key, tf = np.unique(term_ids * max(N, 1) + doc_ids, return_counts=True)
+        p_term, p_doc = key // max(N, 1), key % max(N, 1)
+        df = np.bincount(p_term, minlength=V).astype(np.int32)
+        ptr = np.zeros(V + 1, dtype=np.int64)
+        np.cumsum(df, out=ptr[1:])
+
+        # Blok posting per term
+        nblk = (df.astype(np.int64) + block_size - 1) // block_size
+        term_blk_ptr = np.zeros(V + 1, dtype=np.int64)
+        np.cumsum(nblk, out=term_blk_ptr[1:])
+        blk_term = np.repeat(np.arange(V), nblk)
+        blk_j = np.arange(blk_term.size) - term_blk_ptr[blk_term]
+        blk_start = ptr[blk_term] + blk_j * block_size
+        blk_end = np.minimum(blk_start + block_size, ptr[blk_term + 1])
+        blk_n = (blk_end - blk_start).astype(np.int32)
+        blk_last = p_doc[blk_end - 1].astype(np.int32) if blk_term.size else np.zeros(0, np.int32)
+
+        # Delta doc-id dalam satu term (posting pertama: delta dari 0)
+        delta = np.diff(p_doc, prepend=0)
+        delta[ptr[:-1][df > 0]] = p_doc[ptr[:-1][df > 0]]
+
+        # Susun nilai per blok: [delta x n][tf x n]
+        blk_of_post = np.repeat(np.arange(blk_term.size), blk_n)
+        local = np.arange(p_doc.size) - blk_start[blk_of_post]
+        base = 2 * blk_start[blk_of_post]
+        seq = np.empty(2 * p_doc.size, dtype=np.int64)
+        seq[base + local] = delta
+        seq[base + blk_n[blk_of_post] + local] = tf
+        postings, val_off = encode_varints(seq, return_offsets=True)
+        blk_off = np.empty(blk_term.size + 1, dtype=np.int64)
+        blk_off[:-1] = val_off[2 * blk_start]
+        blk_off[-1] = postings.size
+
+        # Posisi token terurut (term, doc, posisi) = urutan posting; delta per posting
+        order = np.lexsort((tok_pos, doc_ids, term_ids))
+        pos = tok_pos[order]
+        post_tok = np.cumsum(tf) - tf  # token pertama tiap posting
+        pos_delta = np.diff(pos, prepend=0)
+        pos_delta[post_tok] = pos[post_tok]
+        positions, pos_off = encode_varints(pos_delta, return_offsets=True)
+        blk_pos_off = np.empty(blk_term.size + 1, dtype=np.int64)
+        blk_pos_off[:-1] = pos_off[post_tok[blk_start]] if blk_term.size else 0
+        blk_pos_off[-1] = positions.size
+
+        # Statistik batas atas (upper bound) per term
+        seg = ptr[:-1][df > 0]
+        max_tf = np.zeros(V, dtype=np.int32)
+        min_len = np.zeros(V, dtype=np.int32)
+        if seg.size:
+            max_tf[df > 0] = np.maximum.reduceat(tf, seg)
+            min_len[df > 0] = np.minimum.reduceat(lens[p_doc], seg)
+
+        idf = idf_weights(df, N)
+        extra = {}
+        for scheme in ("normal", "sublinear"):
+            ub, norm = cosine_bounds(p_term, p_doc, tf, df, idf, N, scheme == "sublinear")
+            extra[f"ub_{scheme}"] = ub
+            extra[f"norm_{scheme}"] = norm
+
+        return cls(vocab, names, lens, df, term_blk_ptr, blk_last, blk_n, blk_off,
+                   postings, max_tf, min_len, positions=positions, blk_pos_off=blk_pos_off,
+                   **extra)
+
+    def to_arrays(self):
+        """Semua isi indeks sebagai dict nama -> array 1-D (untuk diserialisasi)."""
+        arrays = {
+            "lens": self.lens, "df": self.df, "term_blk_ptr": self.term_blk_ptr,
+            "blk_last": self.blk_last, "blk_n": self.blk_n, "blk_off": self.blk_off,
+            "postings": self.postings_buf, "max_tf": self.max_tf, "min_len": self.min_len,
+            "ub_normal": self._cos["normal"][0], "ub_sublinear": self._cos["sublinear"][0],
+            "norm_normal": self._cos["normal"][1], "norm_sublinear": self._cos["sublinear"][1],
+            "positions": self.positions_buf, "blk_pos_off": self.blk_pos_off,
+            "vocab_buf": self.vocab.buf, "vocab_off": self.vocab.off,
+            "names_buf": self.names.buf, "names_off": self.names.off,
+        }
+        return arrays
+
+    @classmethod
+    def from_arrays(cls, arrays):
+        vocab = StringTable(arrays["vocab_buf"], arrays["vocab_off"])
+        names = StringTable(arrays["names_buf"], arrays["names_off"])
+        return cls(vocab, names, *(arrays[k] for k in cls.ARRAYS))
+
+    def all_postings(self):
+        """Decode seluruh posting -> (terms, docs, tfs), terurut term lalu doc."""
+        nblk = np.diff(self.term_blk_ptr)
+        first = np.repeat(self.term_blk_ptr[:-1], nblk)  # blok pertama tiap term: base 0
+        docs, tfs = self._decode_blocks(np.arange(int(nblk.sum())), first)
+        terms = np.repeat(np.arange(len(self.vocab)), self.df)
+        return terms, docs, tfs
+
+    def tf_csr(self):
+        """Matriks TF CSR [docs x vocab] float32 hasil decode seluruh posting."""
+        terms, docs, tfs = self.all_postings()
+        return sp.csr_matrix((tfs.astype(np.float32), (docs, terms)),
+                             shape=(self.N, len(self.vocab)), dtype=np.float32)
+
+    def with_stats(self, df, N, avg_len):
+        """
+        View indeks (berbagi posting) yang diskor dengan statistik koleksi
+        global: `df` sejajar vocab indeks ini, `N` dan `avg_len` seluruh korpus.
+        Dipakai untuk segmen; norma cosine dihitung ulang saat pertama diminta.
+        """
+        view = copy.copy(self)
+        view.idf = idf_weights(df, N)
+        view.idf_bm25 = bm25_idf(df, N)
+        view.avg_len = avg_len
+        view._cos = {}
+        return view
+
+    def cosine_stats(self, scheme):
+        """(batas atas per term, norma dokumen) untuk skema cosine `scheme`."""
+        cached = self._cos.get(scheme)
+        if cached is None:
+            terms, docs, tfs = self.all_postings()
+            cached = cosine_bounds(terms, docs, tfs, self.df, self.idf, self.N,
+                                   scheme == "sublinear")
+            self._cos[scheme] = cached
+        return cached
+
+    # --------------------------------------------------------
+    # Akses posting list
+    # --------------------------------------------------------
+    def term_id(self, term):
+        return self.vocab.find(term)
+
+    def _decode_blocks(self, blocks, first_blk):
+        """
+        Decode sekumpulan blok terurut -> (docs, tfs). `first_blk` = blok pertama
+        term pemilik (skalar, atau array per blok bila lintas term).
+        """
+        if blocks.size == 0:
+            return np.zeros(0, np.int64), np.zeros(0, np.int64)
+        off = self.blk_off
+        contiguous = blocks[-1] - blocks[0] + 1 == blocks.size
+        if contiguous:
+            vals = decode_varints(self.postings_buf[off[blocks[0]]:off[blocks[-1] + 1]])
+        else:
+            vals = decode_varints(np.concatenate(
+                [self.postings_buf[off[b]:off[b + 1]] for b in blocks]))
+
+        n = self.blk_n[blocks].astype(np.int64)
+        vstart = np.repeat(np.cumsum(2 * n) - 2 * n, 2 * n)
+        is_delta = (np.arange(vals.size) - vstart) < np.repeat(n, 2 * n)
+        deltas, tfs = vals[is_delta], vals[~is_delta]
+
+        base = np.where(blocks > first_blk, self.blk_last[np.maximum(blocks - 1, 0)], 0)
+        cs = np.cumsum(deltas)
+        dstart = np.cumsum(n) - n
+        prefix = np.where(dstart > 0, cs[np.maximum(dstart - 1, 0)], 0)
+        docs = cs - np.repeat(prefix, n) + np.repeat(base.astype(np.int64), n)
+        return docs, tfs
+
+    def _decode_positions(self, b0, b1, tfs):
+        """Posisi (absolut dalam dokumen) seluruh posting pada blok b0..b1-1, terurut."""
+        vals = decode_varints(self.positions_buf[self.blk_pos_off[b0]:self.blk_pos_off[b1]])
+        start = np.cumsum(tfs) - tfs
+        cs = np.cumsum(vals)
+        prefix = np.where(start > 0, cs[np.maximum(start - 1, 0)], 0)
+        return cs - np.repeat(prefix, tfs)
+
+    def positions(self, t, docs):
+        """
+        Posisi term `t` pada dokumen `docs` (terurut, semuanya memuat `t`).
+        Hanya blok yang memuat dokumen tersebut yang di-decode.
+        Return list array posisi, sejajar `docs`.
+        """
+        b0, b1 = self.term_blk_ptr[t], self.term_blk_ptr[t + 1]
+        blocks = np.unique(np.searchsorted(self.blk_last[b0:b1], docs, side="left")) + b0
+        out = {}
+        for b in blocks:
+            bdocs, tfs = self._decode_blocks(np.array([b]), b0)
+            pos = self._decode_positions(b, b + 1, tfs)
+            ends = np.cumsum(tfs)
+            for d, e, n in zip(bdocs, ends, tfs):
+                out[int(d)] = pos[e - n:e]
+        return [out[int(d)] for d in docs]
+
+    def token_stream(self):
+        """Rekonstruksi urutan term-id seluruh korpus (dokumen berurutan) dari posisi."""
+        terms, docs, tfs = self.all_postings()
+        pos = self._decode_positions(0, len(self.blk_n), tfs)
+        doc_start = np.cumsum(self.lens.astype(np.int64)) - self.lens
+        out = np.empty(int(self.lens.sum()), dtype=np.int64)
+        out[np.repeat(doc_start[docs], tfs) + pos] = np.repeat(terms, tfs)
+        return out
+
+    def postings(self, t):
+        """Posting list lengkap term-id `t` -> (doc_ids, tfs)."""
+        b0, b1 = self.term_blk_ptr[t], self.term_blk_ptr[t + 1]
+        return self._decode_blocks(np.arange(b0, b1), b0)
+
+    def postings_for(self, t, cand_docs):
+        """
+        Posting term `t` yang dibatasi ke `cand_docs` (terurut). Hanya blok
+        yang rentang doc-id-nya memuat kandidat yang di-decode (skip pointer).
+        """
+        b0, b1 = self.term_blk_ptr[t], self.term_blk_ptr[t + 1]
+        if cand_docs.size == 0 or b1 == b0:
+            return np.zeros(0, np.int64), np.zeros(0, np.int64)
+        pos = np.searchsorted(self.blk_last[b0:b1], cand_docs, side="left")
+        blocks = np.unique(pos[pos < b1 - b0]) + b0
+        docs, tfs = self._decode_blocks(blocks, b0)
+        keep = np.isin(docs, cand_docs, assume_unique=True)
+        return docs[keep], tfs[keep]
+
+    # --------------------------------------------------------
+    # Skoring
+    # --------------------------------------------------------
+    def query_terms(self, query):
+        """Query mentah -> (term_ids unik, tf query)."""
+        return self.stem_ids(preprocess_query(query))
+
+    def stem_ids(self, stems):
+        """Stem query (sudah di-preprocess) -> (term_ids unik, tf query)."""
+        ids = [self.term_id(t) for t in stems]
+        ids = np.array([i for i in ids if i is not None], dtype=np.int64)
+        if ids.size == 0:
+            return ids, ids
+        return np.unique(ids, return_counts=True)
+
+    def _weights(self, q_ids, q_tf, scheme, q_norm=None):
+        """
+        Bobot query per term + batas atas kontribusi term ke skor dokumen.
+        `q_norm` = norma vektor query cosine; default dihitung dari term yang
+        ada di indeks ini (segmen memberi norma global, lihat `query_norm`).
+        """
+        if scheme == "bm25":
+            w = q_tf * self.idf_bm25[q_ids]
+            ub = w * bm25_tf_part(self.max_tf[q_ids], self.min_len[q_ids], self.avg_len)
+        else:
+            w = tf_weight(q_tf, sublinear=scheme == "sublinear") * self.idf[q_ids]
+            w = w / max(np.linalg.norm(w) if q_norm is None else q_norm, 1e-12)
+            ub = w * self.cosine_stats(scheme)[0][q_ids]
+        return w, ub
+
+    def _term_scores(self, t, w, docs, tfs, scheme):
+        if scheme == "bm25":
+            return w * bm25_tf_part(tfs, self.lens[docs], self.avg_len)
+        weight = tf_weight(tfs, sublinear=scheme == "sublinear") * self.idf[t]
+        return w * weight / np.maximum(self.cosine_stats(scheme)[1][docs], 1e-12)
+
+    def top_k(self, q_ids, q_tf, k=5, scheme="bm25", q_norm=None):
+        """
+        Top-k term-at-a-time dengan pemangkasan MaxScore.
+
+        Term diproses dari batas atas terbesar. Begitu jumlah batas atas term
+        tersisa <= skor ke-k saat ini (theta), dokumen baru tidak mungkin masuk
+        top-k: term sisa hanya di-decode pada blok yang memuat kandidat, dan
+        kandidat yang tidak mungkin mencapai theta dibuang.
+        Return: (doc_ids, scores) terurut menurun.
+        """
+        if scheme not in SCHEMES:
+            raise ValueError(f"Skema tidak dikenal: {scheme}")
+        if q_ids.size == 0 or k <= 0:
+            return np.zeros(0, np.int64), np.zeros(0)
+
+        w, ub = self._weights(q_ids, q_tf, scheme, q_norm)
+        order = np.argsort(-ub, kind="stable")
+        remaining = float(ub.sum())
+        cand_docs = np.zeros(0, np.int64)
+        cand_scores = np.zeros(0)
+
+        for i in order:
+            t = q_ids[i]
+            if ub[i] <= 0:
+                continue
+            theta = np.partition(cand_scores, -k)[-k] if cand_scores.size >= k else 0.0
+            if cand_scores.size >= k and remaining <= theta:
+                # Mode pruning: hanya update kandidat yang masih bisa masuk top-k
+                keep = cand_scores + remaining > theta
+                cand_docs, cand_scores = cand_docs[keep], cand_scores[keep]
+                docs, tfs = self.postings_for(t, cand_docs)
+                hit = np.searchsorted(cand_docs, docs)
+                cand_scores[hit] += self._term_scores(t, w[i], docs, tfs, scheme)
+            else:
+                docs, tfs = self.postings(t)
+                scores = self._term_scores(t, w[i], docs, tfs, scheme)
+                all_docs = np.concatenate([cand_docs, docs])
+                cand_docs, inv = np.unique(all_docs, return_inverse=True)
+                cand_scores = np.bincount(inv, weights=np.concatenate([cand_scores, scores]))
+            remaining -= ub[i]
+
+        if cand_docs.size > k:
+            part = top_k_stable(cand_scores, k)
+            cand_docs, cand_scores = cand_docs[part], cand_scores[part]
+        order = np.lexsort((cand_docs, -cand_scores))
+        return cand_docs[order], cand_scores[order]
+
+    def score_docs(self, q_ids, q_tf, docs, scheme="bm25", q_norm=None):
+        """Skor lengkap untuk sekumpulan dokumen kandidat (terurut), mis. hasil boolean."""
+        if scheme not in SCHEMES:
+            raise ValueError(f"Skema tidak dikenal: {scheme}")
+        w, _ = self._weights(q_ids, q_tf, scheme, q_norm)
+        scores = np.zeros(docs.size)
+        for i, t in enumerate(q_ids):
+            d, tfs = self.postings_for(t, docs)
+            scores[np.searchsorted(docs, d)] += self._term_scores(t, w[i], d, tfs, scheme)
+        return scores
+
+    def search(self, query, top_k=5, scheme="bm25"):
+        """Return list of (nama_dokumen, skor, idx)."""
+        q_ids, q_tf = self.query_terms(query)
+        docs, scores = self.top_k(q_ids, q_tf, k=top_k, scheme=scheme)
+        return [(self.names[d], float(s), int(d)) for d, s in zip(docs, scores)]
+
+
+def top_k_stable(scores, k, ids=None):
+    """
+    Indeks k skor terbesar; skor yang seri di batas ke-k dipilih dari doc-id
+    terkecil (`ids`, default = indeks). argpartition saja memilih sembarang,
+    jadi hasil sama dengan pengurutan penuh (skor turun, doc-id naik).
+    """
+    theta = np.partition(scores, scores.size - k)[scores.size - k]
+    above = np.flatnonzero(scores > theta)
+    ties = np.flatnonzero(scores == theta)
+    if ids is not None:
+        ties = ties[np.argsort(ids[ties], kind="stable")]
+    return np.concatenate([above, ties[:k - above.size]])
+
+
+def query_norm(q_tf, df, N, sublinear=False):
+    """
+    Norma vektor query TF-IDF dari tf query + DF koleksi per term (term
+    dengan df 0 tidak ikut). Dipakai agar skor cosine per segmen sama dengan
+    skor atas seluruh korpus, walau segmen tidak memuat semua term query.
+    """
+    df = np.asarray(df)
+    w = tf_weight(np.asarray(q_tf)[df > 0], sublinear=sublinear) * idf_weights(df[df > 0], N)
+    return float(np.linalg.norm(w))
+
+
+def cosine_bounds(p_term, p_doc, tf, df, idf, N, sublinear=False):
+    """
+    Dari posting (terurut term) -> (batas atas w_td / |d| per term, norma dokumen)
+    untuk skema TF-IDF cosine dengan bobot `idf`.
+    """
+    w = tf_weight(tf, sublinear=sublinear) * idf[p_term]
+    norm = np.sqrt(np.bincount(p_doc, weights=w * w, minlength=N))
+    ub = np.zeros(len(df), dtype=np.float64)
+    seg = (np.cumsum(df) - df)[df > 0]
+    if seg.size:
+        ub[df > 0] = np.maximum.reduceat(w / np.maximum(norm[p_doc], 1e-12), seg)
+    return ub, norm
+
+
+def tokenize_corpus(docs):
+    """Dokumen hasil preprocess -> (vocab terurut, t2i, term_ids seluruh korpus, lens)."""
+    tokenized = [d.split() for d in docs]
+    lens = np.array([len(t) for t in tokenized], dtype=np.int32)
+    vocab = sorted(set(chain.from_iterable(tokenized)))
+    t2i = {t: i for i, t in enumerate(vocab)}
+    term_ids = np.fromiter((t2i[t] for toks in tokenized for t in toks),
+                           dtype=np.int64, count=int(lens.sum()))
+    return vocab, t2i, term_ids, lens
+
+
+def build_index(docs, names, block_size=BLOCK_SIZE):
+    """Bangun `InvertedIndex` dari dokumen hasil preprocess (string token)."""
+    vocab, _, term_ids, lens = tokenize_corpus(docs)
+    return InvertedIndex.from_token_ids(term_ids, lens, vocab, names, block_size=block_size)
+
+
+# ------------------------------------------------------------
+# Matriks term-dokumen (scipy.sparse CSR, float32)
+# ------------------------------------------------------------
+def tf_csr(term_ids, lens, V):
+    """Matriks TF CSR [docs x vocab] float32 dari urutan term-id korpus."""
+    N = len(lens)
+    doc_ids = np.repeat(np.arange(N, dtype=np.int64), lens)
+    TF = sp.csr_matrix((np.ones(doc_ids.size, dtype=np.float32), (doc_ids, term_ids)),
+                       shape=(N, V), dtype=np.float32)
+    TF.sum_duplicates()
+    return TF
+
+
+def build_term_stats(docs):
+    """Return (vocab, t2i, TF CSR[docs x vocab], DF, lens, avg_len)."""
+    vocab, t2i, term_ids, lens = tokenize_corpus(docs)
+    TF = tf_csr(term_ids, lens, len(vocab))
+    DF = np.bincount(TF.indices, minlength=len(vocab)).astype(np.int32)
+    avg_len = float(lens.mean()) if len(lens) else 0.0
+    return vocab, t2i, TF, DF, lens, avg_len
+
+
+def l2_normalize_rows(X):
+    """Normalisasi L2 per baris CSR (in-place pada salinan); return (X_norm, row_norms)."""
+    X = X.tocsr(copy=True)
+    sq = np.asarray(X.multiply(X).sum(axis=1)).ravel()
+    norms = np.sqrt(sq).astype(np.float32)
+    scale = np.divide(1.0, norms, out=np.zeros_like(norms), where=norms > 0)
+    X.data *= np.repeat(scale, np.diff(X.indptr))
+    return X, norms
+
+
+def tfidf_matrix(TF, DF, N, sublinear=False):
+    """
+    Return (TFIDF, idf): CSR float32 dengan baris ter-normalisasi L2,
+    sehingga cosine similarity = satu sparse mat-vec `TFIDF @ q`.
+    `sublinear=True` memakai 1 + log(tf).
+    """
+    idf = idf_weights(DF, N).astype(np.float32)
+    W = TF.tocsr(copy=True).astype(np.float32)
+    if sublinear:
+        W.data = tf_weight(W.data, sublinear=True).astype(np.float32)
+    W.data *= idf[W.indices]
+    TFIDF, _ = l2_normalize_rows(W)
+    return TFIDF, idf
+
+
+def search(query, index=None, TF=None, DF=None, lens=None, avg_len=None,
+           TFIDF=None, idf=None, t2i=None, names=None, docs=None,
+           top_k=5, scheme="normal"):
+    """
+    Cari top-k dokumen untuk query.
+
+    - `index=InvertedIndex`: jalur cepat (MaxScore) untuk semua skema.
+    - tanpa `index`: skoring penuh pada matriks CSR (`TF` untuk bm25,
+      `TFIDF` ter-normalisasi untuk normal/sublinear).
+    Return list of (nama_dokumen, skor, idx) terurut menurun.
+    """
+    if index is not None:
+        return index.search(query, top_k=top_k, scheme=scheme)
+
+    q_ids = [t2i[t] for t in preprocess_query(query) if t in t2i]
+    if not q_ids:
+        return []
+    q_ids, q_tf = np.unique(np.array(q_ids), return_counts=True)
+
+    if scheme == "bm25":
+        N = TF.shape[0]
+        w = q_tf * bm25_idf(np.asarray(DF)[q_ids], N)
+        sub = TF[:, q_ids].tocoo()
+        vals = bm25_tf_part(sub.data, np.asarray(lens)[sub.row], avg_len) * w[sub.col]
+        scores = np.bincount(sub.row, weights=vals, minlength=N)
+    else:
+        q = np.zeros(TFIDF.shape[1], dtype=np.float32)
+        q[q_ids] = tf_weight(q_tf, sublinear=scheme == "sublinear") * idf[q_ids]
+        q /= max(float(np.linalg.norm(q)), 1e-12)
+        scores = TFIDF @ q
+
+    top = top_k_indices(scores, top_k)
+    return [(names[i], float(scores[i]), int(i)) for i in top]
+
+
+def bm25_matrix(TF, lens, avg_len):
+    """CSR [docs x vocab] bagian tf BM25 per (dokumen, term); skor = Q_idf @ B.T."""
+    B = TF.tocsr(copy=True).astype(np.float32)
+    rows = np.repeat(np.arange(B.shape[0]), np.diff(B.indptr))
+    B.data = bm25_tf_part(B.data, np.asarray(lens)[rows], avg_len).astype(np.float32)
+    return B
+
+
+def query_matrix(queries, t2i):
+    """List stem per query (hasil `preprocess_query`) -> CSR jumlah term [queries x vocab]."""
+    rows, cols = [], []
+    for r, stems in enumerate(queries):
+        ids = [t2i[t] for t in stems if t in t2i]
+        rows += [r] * len(ids)
+        cols += ids
+    Q = sp.csr_matrix((np.ones(len(cols), dtype=np.float32), (rows, cols)),
+                      shape=(len(queries), len(t2i)), dtype=np.float32)
+    Q.sum_duplicates()
+    return Q
+
+
+def batch_scores(Q, scheme, DF, N, TFIDF=None, idf=None, B=None):
+    """
+    Skor semua query sekaligus: satu sparse mat-mat [queries x docs].
+    `Q` = hasil `query_matrix`; normal/sublinear butuh (TFIDF, idf), bm25 butuh B.
+    """
+    W = Q.copy()
+    if scheme == "bm25":
+        W.data *= bm25_idf(np.asarray(DF), N)[W.indices].astype(np.float32)
+        return (W @ B.T).tocsr()
+    W.data = tf_weight(W.data, sublinear=scheme == "sublinear").astype(np.float32)
+    W.data *= idf[W.indices]
+    W, _ = l2_normalize_rows(W)
+    return (W @ TFIDF.T).tocsr()
+
+
+def top_k_rows(S, k):
+    """Per baris CSR skor -> (doc_ids, scores) top-k skor > 0, urut seperti `top_k_indices`."""
+    out = []
+    for r in range(S.shape[0]):
+        lo, hi = S.indptr[r], S.indptr[r + 1]
+        docs, scores = S.indices[lo:hi], S.data[lo:hi]
+        keep = np.flatnonzero(scores > 0)
+        if keep.size > k:
+            keep = keep[top_k_stable(scores[keep], k, docs[keep])]
+        keep = keep[np.lexsort((docs[keep], -scores[keep]))]
+        out.append((docs[keep], scores[keep]))
+    return out
+
+
+def top_k_indices(scores, k):
+    """Indeks top-k skor > 0 (argpartition, bukan sort penuh)."""
+    nz = np.flatnonzero(scores > 0)
+    if nz.size > k:
+        nz = nz[top_k_stable(scores[nz], k)]
+    return nz[np.lexsort((nz, -scores[nz]))]
+
+
+if __name__ == "__main__":
+    docs, names = load_processed()
+    index = build_index(docs, names)
+    print(f"{index.N} dokumen, {len(index.vocab)} term, postings {index.postings_buf.nbytes} byte")
+    q = input("Query: ")
+    for scheme in SCHEMES:
+        print(scheme, index.search(q, top_k=5, scheme=scheme))